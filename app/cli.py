@@ -0,0 +1,681 @@
+# -*- coding: utf-8 -*-
+"""
+命令行入口
+无界面执行同步、查询、导入导出和批量变更，不依赖PyQt5/qfluentwidgets
+
+用法:
+    python -m app.cli list providers
+    python -m app.cli list domains [--provider ID]
+    python -m app.cli list records DOMAIN [--provider ID] [--remote] [--name NAME] [--type TYPE] [--value VALUE]
+    python -m app.cli sync [--provider ID] [--records] [--workers N] [--per-provider N]
+    python -m app.cli export FILE
+    python -m app.cli import FILE
+    python -m app.cli apply CHANGESET [--dry-run]
+    python -m app.cli plan STATE.yaml [--refresh]
+    python -m app.cli reconcile STATE.yaml [--refresh] [--workers N] [--dry-run]
+    python -m app.cli zone export DOMAIN FILE [--provider ID]
+    python -m app.cli zone import DOMAIN FILE [--provider ID] [--dry-run] [--keep-missing]
+    python -m app.cli snapshot list DOMAIN [--provider ID] [--limit N]
+    python -m app.cli snapshot take DOMAIN [--provider ID] [--label TEXT]
+    python -m app.cli snapshot show ID
+    python -m app.cli snapshot diff OLD_ID NEW_ID
+    python -m app.cli rollback DOMAIN (--snapshot ID | --log ID) [--provider ID] [--workers N] [--dry-run]
+    python -m app.cli mirror SOURCE_ID TARGET_ID [DOMAIN ...] [--workers N] [--zones N] [--keep-missing]
+                             [--type-map FROM=TO] [--include-apex-ns] [--dry-run] [--watch SECONDS]
+    python -m app.cli drift [--once] [--interval S] [--min-interval S] [--max-interval S] [--workers N]
+    python -m app.cli maintenance [--retention-days DAYS] [--archive] [--json]
+"""
+
+import sys
+import json
+import time
+import argparse
+from typing import List, Dict, Any, Optional, Tuple
+
+from .common.database import db
+from .common.sync import SyncJob, SyncStats
+from .common.rollback import log_record_change
+from .dns.base import DNSProviderFactory, DNSRecord, filter_records
+from .dns.zonefile import ZoneFileError
+
+
+class CLIError(Exception):
+    """命令行参数或数据错误"""
+    pass
+
+
+def create_provider(provider_data: Dict[str, Any]):
+    """根据数据库中的提供商配置创建DNS提供商实例"""
+    # 提供商实现在此时才导入，list/export等本地命令无需加载requests
+    return DNSProviderFactory.create_from_data(provider_data)
+
+
+def get_provider(provider_id: int) -> Dict[str, Any]:
+    """按ID获取提供商配置"""
+    provider = db.get_dns_provider(provider_id)
+    if provider is None:
+        raise CLIError(f'未找到DNS提供商: {provider_id}')
+    return provider
+
+
+def find_domain(domain: str, provider_id: Optional[int] = None) -> Dict[str, Any]:
+    """按域名（及可选的提供商ID）查找本地域名，多个提供商中都有该域名时需使用 --provider 指定"""
+    from .common.reconcile import find_domain as find_local_domain
+    
+    try:
+        return find_local_domain(domain, provider_id)
+    except ValueError as e:
+        raise CLIError(str(e))
+
+
+def load_document(file_path: str) -> Any:
+    """读取JSON或YAML文件"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        if file_path.endswith(('.yaml', '.yml')):
+            import yaml
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def print_rows(rows: List[Dict[str, Any]], columns: List[str], as_json: bool = False):
+    """输出表格数据"""
+    if as_json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2, default=str))
+        return
+    
+    print('\t'.join(columns))
+    for row in rows:
+        print('\t'.join('' if row.get(c) is None else str(row.get(c)) for c in columns))
+
+
+def cmd_list(args) -> int:
+    """列出提供商、域名或记录"""
+    if args.target == 'providers':
+        providers = db.get_dns_providers()
+        print_rows(providers, ['id', 'name', 'type', 'created_at'], args.json)
+    elif args.target == 'domains':
+        domains = db.get_domains(args.provider)
+        print_rows(domains, ['id', 'domain', 'provider_id', 'provider_name'], args.json)
+    else:
+        if not args.domain:
+            raise CLIError('列出记录时需要指定域名')
+        
+        domain = find_domain(args.domain, args.provider)
+        if args.remote:
+            provider = create_provider(get_provider(domain['provider_id']))
+            records = [r.to_dict() for r in provider.query_records(domain['domain'], args.name,
+                                                                    args.type, args.value)]
+        else:
+            from .common.reconcile import load_cached_records
+            records = [r.to_dict() for r in filter_records(load_cached_records(domain['id']),
+                                                           args.name, args.type, args.value)]
+        print_rows(records, ['id', 'name', 'type', 'value', 'ttl', 'priority'], args.json)
+    return 0
+
+
+def cmd_sync(args) -> int:
+    """从DNS提供商同步域名（及记录）到本地数据库，多账号、多域名并发执行"""
+    providers = db.get_dns_providers()
+    if args.provider:
+        providers = [p for p in providers if p['id'] == args.provider]
+        if not providers:
+            raise CLIError(f'未找到DNS提供商: {args.provider}')
+    
+    last_report = [0.0]
+    
+    def report(stats: SyncStats):
+        now = time.monotonic()
+        if stats.finished or now - last_report[0] >= 1.0:
+            last_report[0] = now
+            print(f'\r进度 {stats.zones_done}/{stats.zones_total} 个域名，'
+                  f'{stats.records} 条记录，{stats.zones_per_sec:.1f} 域名/秒，'
+                  f'{stats.records_per_sec:.0f} 记录/秒，错误 {len(stats.errors)}',
+                  end='', file=sys.stderr, flush=True)
+    
+    job = SyncJob(providers, sync_records=args.records, max_workers=args.workers,
+                  per_provider_limit=args.per_provider)
+    stats = job.run(report if args.records else None)
+    if args.records:
+        print(file=sys.stderr)
+    
+    for error in stats.errors:
+        print(error, file=sys.stderr)
+    print(f'提供商 {stats.providers} 个，新增域名 {stats.domains_added} 个，'
+          f'同步域名 {stats.zones_done} 个，记录 {stats.records} 条，耗时 {stats.elapsed:.1f} 秒')
+    
+    return 1 if stats.errors else 0
+
+
+def cmd_export(args) -> int:
+    """导出数据为JSON文件"""
+    data = db.export_data()
+    with open(args.file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f'已导出 {len(data["providers"])} 个提供商、{len(data["domains"])} 个域名、'
+          f'{len(data["records"])} 条记录到 {args.file}')
+    return 0
+
+
+def cmd_import(args) -> int:
+    """从JSON文件导入数据"""
+    data = load_document(args.file)
+    counts = db.import_data(data)
+    print(f'已导入 {counts["providers"]} 个提供商、{counts["domains"]} 个域名、'
+          f'{counts["records"]} 条记录')
+    return 0
+
+
+def resolve_record(records: List[DNSRecord], change: Dict[str, Any]) -> DNSRecord:
+    """按名称和类型（以及可选的值）定位要修改或删除的远程记录"""
+    name = change.get('name') or '@'
+    matches = [r for r in records
+               if (r.name or '@') == name and r.type == change.get('type')]
+    if len(matches) > 1 and change.get('match_value'):
+        matches = [r for r in matches if r.value == change['match_value']]
+    if not matches:
+        raise CLIError(f'未找到记录: {name} {change.get("type")}')
+    if len(matches) > 1:
+        raise CLIError(f'记录 {name} {change.get("type")} 存在多条，请指定 id 或 match_value')
+    return matches[0]
+
+
+def apply_change(provider, domain_data: Dict[str, Any], change: Dict[str, Any],
+                 remote_cache: Dict[Tuple, List[DNSRecord]]) -> Tuple[str, Optional[DNSRecord], Optional[DNSRecord]]:
+    """执行单条变更，返回 (操作描述, 变更前的记录, 变更后的记录)"""
+    action = change.get('action')
+    domain = domain_data['domain']
+    
+    # 修改和删除需要变更前的记录，用于定位记录ID和回滚；只按名称和类型查询，不读取整个域名
+    before = None
+    record_id = change.get('id')
+    key = None
+    if action in ('update', 'delete'):
+        if change.get('type'):
+            key = (domain, change.get('name') or '@', change['type'])
+        else:
+            key = (domain, None, None)
+        if key not in remote_cache:
+            remote_cache[key] = provider.query_records(domain, name=key[1], type=key[2])
+        if record_id:
+            before = next((r for r in remote_cache[key] if r.id == record_id), None)
+        else:
+            before = resolve_record(remote_cache[key], change)
+            record_id = before.id
+    
+    record = DNSRecord(
+        id=record_id,
+        name=change.get('name', ''),
+        type=change.get('type', 'A'),
+        value=change.get('value', ''),
+        ttl=int(change.get('ttl', 600)),
+        priority=int(change.get('priority', 0))
+    )
+    
+    if action == 'create':
+        record.id = provider.add_record(domain, record)
+    elif action == 'update':
+        provider.update_record(domain, record)
+    elif action == 'delete':
+        provider.delete_record(domain, record_id)
+        record = None
+    else:
+        raise CLIError(f'不支持的变更类型: {action}')
+    remote_cache.pop(key, None)
+    
+    target = record or before
+    name = (target.name if target and target.name else change.get('name')) or '@'
+    return f'{action} {name}.{domain} {change.get("type", "")}', before, record
+
+
+def cmd_apply(args) -> int:
+    """应用变更集文件（JSON或YAML）"""
+    document = load_document(args.file)
+    changes = document.get('changes', []) if isinstance(document, dict) else document
+    if not isinstance(changes, list):
+        raise CLIError('变更集格式错误：应为变更列表或包含 changes 的对象')
+    
+    providers = {}
+    remote_cache = {}
+    failed = 0
+    operation_names = {'create': '创建', 'update': '更新', 'delete': '删除'}
+    
+    for index, change in enumerate(changes, 1):
+        try:
+            domain_data = find_domain(change['domain'], change.get('provider'))
+            if args.dry_run:
+                print(f'[{index}] 预览: {change.get("action")} '
+                      f'{change.get("name") or "@"}.{domain_data["domain"]} {change.get("type", "")}')
+                continue
+            
+            provider_id = domain_data['provider_id']
+            if provider_id not in providers:
+                providers[provider_id] = create_provider(get_provider(provider_id))
+            
+            description, before, after = apply_change(providers[provider_id], domain_data, change, remote_cache)
+            log_record_change(change['action'], domain_data['domain'], provider_id, before, after,
+                              f'命令行{operation_names.get(change["action"], "")}DNS记录: {description}')
+            print(f'[{index}] 完成: {description}')
+        except Exception as e:
+            failed += 1
+            db.add_operation_log(change.get('action', 'unknown'), 'record', 0,
+                                 f'命令行变更: {change}', 'error', str(e))
+            print(f'[{index}] 失败: {e}', file=sys.stderr)
+    
+    print(f'共 {len(changes)} 条变更，失败 {failed} 条')
+    return 1 if failed else 0
+
+
+def cmd_zone(args) -> int:
+    """按域名导入或导出BIND区域文件"""
+    from .dns.zonefile import write_zone, plan_zone_import
+    from .dns.changeset import apply_changes
+    from .common.rollback import log_changes
+    
+    domain_data = find_domain(args.domain, args.provider)
+    domain = domain_data['domain']
+    provider = create_provider(get_provider(domain_data['provider_id']))
+    
+    if args.action == 'export':
+        with open(args.file, 'w', encoding='utf-8') as f:
+            count = write_zone(provider.export_records(domain), domain, f)
+        print(f'已导出 {count} 条记录到 {args.file}')
+        return 0
+    
+    with open(args.file, 'r', encoding='utf-8') as f:
+        changes = plan_zone_import(provider, domain, f, delete_missing=not args.keep_missing)
+    
+    for change in changes:
+        print(change.describe(domain))
+    if args.dry_run or not changes:
+        print(f'共 {len(changes)} 条变更' + ('（预览）' if args.dry_run else ''))
+        return 0
+    
+    applied, failed = apply_changes(provider, domain, changes)
+    log_changes(domain, domain_data['provider_id'], applied, failed, '区域文件导入')
+    for change, error in failed:
+        print(f'失败: {change.describe(domain)}: {error}', file=sys.stderr)
+    
+    print(f'共 {len(changes)} 条变更，成功 {len(applied)} 条，失败 {len(failed)} 条')
+    return 1 if failed else 0
+
+
+def cmd_snapshot(args) -> int:
+    """查看、保存和对比区域快照"""
+    from .common.snapshot import snapshots
+    
+    if args.action in ('list', 'take'):
+        if not args.target:
+            raise CLIError('需要指定域名')
+        domain_data = find_domain(args.target[0], args.provider)
+        if args.action == 'take':
+            provider = create_provider(get_provider(domain_data['provider_id']))
+            records = provider.export_records(domain_data['domain'])
+            snapshot = snapshots.take(domain_data['domain'], records, domain_data['provider_id'], args.label)
+            print(f'快照 {snapshot.id}: {snapshot.record_count} 条记录')
+            return 0
+        
+        rows = [
+            {'id': s.id, 'created_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(s.created_at)),
+             'records': s.record_count, 'label': s.label, 'full': int(s.is_full)}
+            for s in snapshots.history(domain_data['domain'], domain_data['provider_id'], args.limit)
+        ]
+        print_rows(rows, ['id', 'created_at', 'records', 'label', 'full'], args.json)
+        return 0
+    
+    try:
+        ids = [int(i) for i in args.target]
+    except ValueError:
+        raise CLIError('快照ID必须为整数')
+    
+    try:
+        if args.action == 'show':
+            if len(ids) != 1:
+                raise CLIError('需要指定一个快照ID')
+            records = [r.to_dict() for r in snapshots.records(ids[0])]
+            print_rows(records, ['name', 'type', 'value', 'ttl', 'priority'], args.json)
+            return 0
+        
+        if len(ids) != 2:
+            raise CLIError('需要指定两个快照ID')
+        diff = snapshots.diff(ids[0], ids[1])
+    except KeyError as e:
+        raise CLIError(e.args[0])
+    
+    for record in diff.removed:
+        print(f'- {record.name} {record.type} {record.value} {record.ttl} {record.priority}')
+    for record in diff.added:
+        print(f'+ {record.name} {record.type} {record.value} {record.ttl} {record.priority}')
+    print(f'新增 {len(diff.added)} 条，删除 {len(diff.removed)} 条')
+    return 0
+
+
+def cmd_rollback(args) -> int:
+    """把域名回滚到某个快照或某条操作日志之前的状态"""
+    from .common.rollback import plan_rollback_to_log, plan_rollback_to_snapshot, apply_rollback
+    
+    if (args.snapshot is None) == (args.log is None):
+        raise CLIError('需要指定 --snapshot 或 --log 其中之一')
+    
+    domain_data = find_domain(args.domain, args.provider)
+    domain = domain_data['domain']
+    provider_id = domain_data['provider_id']
+    provider = create_provider(get_provider(provider_id))
+    
+    try:
+        if args.snapshot is not None:
+            changes, _ = plan_rollback_to_snapshot(provider, domain, provider_id, args.snapshot)
+        else:
+            changes, _ = plan_rollback_to_log(provider, domain, provider_id, args.log)
+    except KeyError as e:
+        raise CLIError(e.args[0])
+    
+    for change in changes:
+        print(change.describe(domain))
+    if args.dry_run or not changes:
+        print(f'共 {len(changes)} 条变更' + ('（预览）' if args.dry_run else ''))
+        return 0
+    
+    applied, failed = apply_rollback(provider, domain, provider_id, changes, max_workers=args.workers)
+    for change, error in failed:
+        print(f'失败: {change.describe(domain)}: {error}', file=sys.stderr)
+    print(f'共 {len(changes)} 条变更，成功 {len(applied)} 条，失败 {len(failed)} 条')
+    return 1 if failed else 0
+
+
+def print_mirror_results(results, verbose: bool = True) -> Tuple[int, int]:
+    """输出镜像同步结果，返回 (变更数, 出错的域名数)"""
+    changes = errors = 0
+    for result in results:
+        if result.error:
+            errors += 1
+            print(f'[{result.domain}] 错误: {result.error}', file=sys.stderr)
+            continue
+        if result.unchanged:
+            continue
+        changes += len(result.changes)
+        if verbose or result.changes:
+            print(f'[{result.domain}] 源 {result.source_count} 条，{len(result.changes)} 条变更，'
+                  f'跳过 {len(result.skipped)} 条')
+        for change in result.changes:
+            print(f'  {change.describe(result.domain)}')
+        for record, reason in result.skipped:
+            print(f'  跳过 {record.name or "@"} {record.type} {record.value}: {reason}')
+        for change, error in result.failed:
+            errors += 1
+            print(f'  失败: {change.describe(result.domain)}: {error}', file=sys.stderr)
+    return changes, errors
+
+
+def cmd_mirror(args) -> int:
+    """把源提供商的域名记录迁移或持续镜像到目标提供商"""
+    from .common.mirror import ZoneMirror
+    
+    source = create_provider(get_provider(args.source))
+    target = create_provider(get_provider(args.target))
+    
+    type_map = {}
+    for item in args.type_map:
+        source_type, _, target_type = item.partition('=')
+        type_map[source_type] = target_type or None
+    
+    mirror = ZoneMirror(source, target, args.target, delete_missing=not args.keep_missing,
+                        type_map=type_map, include_apex_ns=args.include_apex_ns,
+                        max_workers=args.workers, zone_workers=args.zones)
+    domains = args.domains or source.get_domains()
+    
+    if not args.watch:
+        results = mirror.sync(domains, dry_run=args.dry_run)
+        changes, errors = print_mirror_results(results)
+        print(f'共 {len(domains)} 个域名，{changes} 条变更' + ('（预览）' if args.dry_run else ''))
+        return 1 if errors else 0
+    
+    def report(round_no, results):
+        changes, errors = print_mirror_results(results, verbose=False)
+        skipped = sum(1 for r in results if r.unchanged)
+        print(f'[{time.strftime("%H:%M:%S")}] 第 {round_no + 1} 轮：{changes} 条变更，'
+              f'{skipped} 个域名未变化，{errors} 个错误', flush=True)
+    
+    try:
+        mirror.run(domains, interval=args.watch, callback=report)
+    except KeyboardInterrupt:
+        print('已停止镜像')
+    return 0
+
+
+def print_drift_event(event):
+    """输出一次检测到的外部修改"""
+    print(f'[{time.strftime("%H:%M:%S")}] [{event.domain}] 检测到外部修改：{event.summary()}', flush=True)
+    for change in event.changes:
+        print(f'  {change.describe(event.domain)}', flush=True)
+
+
+def cmd_drift(args) -> int:
+    """检测域名记录是否在本程序之外被修改"""
+    from .common.drift import DriftScheduler
+    
+    errors = []
+    
+    def on_error(domain, error):
+        errors.append(domain)
+        print(f'[{domain}] 错误: {error}', file=sys.stderr, flush=True)
+    
+    scheduler = DriftScheduler(interval=args.interval, min_interval=args.min_interval,
+                               max_interval=args.max_interval, max_workers=args.workers,
+                               on_drift=print_drift_event, on_error=on_error)
+    if args.once:
+        events = scheduler.check_all()
+        print(f'共检查 {len(scheduler.schedules)} 个域名，{len(events)} 个域名有外部修改，{len(errors)} 个错误')
+        return 1 if errors else 0
+    
+    scheduler.start()
+    try:
+        while scheduler.running:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print('已停止漂移检测')
+    finally:
+        scheduler.stop()
+    return 0
+
+
+def print_plans(plans) -> int:
+    """输出对账计划，返回出错的域名数量"""
+    errors = 0
+    for plan in plans:
+        if plan.error:
+            errors += 1
+            print(f'[{plan.domain}] 错误: {plan.error}', file=sys.stderr)
+            continue
+        source = '本地快照' if plan.source == 'cache' else '实时获取'
+        print(f'[{plan.domain}] {len(plan.changes)} 条变更（{source}）')
+        for change in plan.changes:
+            print(f'  {change.describe(plan.domain)}')
+    return errors
+
+
+def load_states(file_path: str):
+    """读取期望状态文件"""
+    from .common.reconcile import load_desired_state
+    
+    try:
+        return load_desired_state(file_path)
+    except ValueError as e:
+        raise CLIError(str(e))
+
+
+def cmd_plan(args) -> int:
+    """根据期望状态生成变更计划"""
+    from .common.reconcile import Reconciler
+    
+    reconciler = Reconciler(max_workers=args.workers)
+    plans = reconciler.plan(load_states(args.file), refresh=args.refresh)
+    errors = print_plans(plans)
+    print(f'共 {sum(len(p.changes) for p in plans)} 条变更')
+    return 1 if errors else 0
+
+
+def cmd_reconcile(args) -> int:
+    """根据期望状态生成变更计划并提交"""
+    from .common.reconcile import Reconciler
+    
+    reconciler = Reconciler(max_workers=args.workers)
+    plans = reconciler.plan(load_states(args.file), refresh=args.refresh)
+    errors = print_plans(plans)
+    if args.dry_run:
+        return 1 if errors else 0
+    
+    results = reconciler.apply(plans)
+    applied = sum(len(r.applied) for r in results)
+    failed = 0
+    for result in results:
+        for change, error in result.failed:
+            failed += 1
+            print(f'失败: {change.describe(result.plan.domain)}: {error}', file=sys.stderr)
+    
+    print(f'成功 {applied} 条，失败 {failed} 条')
+    return 1 if errors or failed else 0
+
+
+def cmd_maintenance(args) -> int:
+    """清除过期的软删除数据并整理数据库"""
+    from dataclasses import asdict
+    from .common.config import cfg
+    from .common.maintenance import run_maintenance
+    
+    retention_days = args.retention_days
+    if retention_days is None:
+        retention_days = cfg.get('maintenance.retention_days', 30)
+    report = run_maintenance(retention_days, args.archive or cfg.get('maintenance.archive', False),
+                             metrics_retention_days=cfg.get('maintenance.metrics_retention_days', 7))
+    cfg.set('maintenance.last_run', report.finished_at)
+    if args.json:
+        data = asdict(report)
+        data.update(reclaimed_bytes=report.reclaimed_bytes, speedup=round(report.speedup, 2))
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+    else:
+        print(report.summary())
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(prog='python -m app.cli', description='DNS管理器命令行工具')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+    
+    list_parser = subparsers.add_parser('list', help='列出提供商、域名或记录')
+    list_parser.add_argument('target', choices=['providers', 'domains', 'records'])
+    list_parser.add_argument('domain', nargs='?', help='域名（列出记录时使用）')
+    list_parser.add_argument('--provider', type=int, help='提供商ID')
+    list_parser.add_argument('--remote', action='store_true', help='直接从DNS提供商获取记录')
+    list_parser.add_argument('--name', help='只列出该主机记录（@表示根域名）')
+    list_parser.add_argument('--type', help='只列出该类型的记录')
+    list_parser.add_argument('--value', help='只列出该记录值的记录')
+    list_parser.add_argument('--json', action='store_true', help='以JSON格式输出')
+    list_parser.set_defaults(func=cmd_list)
+    
+    sync_parser = subparsers.add_parser('sync', help='从DNS提供商同步域名和记录')
+    sync_parser.add_argument('--provider', type=int, help='仅同步指定提供商')
+    sync_parser.add_argument('--records', action='store_true', help='同时同步记录到本地缓存')
+    sync_parser.add_argument('--workers', type=int, default=8, help='并发请求数，默认8')
+    sync_parser.add_argument('--per-provider', type=int, default=4, help='每个提供商的并发上限，默认4')
+    sync_parser.set_defaults(func=cmd_sync)
+    
+    export_parser = subparsers.add_parser('export', help='导出数据为JSON文件')
+    export_parser.add_argument('file')
+    export_parser.set_defaults(func=cmd_export)
+    
+    import_parser = subparsers.add_parser('import', help='从JSON文件导入数据')
+    import_parser.add_argument('file')
+    import_parser.set_defaults(func=cmd_import)
+    
+    apply_parser = subparsers.add_parser('apply', help='应用变更集（JSON或YAML）')
+    apply_parser.add_argument('file')
+    apply_parser.add_argument('--dry-run', action='store_true', help='仅预览，不提交到DNS提供商')
+    apply_parser.set_defaults(func=cmd_apply)
+    
+    plan_parser = subparsers.add_parser('plan', help='根据期望状态（YAML）生成变更计划')
+    plan_parser.add_argument('file')
+    plan_parser.add_argument('--refresh', action='store_true', help='实时获取远程记录，而不是使用本地快照')
+    plan_parser.add_argument('--workers', type=int, default=4, help='并发请求数')
+    plan_parser.set_defaults(func=cmd_plan)
+    
+    reconcile_parser = subparsers.add_parser('reconcile', help='根据期望状态（YAML）同步远程记录')
+    reconcile_parser.add_argument('file')
+    reconcile_parser.add_argument('--refresh', action='store_true', help='实时获取远程记录，而不是使用本地快照')
+    reconcile_parser.add_argument('--workers', type=int, default=4, help='并发请求数')
+    reconcile_parser.add_argument('--dry-run', action='store_true', help='仅输出计划，不提交')
+    reconcile_parser.set_defaults(func=cmd_reconcile)
+    
+    zone_parser = subparsers.add_parser('zone', help='导入或导出BIND区域文件')
+    zone_parser.add_argument('action', choices=['export', 'import'])
+    zone_parser.add_argument('domain')
+    zone_parser.add_argument('file')
+    zone_parser.add_argument('--provider', type=int, help='提供商ID')
+    zone_parser.add_argument('--dry-run', action='store_true', help='仅预览变更，不提交到DNS提供商')
+    zone_parser.add_argument('--keep-missing', action='store_true', help='保留区域文件中不存在的远程记录')
+    zone_parser.set_defaults(func=cmd_zone)
+    
+    snapshot_parser = subparsers.add_parser('snapshot', help='查看、保存和对比区域快照')
+    snapshot_parser.add_argument('action', choices=['list', 'take', 'show', 'diff'])
+    snapshot_parser.add_argument('target', nargs='*', help='域名（list/take）或快照ID（show/diff）')
+    snapshot_parser.add_argument('--provider', type=int, help='提供商ID')
+    snapshot_parser.add_argument('--limit', type=int, help='最多列出的快照数')
+    snapshot_parser.add_argument('--label', default='manual', help='快照备注')
+    snapshot_parser.add_argument('--json', action='store_true', help='以JSON格式输出')
+    snapshot_parser.set_defaults(func=cmd_snapshot)
+    
+    rollback_parser = subparsers.add_parser('rollback', help='把域名回滚到某个快照或某条操作日志之前的状态')
+    rollback_parser.add_argument('domain')
+    rollback_parser.add_argument('--snapshot', type=int, help='目标快照ID')
+    rollback_parser.add_argument('--log', type=int, help='撤销该操作日志及之后的所有记录变更')
+    rollback_parser.add_argument('--provider', type=int, help='提供商ID')
+    rollback_parser.add_argument('--workers', type=int, default=4, help='并发请求数')
+    rollback_parser.add_argument('--dry-run', action='store_true', help='仅预览变更，不提交到DNS提供商')
+    rollback_parser.set_defaults(func=cmd_rollback)
+    
+    mirror_parser = subparsers.add_parser('mirror', help='把域名记录迁移或持续镜像到另一个提供商')
+    mirror_parser.add_argument('source', type=int, help='源提供商ID')
+    mirror_parser.add_argument('target', type=int, help='目标提供商ID')
+    mirror_parser.add_argument('domains', nargs='*', help='域名，默认为源提供商的所有域名')
+    mirror_parser.add_argument('--workers', type=int, default=4, help='每个域名的并发请求数')
+    mirror_parser.add_argument('--zones', type=int, default=4, help='同时处理的域名数')
+    mirror_parser.add_argument('--keep-missing', action='store_true', help='保留目标中源不存在的记录')
+    mirror_parser.add_argument('--type-map', action='append', default=[], metavar='FROM=TO',
+                               help='记录类型映射，TO为空表示跳过，可重复指定')
+    mirror_parser.add_argument('--include-apex-ns', action='store_true', help='同时迁移根域名NS记录')
+    mirror_parser.add_argument('--dry-run', action='store_true', help='仅预览变更，不提交到目标提供商')
+    mirror_parser.add_argument('--watch', type=float, metavar='SECONDS',
+                               help='持续镜像，每隔指定秒数增量同步一次')
+    mirror_parser.set_defaults(func=cmd_mirror)
+    
+    drift_parser = subparsers.add_parser('drift', help='后台检测域名记录是否在其他地方被修改')
+    drift_parser.add_argument('--once', action='store_true', help='立即检查所有域名一次后退出')
+    drift_parser.add_argument('--interval', type=float, default=600, help='初始检查间隔（秒）')
+    drift_parser.add_argument('--min-interval', type=float, default=60, help='最短检查间隔（秒）')
+    drift_parser.add_argument('--max-interval', type=float, default=3600, help='最长检查间隔（秒）')
+    drift_parser.add_argument('--workers', type=int, default=4, help='同时检查的域名数')
+    drift_parser.set_defaults(func=cmd_drift)
+    
+    maintenance_parser = subparsers.add_parser('maintenance', help='清除过期的软删除数据并整理数据库')
+    maintenance_parser.add_argument('--retention-days', type=float, help='软删除数据的保留天数，默认使用配置')
+    maintenance_parser.add_argument('--archive', action='store_true', help='清除前把将被删除的记录（含随域名、提供商级联删除的记录）归档')
+    maintenance_parser.add_argument('--json', action='store_true', help='以JSON格式输出结果')
+    maintenance_parser.set_defaults(func=cmd_maintenance)
+    
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    
+    try:
+        return args.func(args)
+    except (CLIError, ZoneFileError) as e:
+        print(f'错误: {e}', file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,20 +5,56 @@
 
 import os
 import json
-from typing import Dict, Any
-from PyQt5.QtCore import QObject, pyqtSignal
-from qfluentwidgets import qconfig, ConfigItem, Theme, BoolValidator
+import atexit
+import tempfile
+import threading
+from typing import Dict, Any, Callable, List
 
 
-class Config(QObject):
-    """应用配置类"""
+# 自动保存的防抖延迟（秒），期间的多次修改合并为一次写入
+SAVE_DELAY = 0.5
+
+_MISSING = object()
+
+
+class Signal:
+    """
+    轻量信号类，不依赖Qt，便于命令行等无界面场景复用配置模块；
+    槽函数在调用 emit 的线程中同步执行，界面中需转发到Qt信号（见 MainWindow.configChanged）
+    """
+    
+    def __init__(self):
+        self._slots: List[Callable] = []
     
-    configChanged = pyqtSignal(str, object)
+    def connect(self, slot: Callable):
+        """连接槽函数"""
+        if slot not in self._slots:
+            self._slots.append(slot)
+    
+    def disconnect(self, slot: Callable):
+        """断开槽函数"""
+        if slot in self._slots:
+            self._slots.remove(slot)
+    
+    def emit(self, *args):
+        """触发信号"""
+        for slot in list(self._slots):
+            slot(*args)
+
+
+class Config:
+    """应用配置类"""
     
     def __init__(self):
-        super().__init__()
+        self.configChanged = Signal()
         self.config_file = "config.json"
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._cache: Dict[str, Any] = {}
+        self._save_timer = None
+        self._last_saved = None
         self.data = self.load_config()
+        atexit.register(self.flush)
         
     def load_config(self) -> Dict[str, Any]:
         """加载配置文件"""
@@ -27,6 +63,24 @@ class Config(QObject):
             "language": "zh_CN",
             "auto_save": True,
             "dns_providers": {},
+            "profiling": {
+                "enabled": False,
+                "block_threshold_ms": 200
+            },
+            "drift": {
+                "enabled": False,
+                "interval": 600,
+                "min_interval": 60,
+                "max_interval": 3600
+            },
+            "maintenance": {
+                "enabled": True,
+                "interval_hours": 24,
+                "retention_days": 30,
+                "archive": False,
+                "metrics_retention_days": 7,
+                "last_run": 0
+            },
             "window": {
                 "width": 1200,
                 "height": 800,
@@ -49,41 +103,95 @@ class Config(QObject):
         return default_config
     
     def save_config(self):
-        """保存配置文件"""
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"保存配置文件失败: {e}")
+        """立即保存配置文件（取消尚未执行的延迟保存）"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+        self._write()
+    
+    def schedule_save(self, delay: float = SAVE_DELAY):
+        """延迟保存，delay 内的多次调用只写入一次，写入在后台线程进行"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(delay, self._timer_save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def flush(self):
+        """如有尚未执行的延迟保存，立即写入"""
+        with self._lock:
+            pending = self._save_timer is not None
+        if pending:
+            self.save_config()
+    
+    def _timer_save(self):
+        with self._lock:
+            self._save_timer = None
+        self._write()
+    
+    def _write(self):
+        """原子写入：先写临时文件再重命名，内容未变化时跳过"""
+        with self._lock:
+            text = json.dumps(self.data, ensure_ascii=False, indent=2)
+        
+        with self._write_lock:
+            if text == self._last_saved:
+                return
+            directory = os.path.dirname(os.path.abspath(self.config_file))
+            try:
+                fd, temp_path = tempfile.mkstemp(prefix='.config-', suffix='.tmp', dir=directory)
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        f.write(text)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(temp_path, self.config_file)
+                except BaseException:
+                    os.unlink(temp_path)
+                    raise
+                self._last_saved = text
+            except Exception as e:
+                print(f"保存配置文件失败: {e}")
     
     def get(self, key: str, default=None):
-        """获取配置值"""
+        """获取配置值，点分键的查找结果会被缓存，set 时失效；查找和写入缓存都在锁内，不会与 set 交错"""
+        with self._lock:
+            value = self._cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = self._lookup(key)
+                self._cache[key] = value
+        return default if value is _MISSING else value
+    
+    def _lookup(self, key: str):
         keys = key.split('.')
         value = self.data
         for k in keys:
             if isinstance(value, dict) and k in value:
                 value = value[k]
             else:
-                return default
+                return _MISSING
         return value
     
     def set(self, key: str, value: Any):
-        """设置配置值"""
+        """设置配置值，开启自动保存时延迟合并写入"""
         keys = key.split('.')
-        data = self.data
-        for k in keys[:-1]:
-            if k not in data:
-                data[k] = {}
-            data = data[k]
-        
-        old_value = data.get(keys[-1])
-        data[keys[-1]] = value
+        with self._lock:
+            data = self.data
+            for k in keys[:-1]:
+                if k not in data:
+                    data[k] = {}
+                data = data[k]
+            
+            old_value = data.get(keys[-1])
+            data[keys[-1]] = value
+            self._cache.clear()
         
         if old_value != value:
             self.configChanged.emit(key, value)
             if self.get('auto_save', True):
-                self.save_config()
-
+                self.schedule_save()
 
 # 全局配置实例
 cfg = Config()
\ No newline at end of file
@@ -6,21 +6,69 @@
 
 import sqlite3
 import os
-from typing import List, Dict, Any, Optional
+import json
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
 
 class DatabaseManager:
     """数据库管理器"""
     
+    # 批量删除时每条语句绑定的ID数上限（旧版本SQLite限制为999个参数）
+    MAX_VARIABLES = 500
+    
+    # 只包含启用行的部分索引，与查询中的 enabled = 1 条件对应，软删除的行不占用索引
+    PARTIAL_INDEXES = {
+        'idx_dns_records_enabled': "dns_records (domain_id, name, type) WHERE enabled = 1",
+        'idx_domains_enabled': "domains (provider_id, domain) WHERE enabled = 1",
+    }
+    
+    # 外键带 ON DELETE CASCADE 的表（按依赖顺序），{name} 为表名
+    CASCADE_TABLES = {
+        # 域名表
+        'domains': """
+            CREATE TABLE IF NOT EXISTS {name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                domain TEXT NOT NULL,
+                provider_id INTEGER NOT NULL,
+                enabled INTEGER DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (provider_id) REFERENCES dns_providers (id) ON DELETE CASCADE,
+                UNIQUE(domain, provider_id)
+            )
+        """,
+        # DNS记录表
+        'dns_records': """
+            CREATE TABLE IF NOT EXISTS {name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                domain_id INTEGER NOT NULL,
+                record_id TEXT,
+                name TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value TEXT NOT NULL,
+                ttl INTEGER DEFAULT 600,
+                priority INTEGER DEFAULT 0,
+                enabled INTEGER DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (domain_id) REFERENCES domains (id) ON DELETE CASCADE
+            )
+        """,
+    }
+    
     def __init__(self, db_path: str = "dnsmgr.db"):
         self.db_path = db_path
+        # 提供商增删改后的回调，参数为提供商ID（见 ProviderRegistry）
+        self._provider_listeners: List[Callable[[int], None]] = []
         self.init_database()
     
     def init_database(self):
         """初始化数据库表结构"""
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
+            # 新数据库使用增量清理，已有数据库在首次维护时转换（见 compact）
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
             
             # DNS提供商配置表
             cursor.execute("""
@@ -35,35 +83,26 @@ class DatabaseManager:
                 )
             """)
             
-            # 域名表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS domains (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    domain TEXT NOT NULL,
-                    provider_id INTEGER NOT NULL,
-                    enabled INTEGER DEFAULT 1,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (provider_id) REFERENCES dns_providers (id),
-                    UNIQUE(domain, provider_id)
-                )
-            """)
+            # 域名表与DNS记录表，删除提供商或域名时级联删除（旧版本数据库先迁移）
+            self.migrate_foreign_keys(conn)
+            for table in self.CASCADE_TABLES:
+                cursor.execute(self.CASCADE_TABLES[table].format(name=table))
+            self.ensure_indexes(cursor)
             
-            # DNS记录表
+            # 清理时归档的软删除记录（不设外键，域名删除后仍保留）
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS dns_records (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                CREATE TABLE IF NOT EXISTS dns_records_archive (
+                    id INTEGER PRIMARY KEY,
                     domain_id INTEGER NOT NULL,
                     record_id TEXT,
                     name TEXT NOT NULL,
                     type TEXT NOT NULL,
                     value TEXT NOT NULL,
-                    ttl INTEGER DEFAULT 600,
-                    priority INTEGER DEFAULT 0,
-                    enabled INTEGER DEFAULT 1,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (domain_id) REFERENCES domains (id)
+                    ttl INTEGER,
+                    priority INTEGER,
+                    created_at TIMESTAMP,
+                    updated_at TIMESTAMP,
+                    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
             
@@ -80,28 +119,180 @@ class DatabaseManager:
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+            # 记录变更的结构化内容（变更前后的记录），用于回滚
+            self.ensure_columns(cursor, 'operation_logs', {
+                'domain': 'TEXT',
+                'provider_id': 'INTEGER',
+                'payload': 'TEXT'
+            })
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_operation_logs_domain
+                ON operation_logs (domain, id)
+            """)
+            
+            # 提供商API调用统计表
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS provider_metrics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    provider TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    latency_ms REAL NOT NULL,
+                    bytes INTEGER DEFAULT 0,
+                    status INTEGER DEFAULT 0,
+                    retries INTEGER DEFAULT 0,
+                    throttle_ms REAL DEFAULT 0,
+                    error TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_provider_metrics_created_at
+                ON provider_metrics (created_at)
+            """)
+            
+            # 区域快照：记录内容按哈希去重存储，快照只保存相对上一快照的增减
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS record_blobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    hash TEXT NOT NULL UNIQUE,
+                    name TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    ttl INTEGER DEFAULT 600,
+                    priority INTEGER DEFAULT 0
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS zone_snapshots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    domain TEXT NOT NULL,
+                    provider_id INTEGER,
+                    parent_id INTEGER,
+                    is_full INTEGER NOT NULL,
+                    digest TEXT NOT NULL,
+                    record_count INTEGER NOT NULL,
+                    label TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_zone_snapshots_domain
+                ON zone_snapshots (domain, provider_id, id)
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS snapshot_entries (
+                    snapshot_id INTEGER NOT NULL,
+                    blob_id INTEGER NOT NULL,
+                    delta INTEGER NOT NULL,
+                    PRIMARY KEY (snapshot_id, blob_id)
+                ) WITHOUT ROWID
+            """)
             
             conn.commit()
     
+    def connect(self) -> sqlite3.Connection:
+        """打开数据库连接并启用外键约束（SQLite 按连接设置，默认不检查外键）"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+    
+    def migrate_foreign_keys(self, conn: sqlite3.Connection):
+        """
+        旧版本数据库的外键没有 ON DELETE CASCADE，SQLite 不能修改约束，
+        在同一事务中清理孤立行后按 CASCADE_TABLES 重建表并复制数据（保留ID与自增序号）
+        """
+        cursor = conn.cursor()
+        stale = []
+        for table in self.CASCADE_TABLES:
+            foreign_keys = cursor.execute(f"PRAGMA foreign_key_list({table})").fetchall()
+            if any(row[6].upper() != 'CASCADE' for row in foreign_keys):
+                stale.append(table)
+        if not stale:
+            return
+        
+        conn.commit()
+        # 重建期间关闭外键检查，否则删除旧表会级联删除其他表的数据
+        cursor.execute("PRAGMA foreign_keys = OFF")
+        try:
+            cursor.execute("BEGIN")
+            cursor.execute("DELETE FROM domains WHERE provider_id NOT IN (SELECT id FROM dns_providers)")
+            cursor.execute("DELETE FROM dns_records WHERE domain_id NOT IN (SELECT id FROM domains)")
+            for table in stale:
+                columns = ', '.join(row[1] for row in cursor.execute(f"PRAGMA table_info({table})").fetchall())
+                row = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+                cursor.execute(self.CASCADE_TABLES[table].format(name=f'{table}_new'))
+                cursor.execute(f"INSERT INTO {table}_new ({columns}) SELECT {columns} FROM {table}")
+                cursor.execute(f"DROP TABLE {table}")
+                cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+                if row is not None:
+                    cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (row[0], table))
+            if cursor.execute("PRAGMA foreign_key_check").fetchone() is not None:
+                raise sqlite3.IntegrityError('迁移后外键检查失败')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.execute("PRAGMA foreign_keys = ON")
+    
+    def ensure_indexes(self, cursor: sqlite3.Cursor) -> int:
+        """创建缺少的部分索引，返回新建的索引数"""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        existing = {row[0] for row in cursor.fetchall()}
+        created = 0
+        for name, definition in self.PARTIAL_INDEXES.items():
+            if name not in existing:
+                cursor.execute(f"CREATE INDEX {name} ON {definition}")
+                created += 1
+        return created
+    
+    def ensure_columns(self, cursor: sqlite3.Cursor, table: str, columns: Dict[str, str]):
+        """为旧版本数据库补充新增的列"""
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+        for column, column_type in columns.items():
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+    
     def add_dns_provider(self, name: str, provider_type: str, config: str) -> int:
         """添加DNS提供商"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO dns_providers (name, type, config)
                 VALUES (?, ?, ?)
             """, (name, provider_type, config))
             conn.commit()
-            return cursor.lastrowid
+            provider_id = cursor.lastrowid
+        self.notify_provider_changed(provider_id)
+        return provider_id
     
     def get_dns_providers(self) -> List[Dict[str, Any]]:
         """获取所有DNS提供商"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM dns_providers WHERE enabled = 1")
             return [dict(row) for row in cursor.fetchall()]
     
+    def get_dns_provider(self, provider_id: int) -> Optional[Dict[str, Any]]:
+        """按ID获取启用的DNS提供商，不存在或已删除时返回None"""
+        with self.connect() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM dns_providers WHERE id = ? AND enabled = 1", (provider_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+    
+    def add_provider_listener(self, callback: Callable[[int], None]):
+        """注册提供商变更回调，在写入提交后于调用线程中执行"""
+        self._provider_listeners.append(callback)
+    
+    def notify_provider_changed(self, provider_id: int):
+        """通知提供商已添加、修改或删除"""
+        for callback in list(self._provider_listeners):
+            callback(provider_id)
+    
     def update_dns_provider(self, provider_id: int, **kwargs):
         """更新DNS提供商"""
         if not kwargs:
@@ -111,7 +302,7 @@ class DatabaseManager:
         values = list(kwargs.values())
         values.append(provider_id)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(f"""
                 UPDATE dns_providers 
@@ -119,10 +310,11 @@ class DatabaseManager:
                 WHERE id = ?
             """, values)
             conn.commit()
+        self.notify_provider_changed(provider_id)
     
     def delete_dns_provider(self, provider_id: int):
         """删除DNS提供商（软删除）"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 UPDATE dns_providers 
@@ -130,10 +322,11 @@ class DatabaseManager:
                 WHERE id = ?
             """, (provider_id,))
             conn.commit()
+        self.notify_provider_changed(provider_id)
     
     def add_domain(self, domain: str, provider_id: int) -> int:
         """添加域名"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO domains (domain, provider_id)
@@ -144,7 +337,7 @@ class DatabaseManager:
     
     def get_domains(self, provider_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """获取域名列表"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -170,8 +363,8 @@ class DatabaseManager:
 
     
     def delete_domain(self, domain_id: int):
-        """删除域名（物理删除）"""
-        with sqlite3.connect(self.db_path) as conn:
+        """删除域名（物理删除，域名下的记录由外键级联删除）"""
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 DELETE FROM domains 
@@ -179,11 +372,37 @@ class DatabaseManager:
             """, (domain_id,))
             conn.commit()
     
+    def delete_domains(self, domain_ids: List[int]) -> int:
+        """按ID列表批量删除域名（物理删除，记录级联删除），返回删除的域名数"""
+        return self.delete_by_ids('domains', domain_ids)
+    
+    def delete_provider_domains(self, provider_id: int) -> int:
+        """删除提供商下的所有域名（物理删除，记录级联删除），返回删除的域名数"""
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM domains WHERE provider_id = ?", (provider_id,))
+            conn.commit()
+            return cursor.rowcount
+    
+    def delete_by_ids(self, table: str, ids: List[int]) -> int:
+        """按主键列表删除，ID较多时分批绑定参数，所有批次在同一个事务中执行"""
+        ids = list(ids)
+        deleted = 0
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(ids), self.MAX_VARIABLES):
+                batch = ids[start:start + self.MAX_VARIABLES]
+                placeholders = ', '.join('?' * len(batch))
+                cursor.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", batch)
+                deleted += cursor.rowcount
+            conn.commit()
+        return deleted
+    
     def add_dns_record(self, domain_id: int, record_id: str, name: str, 
                       record_type: str, value: str, ttl: int = 600, 
                       priority: int = 0) -> int:
         """添加DNS记录"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO dns_records (domain_id, record_id, name, type, value, ttl, priority)
@@ -194,7 +413,7 @@ class DatabaseManager:
     
     def get_dns_records(self, domain_id: int) -> List[Dict[str, Any]]:
         """获取DNS记录"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("""
@@ -213,7 +432,7 @@ class DatabaseManager:
         values = list(kwargs.values())
         values.append(record_id)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(f"""
                 UPDATE dns_records 
@@ -224,7 +443,7 @@ class DatabaseManager:
     
     def delete_dns_record(self, record_id: int):
         """删除DNS记录（软删除）"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 UPDATE dns_records 
@@ -233,21 +452,328 @@ class DatabaseManager:
             """, (record_id,))
             conn.commit()
     
+    def upsert_cached_dns_record(self, domain_id: int, record: Dict[str, Any],
+                                 old_record_id: Optional[str] = None) -> bool:
+        """
+        按远程记录ID（修改后ID会变化的提供商传入 old_record_id）更新本地记录缓存中的单条记录，不存在时新增；
+        域名尚无缓存（从未同步）时不写入，避免形成不完整的缓存。返回是否写入
+        """
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM dns_records WHERE domain_id = ? LIMIT 1", (domain_id,))
+            if cursor.fetchone() is None:
+                return False
+            values = (record.get('id'), record['name'], record['type'], record['value'],
+                      record.get('ttl', 600), record.get('priority', 0))
+            cursor.execute("""
+                UPDATE dns_records
+                SET record_id = ?, name = ?, type = ?, value = ?, ttl = ?, priority = ?,
+                    enabled = 1, updated_at = CURRENT_TIMESTAMP
+                WHERE domain_id = ? AND record_id = ?
+            """, values + (domain_id, old_record_id or record.get('id')))
+            if cursor.rowcount == 0:
+                cursor.execute("""
+                    INSERT INTO dns_records (domain_id, record_id, name, type, value, ttl, priority)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (domain_id,) + values)
+            conn.commit()
+            return True
+    
+    def delete_cached_dns_record(self, domain_id: int, record_id: str):
+        """从本地记录缓存中移除远程记录ID对应的记录"""
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM dns_records WHERE domain_id = ? AND record_id = ?",
+                           (domain_id, record_id))
+            conn.commit()
+    
+    def delete_dns_records(self, record_ids: List[int]) -> int:
+        """按本地ID列表批量删除记录（物理删除），返回删除的记录数"""
+        return self.delete_by_ids('dns_records', record_ids)
+    
+    def delete_domain_records(self, domain_id: int) -> int:
+        """删除域名下的所有本地记录（物理删除），返回删除的记录数"""
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM dns_records WHERE domain_id = ?", (domain_id,))
+            conn.commit()
+            return cursor.rowcount
+    
+    def replace_dns_records(self, domain_id: int, records: List[Dict[str, Any]]) -> int:
+        """用远程记录整体替换域名的本地记录缓存（单个事务）"""
+        return self.replace_dns_records_batch({domain_id: records})
+    
+    def replace_dns_records_batch(self, batch: Dict[int, List[Dict[str, Any]]]) -> int:
+        """批量替换多个域名的本地记录缓存，所有域名在同一个事务中写入，返回写入的记录数"""
+        if not batch:
+            return 0
+        
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("DELETE FROM dns_records WHERE domain_id = ?",
+                               [(domain_id,) for domain_id in batch])
+            cursor.executemany("""
+                INSERT INTO dns_records (domain_id, record_id, name, type, value, ttl, priority)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (domain_id, record.get('id'), record['name'], record['type'],
+                 record['value'], record.get('ttl', 600), record.get('priority', 0))
+                for domain_id, records in batch.items()
+                for record in records
+            ])
+            conn.commit()
+            return sum(len(records) for records in batch.values())
+    
+    def export_data(self) -> Dict[str, Any]:
+        """导出提供商、域名和记录数据"""
+        data = {
+            'providers': self.get_dns_providers(),
+            'domains': self.get_domains(),
+            'records': []
+        }
+        
+        for domain in data['domains']:
+            records = self.get_dns_records(domain['id'])
+            for record in records:
+                record['domain_name'] = domain['domain']
+                data['records'].append(record)
+        
+        return data
+    
+    def import_data(self, data: Dict[str, Any]) -> Dict[str, int]:
+        """导入由 export_data 导出的数据，返回各类数据的导入数量"""
+        # 导入提供商
+        provider_map = {}
+        for provider in data.get('providers', []):
+            new_id = self.add_dns_provider(
+                provider['name'] + '_imported',
+                provider['type'],
+                provider['config']
+            )
+            provider_map[provider['id']] = new_id
+        
+        # 导入域名
+        domain_map = {}
+        for domain in data.get('domains', []):
+            if domain['provider_id'] in provider_map:
+                new_id = self.add_domain(
+                    domain['domain'],
+                    provider_map[domain['provider_id']]
+                )
+                domain_map[domain['id']] = new_id
+        
+        # 导入记录
+        record_count = 0
+        for record in data.get('records', []):
+            if record['domain_id'] in domain_map:
+                self.add_dns_record(
+                    domain_map[record['domain_id']],
+                    record.get('record_id', ''),
+                    record['name'],
+                    record['type'],
+                    record['value'],
+                    record['ttl'],
+                    record['priority']
+                )
+                record_count += 1
+        
+        return {
+            'providers': len(provider_map),
+            'domains': len(domain_map),
+            'records': record_count
+        }
+    
     def add_operation_log(self, operation: str, target_type: str, 
                          target_id: Optional[int] = None, details: Optional[str] = None,
-                         status: str = "success", error_message: Optional[str] = None):
-        """添加操作日志"""
-        with sqlite3.connect(self.db_path) as conn:
+                         status: str = "success", error_message: Optional[str] = None,
+                         domain: Optional[str] = None, provider_id: Optional[int] = None,
+                         payload: Optional[Dict[str, Any]] = None) -> int:
+        """添加操作日志，payload 为记录变更前后的内容（before/after）"""
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                INSERT INTO operation_logs (operation, target_type, target_id, details, status, error_message)
+                INSERT INTO operation_logs
+                    (operation, target_type, target_id, details, status, error_message, domain, provider_id, payload)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (operation, target_type, target_id, details, status, error_message, domain, provider_id,
+                  json.dumps(payload, ensure_ascii=False) if payload is not None else None))
+            conn.commit()
+            return cursor.lastrowid
+    
+    def get_record_change_logs(self, domain: str, provider_id: Optional[int] = None,
+                               since_id: int = 0) -> List[Dict[str, Any]]:
+        """获取域名中ID不小于 since_id 的成功记录变更日志（新的在前），payload 已解析"""
+        with self.connect() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM operation_logs
+                WHERE domain = ? AND (? IS NULL OR provider_id = ?) AND id >= ?
+                    AND payload IS NOT NULL AND status = 'success'
+                ORDER BY id DESC
+            """, (domain, provider_id, provider_id, since_id))
+            logs = [dict(row) for row in cursor.fetchall()]
+        for log in logs:
+            log['payload'] = json.loads(log['payload'])
+        return logs
+    
+    def add_provider_metrics(self, samples: List[Any]):
+        """批量写入API调用统计（samples为 metrics.RequestSample）"""
+        with self.connect() as conn:
+            conn.executemany("""
+                INSERT INTO provider_metrics
+                    (provider, action, latency_ms, bytes, status, retries, throttle_ms, error, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(s.provider, s.action, s.latency_ms, s.bytes, s.status, s.retries,
+                   s.throttle_ms, s.error or None, s.timestamp) for s in samples])
+            conn.commit()
+    
+    def get_provider_metrics(self, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """获取API调用统计，since为Unix时间戳"""
+        with self.connect() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM provider_metrics WHERE created_at >= ? ORDER BY created_at
+            """, (since or 0,))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_provider_metric_buckets(self, since: float, bounds: List[float]) -> List[Dict[str, Any]]:
+        """
+        在SQL中按 (提供商, 接口, 延迟桶) 聚合 since 之后的API调用统计，只返回聚合后的行；
+        bounds 为递增的桶上界（毫秒），延迟不超过 bounds[i] 的最小i即桶号，超过所有上界时为 len(bounds)
+        """
+        cases = ' '.join(f'WHEN latency_ms <= {float(bound)!r} THEN {index}' for index, bound in enumerate(bounds))
+        bucket = f'CASE {cases} ELSE {len(bounds)} END' if bounds else '0'
+        with self.connect() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT provider, action, {bucket} AS bucket,
+                    COUNT(*) AS count, COUNT(error) AS errors,
+                    SUM(latency_ms) AS total_ms, MAX(latency_ms) AS max_ms,
+                    SUM(bytes) AS bytes, SUM(retries) AS retries, SUM(throttle_ms) AS throttle_ms
+                FROM provider_metrics
+                WHERE created_at >= ?
+                GROUP BY provider, action, bucket
+            """, (since,))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def clear_provider_metrics(self, before: Optional[float] = None) -> int:
+        """清除API调用统计，before为空时全部清除，返回清除的行数"""
+        with self.connect() as conn:
+            if before is None:
+                cursor = conn.execute("DELETE FROM provider_metrics")
+            else:
+                cursor = conn.execute("DELETE FROM provider_metrics WHERE created_at < ?", (before,))
+            conn.commit()
+            return cursor.rowcount
+    
+    def add_zone_snapshot(self, domain: str, provider_id: Optional[int], parent_id: Optional[int],
+                          is_full: bool, digest: str, record_count: int, label: str,
+                          blobs: Dict[str, Tuple], entries: Dict[str, int], created_at: float) -> int:
+        """
+        写入一个区域快照（单个事务）
+        blobs 为 哈希 -> (name, type, value, ttl, priority)，已存在的内容不会重复写入；
+        entries 为 哈希 -> 数量变化（完整快照时为数量）
+        """
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT OR IGNORE INTO record_blobs (hash, name, type, value, ttl, priority)
                 VALUES (?, ?, ?, ?, ?, ?)
-            """, (operation, target_type, target_id, details, status, error_message))
+            """, [(h,) + tuple(content) for h, content in blobs.items()])
+            
+            blob_ids = {}
+            hashes = list(entries)
+            for i in range(0, len(hashes), self.MAX_VARIABLES):
+                chunk = hashes[i:i + self.MAX_VARIABLES]
+                cursor.execute(f"""
+                    SELECT hash, id FROM record_blobs WHERE hash IN ({', '.join('?' * len(chunk))})
+                """, chunk)
+                blob_ids.update(cursor.fetchall())
+            
+            cursor.execute("""
+                INSERT INTO zone_snapshots
+                    (domain, provider_id, parent_id, is_full, digest, record_count, label, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (domain, provider_id, parent_id, int(is_full), digest, record_count, label, created_at))
+            snapshot_id = cursor.lastrowid
+            cursor.executemany("""
+                INSERT INTO snapshot_entries (snapshot_id, blob_id, delta) VALUES (?, ?, ?)
+            """, [(snapshot_id, blob_ids[h], delta) for h, delta in entries.items()])
             conn.commit()
+            return snapshot_id
+    
+    def get_zone_snapshots(self, domain: str, provider_id: Optional[int] = None,
+                           limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """获取域名的快照列表（新的在前）"""
+        with self.connect() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM zone_snapshots
+                WHERE domain = ? AND (? IS NULL OR provider_id = ?)
+                ORDER BY id DESC
+                LIMIT ?
+            """, (domain, provider_id, provider_id, limit if limit else -1))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_zone_snapshot(self, snapshot_id: int) -> Optional[Dict[str, Any]]:
+        """按ID获取快照"""
+        with self.connect() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM zone_snapshots WHERE id = ?", (snapshot_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+    
+    def get_snapshot_entries(self, snapshot_ids: List[int]) -> List[Tuple[int, str, int]]:
+        """获取快照的内容增减，返回 (snapshot_id, hash, delta)，快照较多时分批绑定参数"""
+        result = []
+        snapshot_ids = list(snapshot_ids)
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(snapshot_ids), self.MAX_VARIABLES):
+                chunk = snapshot_ids[i:i + self.MAX_VARIABLES]
+                cursor.execute(f"""
+                    SELECT e.snapshot_id, b.hash, e.delta
+                    FROM snapshot_entries e
+                    JOIN record_blobs b ON e.blob_id = b.id
+                    WHERE e.snapshot_id IN ({', '.join('?' * len(chunk))})
+                """, chunk)
+                result.extend(cursor.fetchall())
+        return result
+    
+    def get_record_blobs(self, hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """按哈希获取记录内容，哈希较多时分批绑定参数"""
+        result = {}
+        hashes = list(hashes)
+        with self.connect() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            for i in range(0, len(hashes), self.MAX_VARIABLES):
+                chunk = hashes[i:i + self.MAX_VARIABLES]
+                cursor.execute(f"""
+                    SELECT hash, name, type, value, ttl, priority FROM record_blobs
+                    WHERE hash IN ({', '.join('?' * len(chunk))})
+                """, chunk)
+                for row in cursor.fetchall():
+                    result[row['hash']] = dict(row)
+        return result
+    
+    def get_operation_log(self, log_id: int) -> Optional[Dict[str, Any]]:
+        """按ID获取操作日志（payload 为原始JSON字符串）"""
+        with self.connect() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM operation_logs WHERE id = ?", (log_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
     
     def get_operation_logs(self, limit: int = 100) -> List[Dict[str, Any]]:
         """获取操作日志"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("""
@@ -259,11 +785,78 @@ class DatabaseManager:
     
     def clear_operation_logs(self):
         """清空所有操作日志"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM operation_logs")
             conn.commit()
             return cursor.rowcount
+    
+    def purge_soft_deleted(self, retention_days: float, archive: bool = False) -> Dict[str, int]:
+        """
+        物理删除软删除超过 retention_days 天的记录、域名和提供商（域名与记录随之级联删除），
+        archive 为True时先把将被清除的记录复制到 dns_records_archive，包括随域名、提供商级联删除的记录
+        （提供商配置含密钥，不归档）；返回各表直接清除的行数及归档的记录数
+        """
+        cutoff = f'-{retention_days} days'
+        counts = {}
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            if archive:
+                cursor.execute("""
+                    INSERT OR REPLACE INTO dns_records_archive
+                        (id, domain_id, record_id, name, type, value, ttl, priority, created_at, updated_at)
+                    SELECT id, domain_id, record_id, name, type, value, ttl, priority, created_at, updated_at
+                    FROM dns_records
+                    WHERE (enabled = 0 AND updated_at < datetime('now', :cutoff))
+                        OR domain_id IN (
+                            SELECT d.id FROM domains d
+                            JOIN dns_providers p ON p.id = d.provider_id
+                            WHERE (d.enabled = 0 AND d.updated_at < datetime('now', :cutoff))
+                                OR (p.enabled = 0 AND p.updated_at < datetime('now', :cutoff))
+                        )
+                """, {'cutoff': cutoff})
+                counts['archived'] = cursor.rowcount
+            for table in ('dns_records', 'domains', 'dns_providers'):
+                cursor.execute(f"""
+                    DELETE FROM {table}
+                    WHERE enabled = 0 AND updated_at < datetime('now', ?)
+                """, (cutoff,))
+                counts[table] = cursor.rowcount
+            conn.commit()
+        return counts
+    
+    def get_storage_stats(self) -> Dict[str, int]:
+        """数据库文件的页数、空闲页数和占用字节数"""
+        with self.connect() as conn:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return {
+            'page_size': page_size,
+            'page_count': page_count,
+            'freelist_count': freelist,
+            'bytes': page_size * page_count,
+        }
+    
+    def compact(self) -> bool:
+        """
+        更新查询规划统计（PRAGMA optimize）并归还空闲页；
+        未启用增量清理的旧数据库先执行一次完整 VACUUM 转换，返回是否进行了转换
+        """
+        conn = self.connect()
+        try:
+            conn.isolation_level = None  # VACUUM 不能在事务中执行
+            conn.execute("PRAGMA optimize")
+            converted = conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2
+            if converted:
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+            else:
+                # 每步只释放一页，executescript 会执行到结束
+                conn.executescript("PRAGMA incremental_vacuum;")
+            return converted
+        finally:
+            conn.close()
 
 
 # 全局数据库实例
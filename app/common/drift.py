@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+后台漂移检测
+定期检查各域名的远程记录是否在本程序之外被修改（服务商控制台、其他工具等），
+发现后更新本地缓存、保存快照并写入操作日志
+
+- 每个域名独立调度：首次检查在一个检查周期内随机错开，之后每次的间隔加入随机抖动，避免请求集中
+- 自适应间隔：发现变化的域名检查间隔减半（热点域名），未变化时逐步放大（冷门域名），限制在上下限之间
+- 优先读取提供商的轻量变化标识（记录总数、区域修改时间等，见 get_zone_signature），标识未变化时
+  不读取完整记录；每隔 full_every 次检查强制完整对比一次，以发现不改变记录数的修改
+- 本程序自己提交的变更（操作日志中带前后内容的记录变更）不算作漂移，只用于更新本地缓存
+"""
+
+import time
+import heapq
+import random
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Set, Tuple
+
+from .database import db
+from .snapshot import snapshots, record_hash
+from .reconcile import load_cached_records
+from .rollback import log_changes
+from ..dns.base import DNSProviderBase, DNSProviderFactory, DNSRecord, CancelToken, OperationCancelled
+from ..dns.changeset import RecordChange, diff_records
+
+
+@dataclass
+class DriftEvent:
+    """一次检测到的外部修改"""
+    domain: str
+    domain_id: int
+    provider_id: Optional[int]
+    changes: List[RecordChange]
+    detected_at: float = field(default_factory=time.time)
+    
+    def summary(self) -> str:
+        counts = Counter(change.action for change in self.changes)
+        return f"新增 {counts['create']} 条，修改 {counts['update']} 条，删除 {counts['delete']} 条"
+
+
+@dataclass
+class ZoneSchedule:
+    """单个域名的检查计划"""
+    domain_id: int
+    domain: str
+    provider_id: int
+    interval: float
+    next_due: float
+    signature: Optional[str] = None
+    checks: int = 0
+    since_full: int = 0
+    log_mark: int = 0  # 已纳入本地缓存的最新操作日志ID
+    running: bool = False
+    last_error: str = ''
+
+
+def own_changes(domain: str, provider_id: Optional[int],
+                since_id: int) -> Tuple[Set[str], Set[str], int]:
+    """
+    本程序在 since_id 之后提交的记录变更，
+    返回 (变更后的记录内容哈希, 变更前的记录内容哈希, 最新日志ID)
+    """
+    after: Set[str] = set()
+    before: Set[str] = set()
+    mark = since_id
+    for log in db.get_record_change_logs(domain, provider_id, since_id + 1):
+        mark = max(mark, log['id'])
+        if log['payload'].get('after'):
+            after.add(record_hash(DNSRecord(**log['payload']['after'])))
+        if log['payload'].get('before'):
+            before.add(record_hash(DNSRecord(**log['payload']['before'])))
+    return after, before, mark
+
+
+class DriftScheduler:
+    """漂移检测调度器，在后台线程中按各域名的计划检查"""
+    
+    def __init__(self, interval: float = 600, min_interval: float = 60, max_interval: float = 3600,
+                 jitter: float = 0.2, full_every: int = 6, max_workers: int = 4,
+                 refresh_interval: float = 60,
+                 on_drift: Optional[Callable[[DriftEvent], None]] = None,
+                 on_error: Optional[Callable[[str, str], None]] = None):
+        """
+        interval 为新域名的初始检查间隔（秒），之后在 [min_interval, max_interval] 内自适应调整；
+        refresh_interval 为重新读取本地域名和提供商列表的间隔；
+        on_drift / on_error 在工作线程中调用
+        """
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.full_every = full_every
+        self.max_workers = max_workers
+        self.refresh_interval = refresh_interval
+        self.on_drift = on_drift
+        self.on_error = on_error
+        
+        self.schedules: Dict[int, ZoneSchedule] = {}
+        self.random = random.Random()
+        self._heap: List[Tuple[float, int]] = []
+        self._provider_data: Dict[int, Dict[str, Any]] = {}
+        self._providers: Dict[int, Tuple[str, DNSProviderBase]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._cancel = CancelToken()  # 停止时取消进行中的检查，分页读取在下一页之前结束
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        """启动后台调度线程"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._cancel = CancelToken()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='drift')
+        self._thread = threading.Thread(target=self._loop, name='drift-scheduler', daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: Optional[float] = 5.0):
+        """停止调度，正在进行的检查在当前请求完成后结束"""
+        self._stop.set()
+        self._cancel.cancel()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
+    def jittered(self, interval: float) -> float:
+        return interval * self.random.uniform(1 - self.jitter, 1 + self.jitter)
+    
+    def push(self, schedule: ZoneSchedule):
+        heapq.heappush(self._heap, (schedule.next_due, schedule.domain_id))
+    
+    def refresh_domains(self):
+        """同步本地域名列表：新域名在一个检查周期内随机错开首次检查，已删除的域名停止检查"""
+        providers = {p['id']: p for p in db.get_dns_providers()}
+        domains = [d for d in db.get_domains() if d['provider_id'] in providers]
+        now = time.monotonic()
+        with self._lock:
+            self._provider_data = providers
+            seen = set()
+            for row in domains:
+                seen.add(row['id'])
+                if row['id'] in self.schedules:
+                    continue
+                schedule = ZoneSchedule(row['id'], row['domain'], row['provider_id'], self.interval,
+                                        now + self.random.uniform(0, self.interval))
+                self.schedules[row['id']] = schedule
+                self.push(schedule)
+            for domain_id in set(self.schedules) - seen:
+                del self.schedules[domain_id]
+    
+    def check_now(self, domain_ids: Optional[List[int]] = None):
+        """让指定域名（默认全部）立即检查"""
+        now = time.monotonic()
+        with self._lock:
+            for domain_id in (domain_ids if domain_ids is not None else list(self.schedules)):
+                schedule = self.schedules.get(domain_id)
+                if schedule is not None and not schedule.running:
+                    schedule.next_due = now
+                    self.push(schedule)
+        self._wake.set()
+    
+    def get_provider(self, provider_id: int) -> DNSProviderBase:
+        """获取（并复用）提供商实例，配置变化后重新创建"""
+        with self._lock:
+            data = self._provider_data[provider_id]
+            cached = self._providers.get(provider_id)
+            if cached is not None and cached[0] == data['config']:
+                cached[1].cancel_token = self._cancel
+                return cached[1]
+        provider = DNSProviderFactory.create_from_data(data)
+        provider.cancel_token = self._cancel
+        with self._lock:
+            self._providers[provider_id] = (data['config'], provider)
+        return provider
+    
+    def check_zone(self, schedule: ZoneSchedule) -> Optional[DriftEvent]:
+        """检查单个域名，发现外部修改时返回事件"""
+        provider = self.get_provider(schedule.provider_id)
+        signature = provider.get_zone_signature(schedule.domain)
+        schedule.checks += 1
+        if (signature is not None and signature == schedule.signature
+                and schedule.since_full + 1 < self.full_every):
+            schedule.since_full += 1
+            return None
+        
+        # 先读取日志再读取远程记录，之后写入的日志留到下次检查
+        own_after, own_before, log_mark = own_changes(schedule.domain, schedule.provider_id, schedule.log_mark)
+        remote = provider.get_records(schedule.domain)
+        local = load_cached_records(schedule.domain_id)
+        baseline = schedule.checks == 1 and not local
+        schedule.signature = signature
+        schedule.since_full = 0
+        schedule.log_mark = log_mark
+        
+        changes = diff_records(local, remote)
+        if not changes:
+            return None
+        db.replace_dns_records(schedule.domain_id, [r.to_dict() for r in remote])
+        snapshots.take(schedule.domain, remote, schedule.provider_id, 'drift')
+        if baseline:
+            # 从未同步过的域名，首次读取只建立本地缓存
+            return None
+        
+        external = []
+        for change in changes:
+            own = own_before if change.action == 'delete' else own_after
+            if record_hash(change.record) not in own:
+                external.append(change)
+        if not external:
+            return None
+        
+        event = DriftEvent(schedule.domain, schedule.domain_id, schedule.provider_id, external)
+        db.add_operation_log('drift', 'domain', schedule.domain_id, f'检测到外部修改: {event.summary()}',
+                             domain=schedule.domain, provider_id=schedule.provider_id)
+        log_changes(schedule.domain, schedule.provider_id, external, [], '外部修改')
+        return event
+    
+    def run_check(self, schedule: ZoneSchedule) -> Optional[DriftEvent]:
+        """执行检查并按结果调整下次检查时间：有变化缩短间隔，无变化或出错放大间隔"""
+        event = None
+        try:
+            event = self.check_zone(schedule)
+            schedule.last_error = ''
+        except OperationCancelled:
+            pass
+        except Exception as e:
+            schedule.last_error = str(e)
+            if self.on_error:
+                self.on_error(schedule.domain, str(e))
+        
+        with self._lock:
+            schedule.running = False
+            if event is not None:
+                schedule.interval = max(self.min_interval, schedule.interval / 2)
+            else:
+                schedule.interval = min(self.max_interval, schedule.interval * 1.5)
+            schedule.next_due = time.monotonic() + self.jittered(schedule.interval)
+            if self.schedules.get(schedule.domain_id) is schedule:
+                self.push(schedule)
+        self._wake.set()
+        
+        if event is not None and self.on_drift:
+            self.on_drift(event)
+        return event
+    
+    def check_all(self) -> List[DriftEvent]:
+        """立即检查所有域名一次（在调用线程中等待完成）"""
+        if not self.running:
+            self._cancel = CancelToken()  # stop() 已取消的标记不再影响手动检查
+        self.refresh_domains()
+        with self._lock:
+            pending = [s for s in self.schedules.values() if not s.running]
+            for schedule in pending:
+                schedule.running = True
+        if not pending:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as executor:
+            return [event for event in executor.map(self.run_check, pending) if event is not None]
+    
+    def _loop(self):
+        last_refresh = None
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if last_refresh is None or now - last_refresh >= self.refresh_interval:
+                try:
+                    self.refresh_domains()
+                except Exception as e:
+                    print(f"漂移检测读取域名列表失败: {e}")
+                last_refresh = now
+            
+            due = []
+            with self._lock:
+                while self._heap and self._heap[0][0] <= now:
+                    next_due, domain_id = heapq.heappop(self._heap)
+                    schedule = self.schedules.get(domain_id)
+                    # 已删除、正在检查或已重新安排的旧条目直接丢弃
+                    if schedule is None or schedule.running or schedule.next_due != next_due:
+                        continue
+                    schedule.running = True
+                    due.append(schedule)
+                timeout = self._heap[0][0] - now if self._heap else self.refresh_interval
+            
+            for schedule in due:
+                try:
+                    self._executor.submit(self.run_check, schedule)
+                except RuntimeError:
+                    # 停止过程中线程池已关闭
+                    return
+            
+            self._wake.wait(max(0.0, min(timeout, self.refresh_interval)))
+            self._wake.clear()
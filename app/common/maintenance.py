@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+数据库定期维护
+删除记录、提供商时只把 enabled 置0，软删除的行会一直留在表中，所有 enabled = 1 的查询都要跳过它们。
+维护任务依次：
+- 物理删除（可选先归档）软删除超过保留期的行，清除过期的API调用统计
+- 创建只包含启用行的部分索引
+- 执行 PRAGMA optimize 并增量归还空闲页
+前后各测量一次数据库大小和常用查询的耗时，结果写入操作日志
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from .config import cfg
+from .database import DatabaseManager, db
+
+
+@dataclass
+class MaintenanceReport:
+    """一次维护的结果"""
+    purged: Dict[str, int]
+    indexes_created: int
+    converted: bool
+    bytes_before: int
+    bytes_after: int
+    query_ms_before: float
+    query_ms_after: float
+    duration: float
+    finished_at: float = field(default_factory=time.time)
+    
+    @property
+    def reclaimed_bytes(self) -> int:
+        return self.bytes_before - self.bytes_after
+    
+    @property
+    def speedup(self) -> float:
+        """查询耗时的变化倍数（大于1表示变快）"""
+        return self.query_ms_before / self.query_ms_after if self.query_ms_after > 0 else 1.0
+    
+    def summary(self) -> str:
+        purged = self.purged
+        text = (f"清除记录 {purged.get('dns_records', 0)} 条、域名 {purged.get('domains', 0)} 个、"
+                f"提供商 {purged.get('dns_providers', 0)} 个、API调用统计 {purged.get('provider_metrics', 0)} 条")
+        if 'archived' in purged:
+            text += f"（归档记录 {purged['archived']} 条）"
+        text += (f"，新建索引 {self.indexes_created} 个，释放空间 {self.reclaimed_bytes / 1024:.1f} KB"
+                 f"（{self.bytes_before / 1024:.1f} KB → {self.bytes_after / 1024:.1f} KB），"
+                 f"查询耗时 {self.query_ms_before:.2f} ms → {self.query_ms_after:.2f} ms")
+        return text
+
+
+def measure_queries(database: DatabaseManager, sample_domains: int = 100, repeat: int = 3) -> float:
+    """
+    测量常用的 enabled = 1 查询（提供商列表、域名列表、各域名的记录）的耗时（毫秒），
+    记录查询最多取 sample_domains 个域名，重复 repeat 次取最短
+    """
+    domain_ids = [d['id'] for d in database.get_domains()[:sample_domains]]
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        database.get_dns_providers()
+        database.get_domains()
+        for domain_id in domain_ids:
+            database.get_dns_records(domain_id)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def run_maintenance(retention_days: float = 30, archive: bool = False,
+                    database: Optional[DatabaseManager] = None,
+                    metrics_retention_days: float = 7) -> MaintenanceReport:
+    """执行一次维护，返回维护结果；API调用统计保留 metrics_retention_days 天（诊断界面最长显示7天）"""
+    database = database or db
+    start = time.perf_counter()
+    bytes_before = database.get_storage_stats()['bytes']
+    query_before = measure_queries(database)
+    
+    purged = database.purge_soft_deleted(retention_days, archive)
+    purged['provider_metrics'] = database.clear_provider_metrics(time.time() - metrics_retention_days * 86400)
+    with database.connect() as conn:
+        indexes_created = database.ensure_indexes(conn.cursor())
+        conn.commit()
+    converted = database.compact()
+    
+    report = MaintenanceReport(
+        purged=purged,
+        indexes_created=indexes_created,
+        converted=converted,
+        bytes_before=bytes_before,
+        bytes_after=database.get_storage_stats()['bytes'],
+        query_ms_before=query_before,
+        query_ms_after=measure_queries(database),
+        duration=time.perf_counter() - start
+    )
+    database.add_operation_log('maintenance', 'database', details=report.summary())
+    return report
+
+
+def run_due_maintenance(database: Optional[DatabaseManager] = None) -> Optional[MaintenanceReport]:
+    """按配置检查距上次维护是否已超过间隔，到期时执行维护；未启用或未到期时返回None"""
+    if not cfg.get('maintenance.enabled', True):
+        return None
+    interval = cfg.get('maintenance.interval_hours', 24) * 3600
+    if time.time() - cfg.get('maintenance.last_run', 0) < interval:
+        return None
+    
+    report = run_maintenance(cfg.get('maintenance.retention_days', 30),
+                             cfg.get('maintenance.archive', False), database,
+                             cfg.get('maintenance.metrics_retention_days', 7))
+    cfg.set('maintenance.last_run', report.finished_at)
+    return report
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+跨服务商迁移与镜像
+把源服务商的域名记录同步到目标服务商（如CloudFlare与DNSPod互为冗余）:
+- 统一记录名称：CloudFlare的完整域名、阿里云/腾讯云的主机记录（@/RR）均转换为相对名称
+- 按目标服务商调整TTL范围，目标不支持的记录类型跳过或按映射转换
+- 与目标当前记录对比后只提交差异，同一域名内的请求和不同域名之间均可并发
+- 持续镜像模式下，源记录集摘要未变化的域名跳过目标读取，只做增量对比
+"""
+
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Callable
+
+from .rollback import log_changes
+from .snapshot import record_hash, counts_digest
+from ..dns.base import DNSProviderBase, DNSRecord
+from ..dns.changeset import RecordChange, diff_records, apply_changes, normalize_value
+
+
+def is_apex_ns(record: DNSRecord) -> bool:
+    """根域名NS记录由服务商管理，默认不迁移"""
+    return record.type.upper() == 'NS' and record.name in ('@', '')
+
+
+def relative_name(name: str, domain: str) -> str:
+    """把完整域名或主机记录统一为相对名称，根域名为@"""
+    name = (name or '').strip().rstrip('.').lower()
+    domain = domain.rstrip('.').lower()
+    if not name or name == '@' or name == domain:
+        return '@'
+    if name.endswith('.' + domain):
+        return name[:-len(domain) - 1]
+    return name
+
+
+@dataclass
+class MirrorResult:
+    """单个域名的迁移结果"""
+    domain: str
+    source_count: int = 0
+    changes: List[RecordChange] = field(default_factory=list)
+    applied: List[RecordChange] = field(default_factory=list)
+    failed: List[Tuple[RecordChange, str]] = field(default_factory=list)
+    skipped: List[Tuple[DNSRecord, str]] = field(default_factory=list)
+    unchanged: bool = False  # 持续镜像中源记录未变化，未读取目标
+    digest: str = ''
+    error: str = ''
+    
+    @property
+    def ok(self) -> bool:
+        return not self.error and not self.failed
+
+
+class ZoneMirror:
+    """源服务商到目标服务商的记录迁移/镜像"""
+    
+    def __init__(self, source: DNSProviderBase, target: DNSProviderBase,
+                 target_provider_id: Optional[int] = None, delete_missing: bool = True,
+                 type_map: Optional[Dict[str, Optional[str]]] = None, include_apex_ns: bool = False,
+                 max_workers: int = 4, zone_workers: int = 4):
+        """
+        type_map 把源记录类型映射为目标类型，映射为 None 表示跳过；
+        目标 get_record_types() 不包含的类型默认跳过
+        """
+        self.source = source
+        self.target = target
+        self.target_provider_id = target_provider_id
+        self.delete_missing = delete_missing
+        self.type_map = {k.upper(): v for k, v in (type_map or {}).items()}
+        self.include_apex_ns = include_apex_ns
+        self.max_workers = max_workers
+        self.zone_workers = zone_workers
+        self.supported = {t.upper() for t in target.get_record_types()}
+        # 持续镜像的增量状态：域名 -> 上次成功同步时源记录集的摘要
+        self.digests: Dict[str, str] = {}
+        self._digest_lock = threading.Lock()
+    
+    def map_ttl(self, ttl: int) -> int:
+        """按目标服务商的TTL范围调整，自动TTL（1）在目标不支持时使用其最小值"""
+        ttl = int(ttl)
+        if ttl == 1:
+            return max(self.target.min_ttl, 1)
+        return min(max(ttl, self.target.min_ttl), self.target.max_ttl)
+    
+    def translate(self, domain: str, records: List[DNSRecord],
+                  skipped: List[Tuple[DNSRecord, str]]) -> Iterator[DNSRecord]:
+        """逐条转换源记录为目标记录，跳过的记录追加到 skipped"""
+        for record in records:
+            record_type = record.type.upper()
+            if record_type in self.type_map:
+                record_type = self.type_map[record_type]
+                if not record_type:
+                    skipped.append((record, '按类型映射跳过'))
+                    continue
+            if record_type not in self.supported:
+                skipped.append((record, f'目标不支持 {record_type} 记录'))
+                continue
+            
+            name = relative_name(record.name, domain)
+            translated = DNSRecord(
+                id=None,
+                name=name,
+                type=record_type,
+                value=normalize_value(record_type, record.value, unquote_txt=True),
+                ttl=self.map_ttl(record.ttl),
+                priority=record.priority if record_type in ('MX', 'SRV') else 0
+            )
+            if is_apex_ns(translated) and not self.include_apex_ns:
+                skipped.append((record, '根域名NS记录由服务商管理'))
+                continue
+            yield translated
+    
+    def target_view(self, domain: str, records: List[DNSRecord]) -> List[DNSRecord]:
+        """目标当前记录按同样规则统一名称和值，保留记录ID"""
+        current = []
+        for record in records:
+            record_type = record.type.upper()
+            view = DNSRecord(
+                id=record.id,
+                name=relative_name(record.name, domain),
+                type=record_type,
+                value=normalize_value(record_type, record.value, unquote_txt=True),
+                ttl=record.ttl,
+                priority=record.priority if record_type in ('MX', 'SRV') else 0
+            )
+            if is_apex_ns(view) and not self.include_apex_ns:
+                continue
+            current.append(view)
+        return current
+    
+    def plan(self, domain: str, incremental: bool = False) -> MirrorResult:
+        """读取源和目标记录，计算目标需要的变更"""
+        result = MirrorResult(domain)
+        try:
+            source_records = list(self.source.export_records(domain))
+            result.source_count = len(source_records)
+            
+            digest = counts_digest(Counter(record_hash(r) for r in source_records))
+            if incremental:
+                with self._digest_lock:
+                    if self.digests.get(domain) == digest:
+                        result.unchanged = True
+                        return result
+            result.digest = digest
+            
+            current = self.target_view(domain, self.target.get_records(domain))
+            desired = self.translate(domain, source_records, result.skipped)
+            result.changes = diff_records(current, desired, delete_missing=self.delete_missing)
+        except Exception as e:
+            result.error = str(e)
+        return result
+    
+    def apply(self, result: MirrorResult) -> MirrorResult:
+        """提交变更并记录日志，全部成功后记下源记录集摘要"""
+        if result.error or result.unchanged:
+            return result
+        if result.changes:
+            result.applied, result.failed = apply_changes(
+                self.target, result.domain, result.changes, max_workers=self.max_workers
+            )
+            log_changes(result.domain, self.target_provider_id, result.applied, result.failed, '镜像同步')
+        if not result.failed:
+            with self._digest_lock:
+                self.digests[result.domain] = result.digest
+        return result
+    
+    def sync_zone(self, domain: str, dry_run: bool = False, incremental: bool = False) -> MirrorResult:
+        result = self.plan(domain, incremental)
+        return result if dry_run else self.apply(result)
+    
+    def sync(self, domains: List[str], dry_run: bool = False, incremental: bool = False) -> List[MirrorResult]:
+        """同步多个域名，不同域名之间并发执行"""
+        with ThreadPoolExecutor(max_workers=max(1, min(self.zone_workers, len(domains) or 1))) as executor:
+            return list(executor.map(lambda d: self.sync_zone(d, dry_run, incremental), domains))
+    
+    def run(self, domains: List[str], interval: float = 300, full_every: int = 12,
+            stop: Optional[threading.Event] = None,
+            callback: Optional[Callable[[int, List[MirrorResult]], None]] = None):
+        """
+        持续镜像：每隔 interval 秒同步一轮，源记录未变化的域名不读取目标；
+        每 full_every 轮做一次完整对比，以纠正目标端被直接修改的记录
+        """
+        stop = stop or threading.Event()
+        round_no = 0
+        while not stop.is_set():
+            incremental = round_no % full_every != 0 if full_every else True
+            results = self.sync(domains, incremental=incremental)
+            if callback:
+                callback(round_no, results)
+            round_no += 1
+            stop.wait(interval)
@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+性能分析模式
+- 被 @profiled 装饰的工作线程 run() 和界面槽函数在cProfile下执行，按函数合并统计
+- 采样线程定期记录所有线程的调用栈，导出为speedscope格式
+- 界面线程心跳超过阈值未到达时记录事件循环阻塞及当时的调用栈
+
+每次分析会话的结果写入 profiles/<开始时间>/ 目录:
+    <函数名>.prof          cProfile统计（可用 pstats 或 snakeviz 打开）
+    summary.txt            按累计耗时排序的汇总
+    session.speedscope.json 采样调用栈（https://www.speedscope.app）
+    blocks.log             事件循环阻塞记录
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import atexit
+import pstats
+import cProfile
+import inspect
+import threading
+import functools
+import traceback
+from datetime import datetime
+from typing import Dict, List, Tuple, Optional
+
+
+PROFILE_DIR = 'profiles'
+
+# 默认采样间隔（毫秒）和事件循环阻塞阈值（毫秒）
+SAMPLE_INTERVAL_MS = 10
+BLOCK_THRESHOLD_MS = 200
+
+
+class StackSampler:
+    """采样分析器：定期记录所有线程的调用栈"""
+    
+    def __init__(self, interval_ms: float = SAMPLE_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self.frames: Dict[Tuple[str, str, int], int] = {}
+        self.stacks: Dict[Tuple[int, ...], int] = {}
+        self.samples: Dict[int, List[Tuple[int, float]]] = {}  # 线程ID -> [(栈ID, 权重毫秒)]
+        self.thread_names: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+    
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='profiler-sampler', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.stopped_at = time.perf_counter()
+    
+    def _run(self):
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight = (now - last) * 1000
+            last = now
+            for thread in threading.enumerate():
+                self.thread_names.setdefault(thread.ident, thread.name)
+            frames = sys._current_frames()
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                stack_id = self.stack_id(frame)
+                self.samples.setdefault(thread_id, []).append((stack_id, weight))
+            # 不能持有帧对象，否则其局部变量（如paintEvent中的QPainter）无法及时释放
+            frame = frames = None
+    
+    def stack_id(self, frame) -> int:
+        """把调用栈转换为（从根到叶的）帧序号元组并去重"""
+        indexes = []
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_name, code.co_filename, code.co_firstlineno)
+            index = self.frames.get(key)
+            if index is None:
+                index = self.frames[key] = len(self.frames)
+            indexes.append(index)
+            frame = frame.f_back
+        stack = tuple(reversed(indexes))
+        stack_id = self.stacks.get(stack)
+        if stack_id is None:
+            stack_id = self.stacks[stack] = len(self.stacks)
+        return stack_id
+    
+    def to_speedscope(self, name: str) -> dict:
+        """导出为speedscope文件格式"""
+        stacks = [None] * len(self.stacks)
+        for stack, stack_id in self.stacks.items():
+            stacks[stack_id] = list(stack)
+        frames = [None] * len(self.frames)
+        for (func, filename, line), index in self.frames.items():
+            frames[index] = {'name': func, 'file': filename, 'line': line}
+        
+        profiles = []
+        for thread_id, samples in self.samples.items():
+            total = sum(weight for _, weight in samples)
+            profiles.append({
+                'type': 'sampled',
+                'name': self.thread_names.get(thread_id, f'thread-{thread_id}'),
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': total,
+                'samples': [stacks[stack_id] for stack_id, _ in samples],
+                'weights': [weight for _, weight in samples],
+            })
+        
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'dnsmgr-profiler',
+            'shared': {'frames': frames},
+            'profiles': profiles,
+        }
+
+
+class BlockMonitor:
+    """事件循环阻塞监控：界面线程定期调用 beat()，看门狗线程在心跳中断时抓取界面线程调用栈"""
+    
+    def __init__(self, threshold_ms: float = BLOCK_THRESHOLD_MS, log_file: Optional[str] = None):
+        self.threshold = threshold_ms / 1000.0
+        self.log_file = log_file
+        self.blocks = 0
+        self.longest_ms = 0.0
+        self._gui_thread_id = None
+        self._last_beat = 0.0
+        self._blocked_stack = None
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        self._gui_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._thread = threading.Thread(target=self._watch, name='profiler-watchdog', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+    
+    def beat(self):
+        """界面线程心跳，距上次心跳超过阈值时记录一次阻塞"""
+        now = time.perf_counter()
+        gap = now - self._last_beat
+        self._last_beat = now
+        if gap < self.threshold:
+            return
+        
+        stack, self._blocked_stack = self._blocked_stack, None
+        gap_ms = gap * 1000
+        self.blocks += 1
+        self.longest_ms = max(self.longest_ms, gap_ms)
+        message = f'[{datetime.now().strftime("%H:%M:%S.%f")[:-3]}] 事件循环阻塞 {gap_ms:.0f} ms'
+        print(message, file=sys.stderr)
+        if self.log_file:
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(message + '\n')
+                if stack:
+                    f.write(''.join(stack) + '\n')
+    
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 4):
+            if self._blocked_stack is not None:
+                continue
+            if time.perf_counter() - self._last_beat >= self.threshold:
+                frame = sys._current_frames().get(self._gui_thread_id)
+                if frame is not None:
+                    self._blocked_stack = traceback.format_stack(frame)
+                frame = None
+
+
+class Profiler:
+    """性能分析会话"""
+    
+    def __init__(self):
+        self.running = False
+        self.session_dir = ''
+        self.sampler = None
+        self.monitor = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats: Dict[str, pstats.Stats] = {}
+        self._calls: Dict[str, List[float]] = {}  # 函数名 -> [调用次数, 总耗时]
+        self._atexit_registered = False
+    
+    def start(self, block_threshold_ms: float = BLOCK_THRESHOLD_MS,
+              sample_interval_ms: float = SAMPLE_INTERVAL_MS) -> str:
+        """开始会话，需在界面线程中调用，返回结果目录"""
+        if self.running:
+            return self.session_dir
+        
+        self.session_dir = os.path.join(PROFILE_DIR, datetime.now().strftime('%Y%m%d-%H%M%S'))
+        os.makedirs(self.session_dir, exist_ok=True)
+        self._stats = {}
+        self._calls = {}
+        
+        self.sampler = StackSampler(sample_interval_ms)
+        self.sampler.start()
+        self.monitor = BlockMonitor(block_threshold_ms, os.path.join(self.session_dir, 'blocks.log'))
+        self.monitor.start()
+        self.running = True
+        
+        if not self._atexit_registered:
+            atexit.register(self.stop)
+            self._atexit_registered = True
+        print(f'性能分析已开启，结果目录: {self.session_dir}', file=sys.stderr)
+        return self.session_dir
+    
+    def stop(self) -> str:
+        """结束会话并写出结果文件，返回结果目录"""
+        if not self.running:
+            return ''
+        self.running = False
+        self.sampler.stop()
+        self.monitor.stop()
+        
+        with self._lock:
+            stats = dict(self._stats)
+            calls = dict(self._calls)
+        
+        for name, stat in stats.items():
+            stat.dump_stats(os.path.join(self.session_dir, f'{name}.prof'))
+        
+        with open(os.path.join(self.session_dir, 'session.speedscope.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.sampler.to_speedscope(os.path.basename(self.session_dir)), f)
+        
+        with open(os.path.join(self.session_dir, 'summary.txt'), 'w', encoding='utf-8') as f:
+            f.write(self.summary(stats, calls))
+        
+        print(f'性能分析结果已保存: {self.session_dir}', file=sys.stderr)
+        return self.session_dir
+    
+    def beat(self):
+        """事件循环心跳"""
+        if self.running:
+            self.monitor.beat()
+    
+    def summary(self, stats: Dict[str, pstats.Stats], calls: Dict[str, List[float]]) -> str:
+        """生成文本汇总"""
+        out = io.StringIO()
+        out.write(f'事件循环阻塞 {self.monitor.blocks} 次，最长 {self.monitor.longest_ms:.0f} ms\n\n')
+        out.write('被分析的函数（按总耗时排序）:\n')
+        for name, (count, total) in sorted(calls.items(), key=lambda item: item[1][1], reverse=True):
+            out.write(f'  {name}: {int(count)} 次，共 {total * 1000:.1f} ms\n')
+        
+        for name, stat in stats.items():
+            out.write(f'\n===== {name} =====\n')
+            stat.stream = out
+            stat.sort_stats('cumulative').print_stats(30)
+        return out.getvalue()
+    
+    def call(self, name: str, func, *args, **kwargs):
+        """在cProfile下执行函数，同一线程内的嵌套调用只计入最外层"""
+        if getattr(self._local, 'active', False):
+            return func(*args, **kwargs)
+        
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ 同一时间只允许一个cProfile，其他线程正在分析时直接执行（采样仍会覆盖）
+            return func(*args, **kwargs)
+        
+        self._local.active = True
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - start
+            self._local.active = False
+            self.merge(name, profile, elapsed)
+    
+    def merge(self, name: str, profile: cProfile.Profile, elapsed: float):
+        """合并同一函数的多次调用"""
+        with self._lock:
+            if not self.running:
+                return
+            if name in self._stats:
+                self._stats[name].add(profile)
+            else:
+                self._stats[name] = pstats.Stats(profile)
+            calls = self._calls.setdefault(name, [0, 0.0])
+            calls[0] += 1
+            calls[1] += elapsed
+
+
+def profiled(func):
+    """
+    分析模式下在cProfile中执行被装饰的函数，未开启时直接调用
+    与PyQt槽函数的行为一致，多余的位置参数（如 clicked 的 checked）会被丢弃
+    """
+    name = func.__qualname__
+    params = inspect.signature(func).parameters.values()
+    if any(p.kind == p.VAR_POSITIONAL for p in params):
+        max_args = None
+    else:
+        max_args = sum(1 for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD))
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if max_args is not None:
+            args = args[:max_args]
+        if not profiler.running:
+            return func(*args, **kwargs)
+        return profiler.call(name, func, *args, **kwargs)
+    return wrapper
+
+
+profiler = Profiler()
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+期望状态对账（plan/apply）
+根据YAML中声明的每个域名的期望记录集，与当前记录对比生成最小变更计划并提交
+
+期望状态文件格式:
+    zones:
+      example.com:
+        provider: 1            # 可选，同一域名存在于多个提供商时必填
+        delete_missing: true   # 可选，是否删除未声明的记录，默认 true
+        records:
+          - {name: www, type: A, value: 1.2.3.4, ttl: 600}
+          - {name: "@", type: MX, value: mail.example.com, priority: 10}
+"""
+
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from .database import db
+from .registry import provider_registry
+from .rollback import log_changes
+from ..dns.base import DNSProviderFactory, DNSRecord
+from ..dns.changeset import RecordChange, diff_records, apply_changes
+
+
+@dataclass
+class ZoneState:
+    """单个域名的期望状态"""
+    domain: str
+    records: List[DNSRecord]
+    provider_id: Optional[int] = None
+    delete_missing: bool = True
+
+
+@dataclass
+class ZonePlan:
+    """单个域名的变更计划"""
+    domain_data: Dict[str, Any]
+    changes: List[RecordChange]
+    current: List[DNSRecord]
+    source: str = 'cache'  # cache：本地快照；remote：实时获取
+    error: str = ''
+    
+    @property
+    def domain(self) -> str:
+        return self.domain_data['domain'] if self.domain_data else ''
+
+
+@dataclass
+class ApplyResult:
+    """单个域名的提交结果"""
+    plan: ZonePlan
+    applied: List[RecordChange] = field(default_factory=list)
+    failed: List[Tuple[RecordChange, str]] = field(default_factory=list)
+
+
+def parse_record(data: Dict[str, Any]) -> DNSRecord:
+    """把YAML中的记录声明转换为DNSRecord"""
+    if not data.get('type') or data.get('value') is None:
+        raise ValueError(f'记录缺少 type 或 value: {data}')
+    return DNSRecord(
+        name=str(data.get('name') or '@'),
+        type=str(data['type']).upper(),
+        value=str(data['value']),
+        ttl=int(data.get('ttl', 600)),
+        priority=int(data.get('priority', 0))
+    )
+
+
+def load_desired_state(file_path: str) -> List[ZoneState]:
+    """读取期望状态YAML文件"""
+    import yaml
+    
+    with open(file_path, 'r', encoding='utf-8') as f:
+        document = yaml.safe_load(f) or {}
+    
+    zones = document.get('zones', document)
+    if not isinstance(zones, dict):
+        raise ValueError('期望状态格式错误：应为 域名 -> 记录集 的映射')
+    
+    states = []
+    for domain, spec in zones.items():
+        # 允许直接写记录列表的简写形式
+        if isinstance(spec, list):
+            spec = {'records': spec}
+        states.append(ZoneState(
+            domain=str(domain).rstrip('.'),
+            records=[parse_record(r) for r in spec.get('records') or []],
+            provider_id=spec.get('provider'),
+            delete_missing=bool(spec.get('delete_missing', True))
+        ))
+    return states
+
+
+def find_domain(domain: str, provider_id: Optional[int] = None) -> Dict[str, Any]:
+    """按域名（及可选的提供商ID）查找本地域名"""
+    matches = [d for d in db.get_domains(provider_id) if d['domain'] == domain]
+    if not matches:
+        raise ValueError(f'未找到域名: {domain}')
+    if len(matches) > 1:
+        raise ValueError(f'域名 {domain} 存在于多个提供商中，请指定提供商')
+    return matches[0]
+
+
+def get_provider_data(provider_id: int) -> Dict[str, Any]:
+    """按ID获取提供商配置"""
+    provider = provider_registry.get(provider_id)
+    if provider is None:
+        raise ValueError(f'未找到DNS提供商: {provider_id}')
+    return provider
+
+
+def load_cached_records(domain_id: int) -> List[DNSRecord]:
+    """从本地快照读取记录"""
+    return [
+        DNSRecord(
+            id=row['record_id'],
+            name=row['name'],
+            type=row['type'],
+            value=row['value'],
+            ttl=row['ttl'],
+            priority=row['priority']
+        )
+        for row in db.get_dns_records(domain_id)
+    ]
+
+
+class Reconciler:
+    """期望状态对账器"""
+    
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._providers = {}
+    
+    def get_provider(self, provider_id: int):
+        """获取（并复用）提供商实例"""
+        if provider_id not in self._providers:
+            self._providers[provider_id] = DNSProviderFactory.create_from_data(get_provider_data(provider_id))
+        return self._providers[provider_id]
+    
+    def plan_zone(self, state: ZoneState, refresh: bool = False) -> ZonePlan:
+        """为单个域名生成变更计划"""
+        domain_data = None
+        try:
+            domain_data = find_domain(state.domain, state.provider_id)
+            
+            current = [] if refresh else load_cached_records(domain_data['id'])
+            source = 'cache'
+            if refresh or not current:
+                # 没有本地快照时实时获取，并刷新快照
+                current = self.get_provider(domain_data['provider_id']).get_records(state.domain)
+                db.replace_dns_records(domain_data['id'], [r.to_dict() for r in current])
+                source = 'remote'
+            
+            changes = diff_records(current, state.records, state.delete_missing)
+            return ZonePlan(domain_data, changes, current, source)
+        except Exception as e:
+            return ZonePlan(domain_data or {'domain': state.domain}, [], [], error=str(e))
+    
+    def plan(self, states: List[ZoneState], refresh: bool = False) -> List[ZonePlan]:
+        """为所有域名生成变更计划，需要实时获取时并发请求"""
+        if len(states) <= 1 or self.max_workers <= 1:
+            return [self.plan_zone(state, refresh) for state in states]
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(lambda state: self.plan_zone(state, refresh), states))
+    
+    def apply_zone(self, plan: ZonePlan) -> ApplyResult:
+        """提交单个域名的变更并更新本地快照"""
+        result = ApplyResult(plan)
+        if plan.error or not plan.changes:
+            return result
+        
+        domain = plan.domain
+        provider = self.get_provider(plan.domain_data['provider_id'])
+        result.applied, result.failed = apply_changes(
+            provider, domain, plan.changes, max_workers=self.max_workers
+        )
+        
+        log_changes(domain, plan.domain_data['provider_id'], result.applied, result.failed, '对账变更')
+        
+        # 根据成功的变更更新本地快照
+        records = {id(r): r for r in plan.current}
+        for change in result.applied:
+            if change.action == 'delete':
+                records.pop(id(change.record), None)
+            elif change.action == 'update':
+                records.pop(id(change.old), None)
+                records[id(change.record)] = change.record
+            else:
+                records[id(change.record)] = change.record
+        if any(not r.id for r in records.values()):
+            # 个别新增记录未能回填ID，改为读取远程记录更新快照，避免写入没有ID的记录
+            try:
+                records = {id(r): r for r in provider.get_records(domain)}
+            except Exception as e:
+                print(f"读取 {domain} 的记录失败，未更新本地快照: {e}")
+                return result
+        db.replace_dns_records(plan.domain_data['id'], [r.to_dict() for r in records.values()])
+        
+        return result
+    
+    def apply(self, plans: List[ZonePlan]) -> List[ApplyResult]:
+        """提交所有域名的变更，不同域名之间并发执行"""
+        pending = [p for p in plans if p.changes and not p.error]
+        if len(pending) <= 1 or self.max_workers <= 1:
+            return [self.apply_zone(plan) for plan in pending]
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(self.apply_zone, pending))
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+提供商注册表
+记录的保存、读取、删除以及域名列表的记录数都需要按ID取得提供商配置，
+注册表按主键读取提供商并只解析一次配置JSON，之后直接从内存返回；
+DatabaseManager 添加、修改或删除提供商时通知注册表丢弃对应条目，下次使用时重新读取。
+"""
+
+import json
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .database import DatabaseManager, db
+from ..dns.base import DNSProviderBase, DNSProviderFactory
+
+
+class ProviderRegistry:
+    """按ID缓存提供商记录和解析后的配置"""
+    
+    def __init__(self, database: DatabaseManager):
+        self._db = database
+        self._lock = threading.Lock()
+        # 提供商ID -> (数据库记录, 解析后的配置)，不存在的提供商缓存为None
+        self._entries: Dict[int, Optional[Tuple[Dict[str, Any], Dict[str, Any]]]] = {}
+        # 每次失效递增，避免失效前开始的读取把旧数据写回缓存
+        self._version = 0
+        database.add_provider_listener(self.invalidate)
+    
+    def _entry(self, provider_id: int) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        with self._lock:
+            if provider_id in self._entries:
+                return self._entries[provider_id]
+            version = self._version
+        
+        data = self._db.get_dns_provider(provider_id)
+        entry = (data, json.loads(data['config'])) if data else None
+        with self._lock:
+            if version == self._version:
+                self._entries[provider_id] = entry
+        return entry
+    
+    def get(self, provider_id: int) -> Optional[Dict[str, Any]]:
+        """获取提供商记录（config为JSON字符串），不存在或已删除时返回None"""
+        entry = self._entry(provider_id)
+        return dict(entry[0]) if entry else None
+    
+    def get_config(self, provider_id: int) -> Optional[Dict[str, Any]]:
+        """获取解析后的提供商配置（副本）"""
+        entry = self._entry(provider_id)
+        return dict(entry[1]) if entry else None
+    
+    def create(self, provider_id: int) -> Optional[DNSProviderBase]:
+        """按ID创建新的提供商实例，实例不共享（各自设置 cancel_token）"""
+        entry = self._entry(provider_id)
+        if entry is None:
+            return None
+        data, config = entry
+        provider = DNSProviderFactory.create(data['type'], dict(config))
+        provider.name = provider.name or data.get('name', '')
+        return provider
+    
+    def invalidate(self, provider_id: Optional[int] = None):
+        """丢弃指定提供商（默认全部）的缓存"""
+        with self._lock:
+            self._version += 1
+            if provider_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(provider_id, None)
+
+
+# 全局提供商注册表
+provider_registry = ProviderRegistry(db)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+记录变更日志与回滚
+记录的新增、修改和删除在操作日志中保存变更前后的内容（payload: {"before": 记录, "after": 记录}），
+回滚时从当前远程记录出发，逆序撤销目标日志点之后的所有变更（或直接以某个快照为目标），
+计算出最小变更集后分批提交
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+
+from .database import db
+from .snapshot import snapshots
+from ..dns.base import DNSProviderBase, DNSRecord
+from ..dns.changeset import RecordChange, diff_records, apply_changes, record_key, record_content
+
+
+def record_payload(before: Optional[DNSRecord], after: Optional[DNSRecord]) -> Dict[str, Any]:
+    """构建变更前后的记录内容"""
+    return {
+        'before': before.to_dict() if before is not None else None,
+        'after': after.to_dict() if after is not None else None
+    }
+
+
+def change_payload(change: RecordChange) -> Dict[str, Any]:
+    """变更集中单条变更的前后内容"""
+    if change.action == 'create':
+        return record_payload(None, change.record)
+    if change.action == 'update':
+        return record_payload(change.old, change.record)
+    return record_payload(change.record, None)
+
+
+def log_record_change(action: str, domain: str, provider_id: Optional[int],
+                      before: Optional[DNSRecord], after: Optional[DNSRecord], details: str,
+                      status: str = 'success', error_message: Optional[str] = None) -> int:
+    """写入带前后内容的记录变更日志"""
+    return db.add_operation_log(
+        action, 'record', 0, details, status, error_message,
+        domain=domain, provider_id=provider_id, payload=record_payload(before, after)
+    )
+
+
+def log_changes(domain: str, provider_id: Optional[int], applied: List[RecordChange],
+                failed: List[Tuple[RecordChange, str]], prefix: str):
+    """记录 apply_changes 的结果"""
+    for change in applied:
+        db.add_operation_log(change.action, 'record', 0, f'{prefix}: {change.describe(domain)}',
+                             domain=domain, provider_id=provider_id, payload=change_payload(change))
+    for change, error in failed:
+        db.add_operation_log(change.action, 'record', 0, f'{prefix}: {change.describe(domain)}',
+                             'error', error, domain=domain, provider_id=provider_id,
+                             payload=change_payload(change))
+
+
+def find_record(records: List[DNSRecord], data: Dict[str, Any]) -> Optional[int]:
+    """在记录列表中定位日志中的记录：优先按远程记录ID，其次按内容"""
+    record_id = data.get('id')
+    if record_id:
+        for i, record in enumerate(records):
+            if record.id == record_id:
+                return i
+    
+    target = DNSRecord(**data)
+    key, content = record_key(target), record_content(target)
+    for i, record in enumerate(records):
+        if record_key(record) == key and record_content(record) == content:
+            return i
+    return None
+
+
+def state_before_logs(current: List[DNSRecord], logs: List[Dict[str, Any]]) -> List[DNSRecord]:
+    """从当前记录逆序撤销日志中的变更（logs 需按从新到旧排列），得到变更前的记录集"""
+    records = list(current)
+    for log in logs:
+        before = log['payload'].get('before')
+        after = log['payload'].get('after')
+        index = find_record(records, after) if after else None
+        
+        if after and index is not None:
+            if before:
+                restored = DNSRecord(**before)
+                restored.id = records[index].id
+                records[index] = restored
+            else:
+                records.pop(index)
+        elif before:
+            # 删除的记录，或修改后已找不到的记录：重新创建变更前的内容
+            records.append(DNSRecord(**{**before, 'id': ''}))
+    return records
+
+
+def plan_rollback_to_log(provider: DNSProviderBase, domain: str, provider_id: Optional[int],
+                         log_id: int) -> Tuple[List[RecordChange], List[DNSRecord]]:
+    """
+    计算回滚到指定日志之前状态的变更集，返回 (变更集, 当前记录)；
+    日志不存在、不属于该域名（及提供商）或不是成功的记录变更时抛出 KeyError
+    """
+    log = db.get_operation_log(log_id)
+    if (log is None or log['domain'] != domain or log['status'] != 'success' or not log['payload']
+            or (provider_id is not None and log['provider_id'] != provider_id)):
+        raise KeyError(f'{domain} 中没有可回滚的记录变更日志: {log_id}')
+    
+    current = provider.get_records(domain)
+    logs = db.get_record_change_logs(domain, provider_id, log_id)
+    desired = state_before_logs(current, logs)
+    return diff_records(current, desired), current
+
+
+def plan_rollback_to_snapshot(provider: DNSProviderBase, domain: str, provider_id: Optional[int],
+                              snapshot_id: int) -> Tuple[List[RecordChange], List[DNSRecord]]:
+    """
+    计算回滚到指定快照的变更集，返回 (变更集, 当前记录)；
+    快照不存在或不属于该域名（及提供商）时抛出 KeyError
+    """
+    snapshot = snapshots.get(snapshot_id)
+    if (snapshot is None or snapshot.domain != domain
+            or (provider_id is not None and snapshot.provider_id is not None
+                and snapshot.provider_id != provider_id)):
+        raise KeyError(f'{domain} 中没有该快照: {snapshot_id}')
+    
+    current = provider.get_records(domain)
+    desired = snapshots.records(snapshot_id)
+    return diff_records(current, desired), current
+
+
+def apply_rollback(provider: DNSProviderBase, domain: str, provider_id: Optional[int],
+                   changes: List[RecordChange], max_workers: int = 4
+                   ) -> Tuple[List[RecordChange], List[Tuple[RecordChange, str]]]:
+    """分批提交回滚变更并记录日志（回滚本身也可以再被回滚）"""
+    applied, failed = apply_changes(provider, domain, changes, max_workers=max_workers)
+    log_changes(domain, provider_id, applied, failed, '回滚')
+    return applied, failed
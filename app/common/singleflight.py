@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+进行中请求去重（single-flight）
+记录界面、域名列表的记录数和全量同步等可能同时读取同一域名的记录，
+相同键的并发调用只执行一次，后到的调用等待并共享第一次调用的结果（或异常）。
+调用结束后键立即移除，之后的调用重新执行，不缓存结果。
+执行中的调用被发起者取消（OperationCancelled）时，未取消的等待者重新发起调用。
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from ..dns.base import DNSProviderBase, DNSRecord, CancelToken, OperationCancelled
+
+
+class _Call:
+    """一次进行中的调用"""
+    
+    __slots__ = ('done', 'result', 'error', 'waiters')
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """按键合并并发调用"""
+    
+    # 等待者检查自身取消标记的间隔（秒）
+    POLL_INTERVAL = 0.1
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+    
+    def do(self, key: Hashable, func: Callable[[], Any],
+           cancel_token: Optional[CancelToken] = None) -> Tuple[Any, bool]:
+        """
+        执行 func 或等待相同键的进行中调用，返回 (结果, 是否与其他调用共享)；
+        等待期间 cancel_token 被取消时抛出 OperationCancelled，不影响进行中的调用
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                else:
+                    call.waiters += 1
+            
+            if leader:
+                break
+            if cancel_token is None:
+                call.done.wait()
+            else:
+                while not call.done.wait(self.POLL_INTERVAL):
+                    cancel_token.check()
+            if isinstance(call.error, OperationCancelled) and not (cancel_token and cancel_token.cancelled):
+                # 发起者已取消而本调用仍需要结果，重新发起
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+        return call.result, call.waiters > 0
+    
+    def forget(self, match: Callable[[Hashable], bool]):
+        """
+        让匹配的键的下一次调用重新执行，而不是加入进行中的调用（如记录修改后刷新），
+        已在等待的调用仍得到进行中调用的结果
+        """
+        with self._lock:
+            for key in [key for key in self._calls if match(key)]:
+                del self._calls[key]
+    
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+# 记录读取的全局去重实例，键为 (提供商ID, 域名, 查询条件)
+record_flights = SingleFlight()
+
+
+def fetch_records(provider: DNSProviderBase, provider_id: Optional[int], domain: str,
+                  name: Optional[str] = None, type: Optional[str] = None, value: Optional[str] = None,
+                  on_page: Optional[Callable[[List[DNSRecord], Optional[int]], None]] = None) -> List[DNSRecord]:
+    """
+    读取域名记录（指定条件时为 query_records），同一提供商、域名和条件的并发调用共享一次请求；
+    共享的结果返回列表副本，记录对象本身由各调用方共享，不应修改。
+    指定 on_page 时按页回调 (本页记录, 记录总数或None)，各页依次拼接即为返回的列表；
+    加入其他调用的请求或按条件查询时，完成后以全部记录回调一次。
+    提供商设置了 cancel_token 时，取消后在下一页请求前（或等待其他调用期间）抛出 OperationCancelled
+    """
+    query = (name, type.upper() if type else type, value)
+    key = (provider_id, domain.rstrip('.').lower(), query)
+    paged = on_page is not None and query == (None, None, None)
+    
+    def fetch():
+        if paged:
+            records = []
+            for page, total in provider.iter_record_pages(domain):
+                records.extend(page)
+                on_page(page, total)
+            return records
+        if query == (None, None, None):
+            return provider.get_records(domain)
+        return provider.query_records(domain, name, type, value)
+    
+    records, shared = record_flights.do(key, fetch, provider.cancel_token)
+    if shared:
+        records = list(records)
+    if on_page is not None and (shared or not paged) and records:
+        on_page(records, len(records))
+    return records
+
+
+def forget_records(provider_id: Optional[int], domain: str):
+    """域名记录已修改：之后的读取不再加入修改前开始的请求"""
+    domain = domain.rstrip('.').lower()
+    record_flights.forget(lambda key: key[0] == provider_id and key[1] == domain)
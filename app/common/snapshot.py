@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+区域快照历史
+每次从提供商获取到域名的完整记录集时保存一个快照，用于查看历史、对比和回滚
+
+记录内容（名称/类型/值/TTL/优先级）按哈希去重保存在 record_blobs 表中，多个快照共享未变化的记录；
+快照只保存相对上一快照的增减（每隔 FULL_SNAPSHOT_INTERVAL 个或变化超过一半时保存完整内容），
+因此存储量随变化量增长，而不是区域大小乘以快照数量。内容未变化时不会产生新快照。
+"""
+
+import time
+import hashlib
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+from .database import db
+from ..dns.base import DNSRecord
+from ..dns.changeset import normalize_name, normalize_value
+
+
+# 增量快照链的最大长度，超过后保存完整快照
+FULL_SNAPSHOT_INTERVAL = 16
+
+
+def record_content(record: DNSRecord) -> Tuple[str, str, str, int, int]:
+    """记录内容（不含提供商记录ID）"""
+    return record.name, record.type.upper(), record.value, int(record.ttl), int(record.priority)
+
+
+def record_hash(record: DNSRecord) -> str:
+    """记录内容哈希，名称和主机名类型的值不区分大小写及末尾的点"""
+    record_type = record.type.upper()
+    key = '\0'.join((normalize_name(record.name), record_type, normalize_value(record_type, record.value),
+                     str(int(record.ttl)), str(int(record.priority))))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def counts_digest(counts: Dict[str, int]) -> str:
+    """记录集摘要，与记录顺序无关"""
+    digest = hashlib.sha1()
+    for h in sorted(counts):
+        digest.update(f'{h}:{counts[h]};'.encode('ascii'))
+    return digest.hexdigest()
+
+
+@dataclass
+class ZoneSnapshot:
+    """快照信息"""
+    id: int
+    domain: str
+    provider_id: Optional[int]
+    record_count: int
+    digest: str
+    created_at: float
+    label: str = ''
+    parent_id: Optional[int] = None
+    is_full: bool = True
+    
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> 'ZoneSnapshot':
+        return cls(
+            id=row['id'],
+            domain=row['domain'],
+            provider_id=row['provider_id'],
+            record_count=row['record_count'],
+            digest=row['digest'],
+            created_at=row['created_at'],
+            label=row['label'] or '',
+            parent_id=row['parent_id'],
+            is_full=bool(row['is_full'])
+        )
+
+
+@dataclass
+class SnapshotDiff:
+    """两个快照之间的差异"""
+    old_id: int
+    new_id: int
+    added: List[DNSRecord] = field(default_factory=list)
+    removed: List[DNSRecord] = field(default_factory=list)
+    
+    @property
+    def empty(self) -> bool:
+        return not self.added and not self.removed
+
+
+class SnapshotStore:
+    """内容寻址的快照存储"""
+    
+    def __init__(self, database=None):
+        self.db = database if database is not None else db
+        # 同一时间只允许一个写入，保证上一快照的判断不会交错
+        self._lock = threading.Lock()
+    
+    def take(self, domain: str, records: Iterable[DNSRecord], provider_id: Optional[int] = None,
+             label: str = '') -> ZoneSnapshot:
+        """保存记录集快照，内容与最近一个快照相同时直接返回该快照"""
+        counts: Counter = Counter()
+        blobs: Dict[str, Tuple] = {}
+        for record in records:
+            h = record_hash(record)
+            counts[h] += 1
+            if h not in blobs:
+                blobs[h] = record_content(record)
+        digest = counts_digest(counts)
+        
+        with self._lock:
+            latest = self.db.get_zone_snapshots(domain, provider_id, limit=1)
+            if latest and latest[0]['digest'] == digest:
+                return ZoneSnapshot.from_row(latest[0])
+            
+            parent_id = None
+            entries: Dict[str, int] = dict(counts)
+            full = True
+            if latest:
+                parent_id = latest[0]['id']
+                chain = self.chain(parent_id)
+                parent_counts = self.sum_entries(chain)
+                delta = {h: counts.get(h, 0) - parent_counts.get(h, 0)
+                         for h in set(counts) | set(parent_counts)}
+                delta = {h: d for h, d in delta.items() if d}
+                if len(chain) < FULL_SNAPSHOT_INTERVAL and len(delta) * 2 < len(counts):
+                    entries = delta
+                    full = False
+            
+            snapshot_id = self.db.add_zone_snapshot(
+                domain, provider_id, parent_id, full, digest, sum(counts.values()), label,
+                {h: blobs[h] for h in entries if h in blobs}, entries, time.time()
+            )
+            return ZoneSnapshot.from_row(self.db.get_zone_snapshot(snapshot_id))
+    
+    def history(self, domain: str, provider_id: Optional[int] = None,
+                limit: Optional[int] = None) -> List[ZoneSnapshot]:
+        """域名的快照列表（新的在前）"""
+        return [ZoneSnapshot.from_row(row) for row in self.db.get_zone_snapshots(domain, provider_id, limit)]
+    
+    def get(self, snapshot_id: int) -> Optional[ZoneSnapshot]:
+        row = self.db.get_zone_snapshot(snapshot_id)
+        return ZoneSnapshot.from_row(row) if row else None
+    
+    def chain(self, snapshot_id: int) -> List[int]:
+        """从快照回溯到最近的完整快照，返回经过的快照ID"""
+        chain = []
+        current = self.db.get_zone_snapshot(snapshot_id)
+        if current is None:
+            raise KeyError(f'快照不存在: {snapshot_id}')
+        while current is not None:
+            chain.append(current['id'])
+            if current['is_full'] or current['parent_id'] is None:
+                break
+            current = self.db.get_zone_snapshot(current['parent_id'])
+        return chain
+    
+    def sum_entries(self, chain: List[int]) -> Counter:
+        """累加快照链上的增减，得到记录内容哈希 -> 数量"""
+        counts: Counter = Counter()
+        for _, h, delta in self.db.get_snapshot_entries(chain):
+            counts[h] += delta
+        return Counter({h: n for h, n in counts.items() if n > 0})
+    
+    def counts(self, snapshot_id: int) -> Counter:
+        """快照的记录内容哈希 -> 数量"""
+        return self.sum_entries(self.chain(snapshot_id))
+    
+    def build_records(self, counts: Dict[str, int]) -> List[DNSRecord]:
+        """按内容哈希还原记录（快照中不保存提供商记录ID）"""
+        blobs = self.db.get_record_blobs(list(counts))
+        records = []
+        for h, n in counts.items():
+            blob = blobs[h]
+            records.extend(
+                DNSRecord(id='', name=blob['name'], type=blob['type'], value=blob['value'],
+                          ttl=blob['ttl'], priority=blob['priority'])
+                for _ in range(n)
+            )
+        records.sort(key=lambda r: (r.name, r.type, r.value))
+        return records
+    
+    def records(self, snapshot_id: int) -> List[DNSRecord]:
+        """还原快照的完整记录集"""
+        return self.build_records(self.counts(snapshot_id))
+    
+    def diff(self, old_id: int, new_id: int) -> SnapshotDiff:
+        """对比两个快照，只读取有差异的记录内容"""
+        old = self.counts(old_id)
+        new = self.counts(new_id)
+        return SnapshotDiff(
+            old_id=old_id,
+            new_id=new_id,
+            added=self.build_records(new - old),
+            removed=self.build_records(old - new)
+        )
+
+
+# 全局快照存储实例
+snapshots = SnapshotStore()
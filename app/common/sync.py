@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+全量同步任务
+并发遍历所有已启用的DNS提供商，同步域名列表并获取每个域名的记录，
+按提供商限制并发数，记录批量写入SQLite
+"""
+
+import time
+import threading
+from dataclasses import dataclass, field, replace
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Callable
+
+from .database import db
+from .snapshot import snapshots
+from .singleflight import fetch_records
+from ..dns.base import DNSProviderFactory, CancelToken, OperationCancelled
+
+
+@dataclass
+class SyncStats:
+    """同步进度与吞吐统计"""
+    providers: int = 0
+    zones_total: int = 0
+    zones_done: int = 0
+    records: int = 0
+    domains_added: int = 0
+    errors: List[str] = field(default_factory=list)
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    cancelled: bool = False
+    
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at or time.monotonic()
+        return max(end - self.started_at, 1e-6) if self.started_at else 0.0
+    
+    @property
+    def zones_per_sec(self) -> float:
+        return self.zones_done / self.elapsed if self.elapsed else 0.0
+    
+    @property
+    def records_per_sec(self) -> float:
+        return self.records / self.elapsed if self.elapsed else 0.0
+    
+    @property
+    def finished(self) -> bool:
+        return bool(self.finished_at)
+    
+    def snapshot(self) -> 'SyncStats':
+        """复制当前统计，供其他线程读取"""
+        return replace(self, errors=list(self.errors))
+
+
+class SyncJob:
+    """全量同步任务"""
+    
+    def __init__(self, providers: Optional[List[Dict[str, Any]]] = None, sync_records: bool = True,
+                 max_workers: int = 8, per_provider_limit: int = 4,
+                 batch_size: int = 20, batch_records: int = 5000, take_snapshots: bool = True):
+        self.providers = providers
+        self.sync_records = sync_records
+        self.max_workers = max_workers
+        self.per_provider_limit = per_provider_limit
+        self.batch_size = batch_size
+        self.batch_records = batch_records
+        self.take_snapshots = take_snapshots
+        self.stats = SyncStats()
+        self.cancel_token = CancelToken()
+    
+    def cancel(self):
+        """请求取消，正在进行的请求完成后停止（分页读取在下一页之前停止）"""
+        self.cancel_token.cancel()
+    
+    def is_cancelled(self) -> bool:
+        return self.cancel_token.cancelled
+    
+    def run(self, progress: Optional[Callable[[SyncStats], None]] = None) -> SyncStats:
+        """执行同步，progress在每个域名完成后以统计快照回调（在调用线程中）"""
+        stats = self.stats
+        stats.started_at = time.monotonic()
+        
+        def report():
+            if progress:
+                progress(stats.snapshot())
+        
+        providers = self.providers if self.providers is not None else db.get_dns_providers()
+        stats.providers = len(providers)
+        instances = {}
+        for provider_data in providers:
+            try:
+                instances[provider_data['id']] = DNSProviderFactory.create_from_data(provider_data)
+                instances[provider_data['id']].cancel_token = self.cancel_token
+            except Exception as e:
+                stats.errors.append(f'[{provider_data["name"]}] 创建提供商失败: {e}')
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # 第一阶段：并发获取各提供商的域名列表
+            futures = {
+                executor.submit(instances[p['id']].get_domains): p
+                for p in providers if p['id'] in instances
+            }
+            for future in as_completed(futures):
+                provider_data = futures[future]
+                try:
+                    self.add_missing_domains(provider_data, future.result())
+                except OperationCancelled:
+                    instances.pop(provider_data['id'], None)
+                except Exception as e:
+                    stats.errors.append(f'[{provider_data["name"]}] 获取域名列表失败: {e}')
+                    instances.pop(provider_data['id'], None)
+            
+            if self.sync_records and not self.is_cancelled():
+                self.sync_all_records(executor, providers, instances, report)
+        
+        stats.cancelled = self.is_cancelled()
+        stats.finished_at = time.monotonic()
+        report()
+        return stats
+    
+    def add_missing_domains(self, provider_data: Dict[str, Any], remote_domains: List[str]):
+        """把远程新增的域名写入本地数据库"""
+        existing = {d['domain'] for d in db.get_domains(provider_data['id'])}
+        added = [d for d in remote_domains if d not in existing]
+        for domain in added:
+            db.add_domain(domain, provider_data['id'])
+        if added:
+            db.add_operation_log('sync', 'domain', provider_data['id'],
+                                 f'全量同步域名: {provider_data["name"]} 新增 {len(added)} 个')
+        self.stats.domains_added += len(added)
+    
+    def sync_all_records(self, executor: ThreadPoolExecutor, providers: List[Dict[str, Any]],
+                         instances: Dict[int, Any], report: Callable[[], None]):
+        """第二阶段：按提供商限流并发获取所有域名的记录，分批写入数据库"""
+        stats = self.stats
+        limits = {pid: threading.Semaphore(self.per_provider_limit) for pid in instances}
+        
+        def fetch(provider_id, domain):
+            with limits[provider_id]:
+                if self.is_cancelled():
+                    return None
+                return fetch_records(instances[provider_id], provider_id, domain)
+        
+        futures = {}
+        for provider_data in providers:
+            if provider_data['id'] not in instances:
+                continue
+            for domain in db.get_domains(provider_data['id']):
+                future = executor.submit(fetch, provider_data['id'], domain['domain'])
+                futures[future] = (provider_data, domain)
+        stats.zones_total = len(futures)
+        report()
+        
+        batch: Dict[int, List[Dict[str, Any]]] = {}
+        batch_count = 0
+        for future in as_completed(futures):
+            provider_data, domain = futures[future]
+            try:
+                records = future.result()
+            except OperationCancelled:
+                records = None
+            except Exception as e:
+                stats.errors.append(f'[{provider_data["name"]}] {domain["domain"]} 获取记录失败: {e}')
+                records = None
+            
+            if records is not None:
+                batch[domain['id']] = [r.to_dict() for r in records]
+                batch_count += len(records)
+                stats.records += len(records)
+                if self.take_snapshots:
+                    try:
+                        snapshots.take(domain['domain'], records, provider_data['id'], 'sync')
+                    except Exception as e:
+                        stats.errors.append(f'[{provider_data["name"]}] {domain["domain"]} 保存快照失败: {e}')
+            stats.zones_done += 1
+            
+            if len(batch) >= self.batch_size or batch_count >= self.batch_records:
+                db.replace_dns_records_batch(batch)
+                batch = {}
+                batch_count = 0
+            report()
+        
+        db.replace_dns_records_batch(batch)
@@ -10,13 +10,16 @@ import base64
 import urllib.parse
 import requests
 from datetime import datetime
-from typing import List, Dict, Any
-from .base import DNSProviderBase, DNSRecord, DNSProviderFactory
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from .base import DNSProviderBase, DNSRecord, DNSProviderFactory, filter_records
+from .metrics import metrics
 
 
 class AliyunDNSProvider(DNSProviderBase):
     """阿里云DNS提供商"""
     
+    min_ttl = 600
+    
     def __init__(self, config: Dict[str, Any]):
         self.access_key_id = config.get('access_key_id', '')
         self.access_key_secret = config.get('access_key_secret', '')
@@ -62,6 +65,7 @@ class AliyunDNSProvider(DNSProviderBase):
         params['Signature'] = signature
         return '&'.join([f"{k}={urllib.parse.quote(str(v))}" for k, v in sorted(params.items())])
     
+    @metrics.instrument(lambda action, params=None: action)
     def _make_request(self, action: str, params: Dict[str, str] = None) -> Dict[str, Any]:
         """发起API请求"""
         if params is None:
@@ -72,6 +76,7 @@ class AliyunDNSProvider(DNSProviderBase):
         url = f"{self.endpoint}/?{query_string}"
         
         response = requests.get(url, timeout=30)
+        metrics.note_response(response)
         response.raise_for_status()
         
         result = response.json()
@@ -87,6 +92,7 @@ class AliyunDNSProvider(DNSProviderBase):
         page_size = 20
         
         while True:
+            self.check_cancelled()
             result = self._make_request('DescribeDomains', {
                 'PageNumber': str(page_number),
                 'PageSize': str(page_size)
@@ -105,15 +111,26 @@ class AliyunDNSProvider(DNSProviderBase):
         
         return domains
     
-    def get_records(self, domain: str) -> List[DNSRecord]:
-        """获取DNS记录"""
-        records = []
+    def _parse_record(self, record: Dict[str, Any]) -> DNSRecord:
+        return DNSRecord(
+            id=record['RecordId'],
+            name=record['RR'],
+            type=record['Type'],
+            value=record['Value'],
+            ttl=int(record['TTL']),
+            priority=int(record.get('Priority', 0)),
+            enabled=record['Status'] == 'ENABLE'
+        )
+    
+    def _iter_pages(self, action: str, params: Dict[str, str]) -> Iterator[Tuple[List[DNSRecord], Optional[int]]]:
+        """分页读取 DescribeDomainRecords / DescribeSubDomainRecords 的结果，逐页产出 (记录, TotalCount)"""
         page_number = 1
         page_size = 20
         
         while True:
-            result = self._make_request('DescribeDomainRecords', {
-                'DomainName': domain,
+            self.check_cancelled()
+            result = self._make_request(action, {
+                **params,
                 'PageNumber': str(page_number),
                 'PageSize': str(page_size)
             })
@@ -122,24 +139,57 @@ class AliyunDNSProvider(DNSProviderBase):
             if not record_list:
                 break
             
-            for record in record_list:
-                dns_record = DNSRecord(
-                    id=record['RecordId'],
-                    name=record['RR'],
-                    type=record['Type'],
-                    value=record['Value'],
-                    ttl=int(record['TTL']),
-                    priority=int(record.get('Priority', 0)),
-                    enabled=record['Status'] == 'ENABLE'
-                )
-                records.append(dns_record)
+            yield [self._parse_record(record) for record in record_list], result.get('TotalCount')
             
             if len(record_list) < page_size:
                 break
             
             page_number += 1
-        
-        return records
+    
+    def _list_records(self, action: str, params: Dict[str, str]) -> List[DNSRecord]:
+        """读取所有页的记录"""
+        return [record for page, _ in self._iter_pages(action, params) for record in page]
+    
+    def get_records(self, domain: str) -> List[DNSRecord]:
+        """获取DNS记录"""
+        return self._list_records('DescribeDomainRecords', {'DomainName': domain})
+    
+    def iter_record_pages(self, domain: str) -> Iterator[Tuple[List[DNSRecord], Optional[int]]]:
+        """逐页获取DNS记录"""
+        return self._iter_pages('DescribeDomainRecords', {'DomainName': domain})
+    
+    def query_records(self, domain: str, name: Optional[str] = None, type: Optional[str] = None,
+                      value: Optional[str] = None) -> List[DNSRecord]:
+        """
+        服务端筛选：指定主机记录时使用 DescribeSubDomainRecords 精确查询子域名，
+        否则使用 DescribeDomainRecords 的高级搜索（TypeKeyWord/ValueKeyWord，值为模糊匹配），结果再精确筛选
+        """
+        if name is not None:
+            rr = name.strip().rstrip('.')
+            params = {
+                'DomainName': domain,
+                'SubDomain': domain if rr in ('', '@') else f'{rr}.{domain}'
+            }
+            if type:
+                params['Type'] = type.upper()
+            records = self._list_records('DescribeSubDomainRecords', params)
+        else:
+            params = {'DomainName': domain, 'SearchMode': 'ADVANCED'}
+            if type:
+                params['TypeKeyWord'] = type.upper()
+            if value:
+                params['ValueKeyWord'] = value
+            records = self._list_records('DescribeDomainRecords', params)
+        return filter_records(records, name, type, value)
+    
+    def get_zone_signature(self, domain: str) -> Optional[str]:
+        """只读取一条记录，以记录总数作为变化标识"""
+        result = self._make_request('DescribeDomainRecords', {
+            'DomainName': domain,
+            'PageNumber': '1',
+            'PageSize': '1'
+        })
+        return f"count:{result.get('TotalCount', 0)}"
     
     def add_record(self, domain: str, record: DNSRecord) -> str:
         """添加DNS记录"""
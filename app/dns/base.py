@@ -4,21 +4,40 @@ DNS提供商基类
 定义统一的DNS操作接口
 """
 
+import sys
+import json
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
+from dataclasses import dataclass, fields
 
 
-@dataclass
-class DNSRecord:
-    """DNS记录数据类"""
-    id: Optional[str] = None
-    name: str = ""
-    type: str = "A"
-    value: str = ""
-    ttl: int = 600
-    priority: int = 0
-    enabled: bool = True
+def slotted(cls):
+    """
+    为dataclass生成带__slots__的版本，去掉每个实例的__dict__以降低内存占用
+    （与Python 3.10+ 的 dataclass(slots=True) 等价，兼容更早的版本）
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    cls_dict['__slots__'] = field_names
+    for name in field_names:
+        cls_dict.pop(name, None)
+    cls_dict.pop('__dict__', None)
+    cls_dict.pop('__weakref__', None)
+    
+    new_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    new_cls.__qualname__ = cls.__qualname__
+    return new_cls
+
+
+class DNSRecordMixin:
+    """DNS记录公共方法"""
+    
+    __slots__ = ()
+    
+    def __post_init__(self):
+        # 记录类型只有少数几种取值，驻留后所有记录共享同一个字符串对象
+        object.__setattr__(self, 'type', sys.intern(self.type))
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -32,9 +51,103 @@ class DNSRecord:
         }
 
 
+@slotted
+@dataclass
+class DNSRecord(DNSRecordMixin):
+    """DNS记录数据类"""
+    id: Optional[str] = None
+    name: str = ""
+    type: str = "A"
+    value: str = ""
+    ttl: int = 600
+    priority: int = 0
+    enabled: bool = True
+    
+    def freeze(self) -> 'FrozenDNSRecord':
+        """转换为不可变、可哈希的记录"""
+        return FrozenDNSRecord(self.id, self.name, self.type, self.value,
+                               self.ttl, self.priority, self.enabled)
+
+
+@slotted
+@dataclass(frozen=True)
+class FrozenDNSRecord(DNSRecordMixin):
+    """不可变DNS记录，可作为字典键或放入集合"""
+    id: Optional[str] = None
+    name: str = ""
+    type: str = "A"
+    value: str = ""
+    ttl: int = 600
+    priority: int = 0
+    enabled: bool = True
+    
+    def thaw(self) -> DNSRecord:
+        """转换为可修改的记录"""
+        return DNSRecord(self.id, self.name, self.type, self.value,
+                         self.ttl, self.priority, self.enabled)
+
+
+def filter_records(records: List[DNSRecord], name: Optional[str] = None, type: Optional[str] = None,
+                   value: Optional[str] = None) -> List[DNSRecord]:
+    """
+    按主机记录、类型和值精确筛选记录（None表示不限），
+    主机记录与类型不区分大小写，根域名的 '' 与 '@' 视为相同
+    """
+    if name is not None:
+        name = name.strip().rstrip('.').lower() or '@'
+    if type is not None:
+        type = type.upper()
+    if value is not None:
+        value = value.strip()
+    return [
+        record for record in records
+        if (name is None or (record.name or '@').lower() == name)
+        and (type is None or record.type.upper() == type)
+        and (value is None or record.value.strip() == value)
+    ]
+
+
+class OperationCancelled(Exception):
+    """操作已被取消"""
+    pass
+
+
+class CancelToken:
+    """
+    协作式取消标记：发起方调用 cancel()，执行方在每页请求前等安全点调用 check()，
+    不会中断进行中的请求或数据库写入
+    """
+    
+    def __init__(self):
+        self._event = threading.Event()
+    
+    def cancel(self):
+        self._event.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+    
+    def check(self):
+        """已取消时抛出 OperationCancelled"""
+        if self.cancelled:
+            raise OperationCancelled("操作已取消")
+
+
 class DNSProviderBase(ABC):
     """DNS提供商基类"""
     
+    provider_type = ''  # 注册时由工厂设置
+    # 服务商允许的TTL范围（以免费套餐为准），跨服务商迁移时据此调整
+    min_ttl = 1
+    max_ttl = 86400
+    # 一次新增的记录数不少于该值时，apply_changes 改用 import_records 批量导入，0表示不支持
+    bulk_import_threshold = 0
+    # apply_changes 每次通过 submit_batch 合并提交的变更数，0表示逐条调用增删改接口
+    update_batch_size = 0
+    # 调用方设置后，分页读取和逐条提交在每次请求前检查，已取消时抛出 OperationCancelled
+    cancel_token: Optional[CancelToken] = None
+    
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.name = config.get('name', '')
@@ -55,6 +168,14 @@ class DNSProviderBase(ABC):
         """获取域名的DNS记录"""
         pass
     
+    def iter_record_pages(self, domain: str) -> Iterator[Tuple[List[DNSRecord], Optional[int]]]:
+        """
+        逐页读取域名的DNS记录，每读取一页产出 (本页记录, 记录总数)，总数未知时为None；
+        所有页拼接后与 get_records 相同。默认一次产出 get_records 的全部结果，分页读取的提供商应覆盖此方法
+        """
+        records = self.get_records(domain)
+        yield records, len(records)
+    
     @abstractmethod
     def add_record(self, domain: str, record: DNSRecord) -> str:
         """添加DNS记录，返回记录ID"""
@@ -75,6 +196,44 @@ class DNSProviderBase(ABC):
         """获取支持的记录类型"""
         pass
     
+    def query_records(self, domain: str, name: Optional[str] = None, type: Optional[str] = None,
+                      value: Optional[str] = None) -> List[DNSRecord]:
+        """
+        按主机记录（@表示根域名）、类型和值查询记录，均为精确匹配，None表示不限；
+        基类读取整个域名后在本地筛选，支持服务端筛选的提供商应覆盖此方法，只请求匹配的记录
+        """
+        return filter_records(self.get_records(domain), name, type, value)
+    
+    def export_records(self, domain: str) -> Iterable[DNSRecord]:
+        """
+        读取整个域名的记录内容，用于导出、快照和迁移源等不修改记录的场景，结果可能不含记录ID；
+        默认等同于 get_records，支持整区导出的提供商可覆盖为单次请求
+        """
+        return self.get_records(domain)
+    
+    def import_records(self, domain: str, records: List[DNSRecord]) -> List[Tuple[DNSRecord, str]]:
+        """批量新增记录，返回 [(未能新增的记录, 原因)]；bulk_import_threshold 大于0的提供商需要实现"""
+        raise NotImplementedError(f"{self.provider_type} 不支持批量导入记录")
+    
+    def submit_batch(self, domain: str, changes: list):
+        """
+        把一批变更（RecordChange列表）作为一个请求提交，要么全部成功要么抛出异常；
+        新增的记录需要回填记录ID。update_batch_size 大于0的提供商需要实现
+        """
+        raise NotImplementedError(f"{self.provider_type} 不支持批量提交变更")
+    
+    def get_zone_signature(self, domain: str) -> Optional[str]:
+        """
+        获取域名记录集的轻量变化标识（如记录总数、区域修改时间），用于漂移检测时判断是否需要完整读取；
+        标识不同说明记录已变化，相同则大概率未变化。不支持时返回None，调用方应直接完整读取
+        """
+        return None
+    
+    def check_cancelled(self):
+        """在每次请求前调用：cancel_token 已取消时抛出 OperationCancelled"""
+        if self.cancel_token is not None:
+            self.cancel_token.check()
+    
     def test_connection(self) -> bool:
         """测试连接"""
         try:
@@ -93,6 +252,7 @@ class DNSProviderFactory:
     @classmethod
     def register(cls, provider_type: str, provider_class):
         """注册DNS提供商"""
+        provider_class.provider_type = provider_type
         cls._providers[provider_type] = provider_class
     
     @classmethod
@@ -104,6 +264,16 @@ class DNSProviderFactory:
         provider_class = cls._providers[provider_type]
         return provider_class(config)
     
+    @classmethod
+    def create_from_data(cls, provider_data: Dict[str, Any]) -> DNSProviderBase:
+        """根据数据库中的提供商记录（config为JSON字符串）创建实例"""
+        from . import aliyun, tencent, cloudflare, simulated, rfc2136  # 导入所有提供商实现
+        
+        config = json.loads(provider_data['config'])
+        provider = cls.create(provider_data['type'], config)
+        provider.name = provider.name or provider_data.get('name', '')
+        return provider
+    
     @classmethod
     def get_supported_types(cls) -> List[str]:
         """获取支持的提供商类型"""
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+DNS记录变更集
+对比当前记录与目标记录，生成最小变更列表并通过提供商接口提交
+"""
+
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Iterable, Optional, Callable
+
+from .base import DNSProviderBase, DNSRecord
+
+
+# 记录值为主机名的类型，比较时忽略大小写和末尾的点
+HOSTNAME_TYPES = {'CNAME', 'NS', 'MX', 'PTR', 'DNAME'}
+
+
+@dataclass
+class RecordChange:
+    """单条记录变更"""
+    action: str  # create / update / delete
+    record: DNSRecord  # 目标记录；delete 时为要删除的现有记录
+    old: Optional[DNSRecord] = None  # update 时为变更前的记录
+    
+    def describe(self, domain: str = '') -> str:
+        """变更描述"""
+        name = self.record.name if self.record.name else '@'
+        fqdn = f'{name}.{domain}' if domain else name
+        if self.action == 'update' and self.old is not None:
+            return f'update {fqdn} {self.record.type} {self.old.value} -> {self.record.value}'
+        return f'{self.action} {fqdn} {self.record.type} {self.record.value}'
+
+
+def normalize_name(name: str) -> str:
+    """统一记录名称（根域名统一为@，忽略大小写）"""
+    name = (name or '').strip().rstrip('.').lower()
+    return name or '@'
+
+
+def normalize_value(record_type: str, value: str, unquote_txt: bool = False) -> str:
+    """
+    统一记录值，便于比较；unquote_txt 为True时去掉TXT记录整体包裹的一对引号
+    （各服务商对TXT值是否带引号不一致，跨服务商迁移时使用）
+    """
+    value = (value or '').strip()
+    record_type = record_type.upper()
+    if record_type in HOSTNAME_TYPES:
+        return value.rstrip('.').lower()
+    if unquote_txt and record_type == 'TXT' and value.count('"') == 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def record_key(record: DNSRecord) -> Tuple[str, str]:
+    """记录分组键：名称 + 类型"""
+    return normalize_name(record.name), record.type.upper()
+
+
+def record_content(record: DNSRecord) -> Tuple[str, int, int]:
+    """记录内容键：值 + TTL + 优先级"""
+    return normalize_value(record.type, record.value), int(record.ttl), int(record.priority)
+
+
+def diff_records(current: Iterable[DNSRecord], desired: Iterable[DNSRecord],
+                 delete_missing: bool = True,
+                 ignore: Optional[Callable[[DNSRecord], bool]] = None) -> List[RecordChange]:
+    """
+    计算把 current 变为 desired 所需的最小变更
+    
+    desired 可以是生成器：完全一致的记录在迭代时即被消化，
+    只有发生变化的目标记录会暂存，内存占用与变更量而不是区域大小成正比。
+    同一名称和类型下，值相同的记录优先配对为更新，其余按顺序配对，
+    多出的目标记录新增，多出的现有记录删除。
+    """
+    # 按名称和类型索引现有记录
+    index: Dict[Tuple[str, str], List[DNSRecord]] = {}
+    for record in current:
+        if ignore and ignore(record):
+            continue
+        index.setdefault(record_key(record), []).append(record)
+    
+    pending: Dict[Tuple[str, str], List[DNSRecord]] = {}
+    for record in desired:
+        if ignore and ignore(record):
+            continue
+        key = record_key(record)
+        content = record_content(record)
+        candidates = index.get(key, [])
+        for i, existing in enumerate(candidates):
+            if record_content(existing) == content:
+                del candidates[i]
+                break
+        else:
+            pending.setdefault(key, []).append(record)
+    
+    changes: List[RecordChange] = []
+    for key, records in pending.items():
+        candidates = index.get(key, [])
+        for record in records:
+            # 优先复用值相同（仅TTL或优先级不同）的记录
+            value = normalize_value(record.type, record.value)
+            match = next((i for i, existing in enumerate(candidates)
+                          if normalize_value(existing.type, existing.value) == value), None)
+            if match is None and candidates:
+                match = 0
+            if match is None:
+                changes.append(RecordChange('create', record))
+                continue
+            
+            existing = candidates.pop(match)
+            updated = DNSRecord(
+                id=existing.id,
+                name=existing.name,
+                type=record.type,
+                value=record.value,
+                ttl=record.ttl,
+                priority=record.priority,
+                enabled=record.enabled
+            )
+            changes.append(RecordChange('update', updated, existing))
+    
+    if delete_missing:
+        for records in index.values():
+            for record in records:
+                changes.append(RecordChange('delete', record))
+    
+    return changes
+
+
+def apply_change(provider: DNSProviderBase, domain: str, change: RecordChange) -> RecordChange:
+    """通过提供商接口提交单条变更，新增记录会回填远程记录ID；已取消时抛出 OperationCancelled"""
+    provider.check_cancelled()
+    if change.action == 'create':
+        change.record.id = provider.add_record(domain, change.record)
+    elif change.action == 'update':
+        provider.update_record(domain, change.record)
+    elif change.action == 'delete':
+        provider.delete_record(domain, change.record.id)
+    else:
+        raise ValueError(f'不支持的变更类型: {change.action}')
+    return change
+
+
+def import_changes(provider: DNSProviderBase, domain: str, batch: List[RecordChange],
+                   applied: List[RecordChange], failed: List[Tuple[RecordChange, str]]):
+    """
+    通过提供商的批量导入接口提交一批新增；导入接口不返回记录ID，
+    导入后重新读取区域，按名称、类型和内容为新增的记录回填ID（读取失败时ID保持为空）
+    """
+    try:
+        provider.check_cancelled()
+        rejected = provider.import_records(domain, [change.record for change in batch])
+    except Exception as e:
+        failed.extend((change, str(e)) for change in batch)
+        return
+    
+    reasons = {id(record): reason for record, reason in rejected}
+    imported = []
+    for change in batch:
+        if id(change.record) in reasons:
+            failed.append((change, reasons[id(change.record)]))
+        else:
+            imported.append(change)
+    applied.extend(imported)
+    if imported:
+        fill_record_ids(provider, domain, [change.record for change in imported])
+
+
+def fill_record_ids(provider: DNSProviderBase, domain: str, records: List[DNSRecord]):
+    """读取域名记录，为没有ID的记录按名称、类型和内容匹配远程记录回填ID，每条远程记录只匹配一次"""
+    try:
+        remote = provider.get_records(domain)
+    except Exception as e:
+        print(f"读取 {domain} 的记录以回填记录ID失败: {e}")
+        return
+    
+    known = {record.id for record in records if record.id}
+    available: Dict[Tuple, List[DNSRecord]] = {}
+    for record in remote:
+        if record.id and record.id not in known:
+            available.setdefault((record_key(record), record_content(record)), []).append(record)
+    for record in records:
+        if record.id:
+            continue
+        matches = available.get((record_key(record), record_content(record)))
+        if matches:
+            record.id = matches.pop(0).id
+
+
+def submit_changes(provider: DNSProviderBase, domain: str, batch: List[RecordChange],
+                   applied: List[RecordChange], failed: List[Tuple[RecordChange, str]]):
+    """按提供商的 update_batch_size 分组合并提交，某组整体失败时逐条重试以找出失败的变更"""
+    size = provider.update_batch_size
+    for start in range(0, len(batch), size):
+        group = batch[start:start + size]
+        try:
+            provider.check_cancelled()
+            provider.submit_batch(domain, group)
+        except Exception:
+            for change in group:
+                try:
+                    applied.append(apply_change(provider, domain, change))
+                except Exception as e:
+                    failed.append((change, str(e)))
+            continue
+        applied.extend(group)
+
+
+def apply_changes(provider: DNSProviderBase, domain: str, changes: List[RecordChange],
+                  stop_on_error: bool = False,
+                  max_workers: int = 1) -> Tuple[List[RecordChange], List[Tuple[RecordChange, str]]]:
+    """
+    提交变更，返回 (成功的变更, [(失败的变更, 错误信息)])
+    
+    按删除、更新、新增三个批次提交，避免CNAME等记录与待删除记录冲突；
+    max_workers 大于1时，同一批次内的请求并发执行；
+    新增数量达到提供商的 bulk_import_threshold 时，整批通过 import_records 一次提交；
+    提供商支持合并提交（update_batch_size 大于0）时，每个批次按组通过 submit_batch 提交；
+    提供商的 cancel_token 被取消后，尚未提交的变更以“操作已取消”计入失败。
+    """
+    order = ('delete', 'update', 'create')
+    applied = []
+    failed = []
+    
+    for action in order:
+        batch = [c for c in changes if c.action == action]
+        if not batch:
+            continue
+        
+        if (action == 'create' and provider.bulk_import_threshold
+                and len(batch) >= provider.bulk_import_threshold):
+            import_changes(provider, domain, batch, applied, failed)
+            continue
+        
+        if provider.update_batch_size > 0:
+            submit_changes(provider, domain, batch, applied, failed)
+            if failed and stop_on_error:
+                break
+            continue
+        
+        if max_workers <= 1:
+            for change in batch:
+                try:
+                    applied.append(apply_change(provider, domain, change))
+                except Exception as e:
+                    failed.append((change, str(e)))
+                    if stop_on_error:
+                        return applied, failed
+            continue
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batch))) as executor:
+            futures = [(change, executor.submit(apply_change, provider, domain, change)) for change in batch]
+            for change, future in futures:
+                try:
+                    applied.append(future.result())
+                except Exception as e:
+                    failed.append((change, str(e)))
+        
+        if failed and stop_on_error:
+            break
+    
+    # 不在批次中的未知变更类型
+    for change in changes:
+        if change.action not in order:
+            failed.append((change, f'不支持的变更类型: {change.action}'))
+    
+    return applied, failed
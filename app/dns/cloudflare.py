@@ -3,19 +3,38 @@
 CloudFlare DNS提供商实现
 """
 
+import io
+import re
 import requests
-from typing import List, Dict, Any
-from .base import DNSProviderBase, DNSRecord, DNSProviderFactory
+from collections import Counter
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from .base import DNSProviderBase, DNSRecord, DNSProviderFactory, filter_records
+from .changeset import record_key, record_content
+from .zonefile import ZoneFileParser, write_zone
+from .metrics import metrics
+
+
+def endpoint_label(endpoint: str) -> str:
+    """把接口路径中的区域ID和记录ID替换为占位符，用于统计分组"""
+    endpoint = re.sub(r'/zones/[0-9a-f]{32}', '/zones/{zone_id}', endpoint)
+    return re.sub(r'/dns_records/[0-9a-f]{32}', '/dns_records/{id}', endpoint)
 
 
 class CloudFlareDNSProvider(DNSProviderBase):
     """CloudFlare DNS提供商"""
     
+    min_ttl = 60  # 另外TTL为1表示自动
+    # 记录数不少于该值的区域整区读取时使用BIND导出接口，一次新增不少于该值时使用导入接口
+    export_threshold = 1000
+    bulk_import_threshold = 200
+    
     def __init__(self, config: Dict[str, Any]):
         self.api_token = config.get('api_token', '')
         self.email = config.get('email', '')
         self.api_key = config.get('api_key', '')
         self.base_url = 'https://api.cloudflare.com/client/v4'
+        self.export_threshold = int(config.get('export_threshold', self.export_threshold))
+        self.bulk_import_threshold = int(config.get('import_threshold', self.bulk_import_threshold))
         super().__init__(config)
     
     def validate_config(self) -> bool:
@@ -38,6 +57,7 @@ class CloudFlareDNSProvider(DNSProviderBase):
         
         return headers
     
+    @metrics.instrument(lambda method, endpoint, data=None: f'{method.upper()} {endpoint_label(endpoint)}')
     def _make_request(self, method: str, endpoint: str, data: Dict[str, Any] = None) -> Dict[str, Any]:
         """发起API请求"""
         url = f"{self.base_url}{endpoint}"
@@ -54,6 +74,7 @@ class CloudFlareDNSProvider(DNSProviderBase):
         else:
             raise ValueError(f"不支持的HTTP方法: {method}")
         
+        metrics.note_response(response)
         response.raise_for_status()
         result = response.json()
         
@@ -64,6 +85,19 @@ class CloudFlareDNSProvider(DNSProviderBase):
         
         return result
     
+    @metrics.instrument(lambda method, endpoint, **kwargs: f'{method.upper()} {endpoint_label(endpoint)}')
+    def _request_raw(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """发起响应不是JSON或需要上传文件的请求，GET请求以流的方式读取响应"""
+        url = f"{self.base_url}{endpoint}"
+        headers = self._get_headers()
+        del headers['Content-Type']  # 由requests按请求内容设置
+        
+        streamed = method.upper() == 'GET'
+        response = requests.request(method, url, headers=headers, stream=streamed, timeout=30, **kwargs)
+        metrics.note_response(response, streamed=streamed)
+        response.raise_for_status()
+        return response
+    
     def get_domains(self) -> List[str]:
         """获取域名列表"""
         domains = []
@@ -71,6 +105,7 @@ class CloudFlareDNSProvider(DNSProviderBase):
         per_page = 20
         
         while True:
+            self.check_cancelled()
             result = self._make_request('GET', '/zones', {
                 'page': page,
                 'per_page': per_page
@@ -101,15 +136,35 @@ class CloudFlareDNSProvider(DNSProviderBase):
         
         return zones[0]['id']
     
-    def get_records(self, domain: str) -> List[DNSRecord]:
-        """获取DNS记录"""
+    def _parse_record(self, record: Dict[str, Any], domain: str) -> DNSRecord:
+        # 处理记录名称
+        name = record['name']
+        if name == domain:
+            name = '@'
+        elif name.endswith(f'.{domain}'):
+            name = name[:-len(domain)-1]
+        
+        return DNSRecord(
+            id=record['id'],
+            name=name,
+            type=record['type'],
+            value=record['content'],
+            ttl=int(record['ttl']) if record['ttl'] != 1 else 1,  # CloudFlare自动TTL为1
+            priority=int(record.get('priority', 0)),
+            enabled=not record.get('proxied', False)  # CloudFlare的代理状态
+        )
+    
+    def _iter_pages(self, domain: str,
+                    params: Dict[str, Any] = None) -> Iterator[Tuple[List[DNSRecord], Optional[int]]]:
+        """分页读取域名的记录，逐页产出 (记录, total_count)，params 为附加的筛选参数"""
         zone_id = self._get_zone_id(domain)
-        records = []
         page = 1
         per_page = 20
         
         while True:
+            self.check_cancelled()
             result = self._make_request('GET', f'/zones/{zone_id}/dns_records', {
+                **(params or {}),
                 'page': page,
                 'per_page': per_page
             })
@@ -118,33 +173,107 @@ class CloudFlareDNSProvider(DNSProviderBase):
             if not record_list:
                 break
             
-            for record in record_list:
-                # 处理记录名称
-                name = record['name']
-                if name == domain:
-                    name = '@'
-                elif name.endswith(f'.{domain}'):
-                    name = name[:-len(domain)-1]
-                
-                dns_record = DNSRecord(
-                    id=record['id'],
-                    name=name,
-                    type=record['type'],
-                    value=record['content'],
-                    ttl=int(record['ttl']) if record['ttl'] != 1 else 1,  # CloudFlare自动TTL为1
-                    priority=int(record.get('priority', 0)),
-                    enabled=not record.get('proxied', False)  # CloudFlare的代理状态
-                )
-                records.append(dns_record)
+            result_info = result.get('result_info', {})
+            yield [self._parse_record(record, domain) for record in record_list], result_info.get('total_count')
             
             # 检查是否还有更多页面
-            result_info = result.get('result_info', {})
             if page >= result_info.get('total_pages', 1):
                 break
             
             page += 1
+    
+    def _list_records(self, domain: str, params: Dict[str, Any] = None) -> List[DNSRecord]:
+        """读取所有页的记录"""
+        return [record for page, _ in self._iter_pages(domain, params) for record in page]
+    
+    def get_records(self, domain: str) -> List[DNSRecord]:
+        """获取DNS记录"""
+        return self._list_records(domain)
+    
+    def iter_record_pages(self, domain: str) -> Iterator[Tuple[List[DNSRecord], Optional[int]]]:
+        """逐页获取DNS记录"""
+        return self._iter_pages(domain)
+    
+    def query_records(self, domain: str, name: Optional[str] = None, type: Optional[str] = None,
+                      value: Optional[str] = None) -> List[DNSRecord]:
+        """服务端筛选：name（完整域名）、type 和 content 均为精确匹配"""
+        params = {}
+        if name is not None:
+            rr = name.strip().rstrip('.')
+            params['name'] = domain if rr in ('', '@') else f'{rr}.{domain}'
+        if type:
+            params['type'] = type.upper()
+        if value:
+            params['content'] = value
+        return filter_records(self._list_records(domain, params), name, type, value)
+    
+    def export_records(self, domain: str) -> Iterator[DNSRecord]:
+        """
+        记录数达到 export_threshold 时通过BIND导出接口一次读取整个区域，边下载边解析
+        （结果不含记录ID和代理状态），否则分页读取
+        """
+        zone_id = self._get_zone_id(domain)
+        result = self._make_request('GET', f'/zones/{zone_id}/dns_records', {'page': 1, 'per_page': 5})
+        if result.get('result_info', {}).get('total_count', 0) < self.export_threshold:
+            return iter(self._list_records(domain))
+        
+        response = self._request_raw('GET', f'/zones/{zone_id}/dns_records/export')
+        response.encoding = 'utf-8'
+        return self._parse_export(response, domain)
+    
+    def _parse_export(self, response: requests.Response, domain: str) -> Iterator[DNSRecord]:
+        with response:
+            for record in ZoneFileParser(domain).parse(response.iter_lines(decode_unicode=True)):
+                # 导出内容包含CloudFlare自身的根域名NS记录，记录接口中没有这些记录
+                if record.type == 'NS' and record.name == '@' and record.value.lower().endswith('.ns.cloudflare.com'):
+                    continue
+                yield record
+    
+    def import_records(self, domain: str, records: List[DNSRecord]) -> List[Tuple[DNSRecord, str]]:
+        """通过BIND导入接口一次新增所有记录（均不开启代理），返回未能导入的记录"""
+        zone_id = self._get_zone_id(domain)
+        buffer = io.StringIO()
+        write_zone(records, domain, buffer)
+        
+        response = self._request_raw(
+            'POST', f'/zones/{zone_id}/dns_records/import',
+            files={'file': ('import.txt', buffer.getvalue().encode('utf-8'), 'text/plain')},
+            data={'proxied': 'false'}
+        )
+        result = response.json()
+        if not result.get('success', False):
+            errors = result.get('errors', [])
+            raise Exception(f"CloudFlare API错误: {', '.join(e.get('message', '未知错误') for e in errors)}")
+        
+        added = result.get('result', {}).get('recs_added', 0)
+        if added >= len(records):
+            return []
+        
+        # 部分记录未导入（如与现有记录冲突），读取区域内容找出缺少的记录
+        present = Counter((record_key(r), record_content(r)) for r in self.export_records(domain))
+        rejected = []
+        for record in records:
+            key = (record_key(record), record_content(record))
+            if present[key] > 0:
+                present[key] -= 1
+            else:
+                rejected.append((record, f'批量导入未添加该记录（共导入 {added}/{len(records)} 条）'))
+        return rejected
+    
+    def get_zone_signature(self, domain: str) -> Optional[str]:
+        """以区域修改时间和记录总数（只读取一页最少的记录）作为变化标识"""
+        result = self._make_request('GET', '/zones', {'name': domain})
+        zones = result.get('result', [])
+        if not zones:
+            raise Exception(f"未找到域名: {domain}")
         
-        return records
+        zone = zones[0]
+        result = self._make_request('GET', f"/zones/{zone['id']}/dns_records", {
+            'page': 1,
+            'per_page': 5  # API允许的最小分页
+        })
+        total = result.get('result_info', {}).get('total_count', 0)
+        return f"count:{total};modified:{zone.get('modified_on', '')}"
     
     def add_record(self, domain: str, record: DNSRecord) -> str:
         """添加DNS记录"""
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+DNS提供商API调用统计
+在各提供商的 _make_request 外层记录接口名、耗时、响应字节数、状态码、重试次数和限流等待时间，
+内存中按 (提供商, 接口) 聚合为延迟直方图，并定期批量写入 provider_metrics 表
+"""
+
+import time
+import atexit
+import bisect
+import threading
+import functools
+from dataclasses import dataclass
+from typing import Any, List, Dict, Tuple, Optional, Callable, Iterable
+
+
+# 直方图桶上界（毫秒），按1.25倍递增，覆盖1ms到约2分钟，分位数误差不超过25%
+BUCKET_BOUNDS: List[float] = []
+_bound = 1.0
+while _bound < 120000:
+    BUCKET_BOUNDS.append(round(_bound, 2))
+    _bound *= 1.25
+
+# 定期写入数据库的间隔（秒）和待写入条数上限
+FLUSH_INTERVAL = 30
+FLUSH_THRESHOLD = 500
+
+
+@dataclass
+class RequestSample:
+    """单次API调用"""
+    provider: str
+    action: str
+    latency_ms: float
+    bytes: int = 0
+    status: int = 0
+    retries: int = 0
+    throttle_ms: float = 0.0
+    error: str = ''
+    timestamp: float = 0.0
+
+
+class LatencyHistogram:
+    """延迟直方图"""
+    
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.bytes = 0
+        self.retries = 0
+        self.throttle_ms = 0.0
+    
+    def add(self, sample: RequestSample):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, sample.latency_ms)] += 1
+        self.count += 1
+        self.total_ms += sample.latency_ms
+        self.max_ms = max(self.max_ms, sample.latency_ms)
+        self.bytes += sample.bytes
+        self.retries += sample.retries
+        self.throttle_ms += sample.throttle_ms
+        if sample.error:
+            self.errors += 1
+    
+    def percentile(self, p: float) -> float:
+        """近似分位数（毫秒），取所在桶的上界，且不超过最大值"""
+        if not self.count:
+            return 0.0
+        target = max(1, int(self.count * p / 100.0 + 0.999999))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                bound = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max_ms
+                return min(bound, self.max_ms)
+        return self.max_ms
+    
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+
+class RequestContext:
+    """当前线程正在进行的API调用，供 _make_request 内部补充响应信息"""
+    
+    __slots__ = ('bytes', 'status', 'retries', 'throttle_ms')
+    
+    def __init__(self):
+        self.bytes = 0
+        self.status = 0
+        self.retries = 0
+        self.throttle_ms = 0.0
+
+
+class MetricsStore:
+    """内存中的调用统计，定期写入数据库"""
+    
+    def __init__(self, writer: Optional[Callable[[List[RequestSample]], None]] = None):
+        self.writer = writer
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._pending: List[RequestSample] = []
+        self._local = threading.local()
+        self._flusher = None
+    
+    def record(self, sample: RequestSample):
+        """记录一次调用"""
+        if not sample.timestamp:
+            sample.timestamp = time.time()
+        with self._lock:
+            key = (sample.provider, sample.action)
+            if key not in self._histograms:
+                self._histograms[key] = LatencyHistogram()
+            self._histograms[key].add(sample)
+            self._pending.append(sample)
+            flush_now = len(self._pending) >= FLUSH_THRESHOLD
+        
+        self.start_flusher()
+        if flush_now:
+            self.flush()
+    
+    def histograms(self) -> Dict[Tuple[str, str], LatencyHistogram]:
+        """本次运行的直方图（按提供商和接口）"""
+        with self._lock:
+            return dict(self._histograms)
+    
+    def reset(self):
+        """清空内存中的统计（待写入的样本保留）"""
+        with self._lock:
+            self._histograms.clear()
+    
+    def flush(self):
+        """把待写入的样本批量写入数据库，写入失败时丢弃，不影响API调用"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        try:
+            if self.writer is not None:
+                self.writer(pending)
+            else:
+                from ..common.database import db
+                db.add_provider_metrics(pending)
+        except Exception as e:
+            print(f"写入API调用统计失败: {e}")
+    
+    def start_flusher(self):
+        """首次记录时启动后台定期写入线程"""
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+            self._flusher.start()
+        atexit.register(self.flush)
+    
+    def _flush_loop(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            self.flush()
+    
+    @property
+    def current(self) -> Optional[RequestContext]:
+        """当前线程正在统计的调用，不在统计中时为None"""
+        return getattr(self._local, 'context', None)
+    
+    def note_response(self, response, streamed: bool = False):
+        """在 _make_request 中记录响应状态码和字节数，流式响应按 Content-Length 计算，不读取响应体"""
+        context = self.current
+        if context is not None and response is not None:
+            context.status = response.status_code
+            if streamed:
+                context.bytes += int(response.headers.get('Content-Length') or 0)
+            else:
+                context.bytes += len(response.content or b'')
+    
+    def note_retry(self, wait_seconds: float = 0.0, throttled: bool = False):
+        """在 _make_request 中记录一次重试及限流等待时间"""
+        context = self.current
+        if context is not None:
+            context.retries += 1
+            if throttled:
+                context.throttle_ms += wait_seconds * 1000
+    
+    def instrument(self, action_of: Callable[..., str]):
+        """
+        装饰 _make_request，action_of 接收与被装饰方法相同的参数并返回接口名
+        提供商名称取实例的 name，未设置时使用提供商类型
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(provider, *args, **kwargs):
+                if not self.enabled or self.current is not None:
+                    return func(provider, *args, **kwargs)
+                
+                context = RequestContext()
+                self._local.context = context
+                error = ''
+                start = time.perf_counter()
+                try:
+                    return func(provider, *args, **kwargs)
+                except Exception as e:
+                    error = str(e)[:200] or type(e).__name__
+                    raise
+                finally:
+                    latency_ms = (time.perf_counter() - start) * 1000
+                    self._local.context = None
+                    self.record(RequestSample(
+                        provider=provider.name or provider.provider_type,
+                        action=action_of(*args, **kwargs),
+                        latency_ms=latency_ms,
+                        bytes=context.bytes,
+                        status=context.status,
+                        retries=context.retries,
+                        throttle_ms=context.throttle_ms,
+                        error=error
+                    ))
+            return wrapper
+        return decorator
+
+
+def summarize(samples: Iterable[RequestSample]) -> Dict[Tuple[str, str], LatencyHistogram]:
+    """把样本（如从数据库读取的历史记录）聚合为直方图"""
+    histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+    for sample in samples:
+        key = (sample.provider, sample.action)
+        if key not in histograms:
+            histograms[key] = LatencyHistogram()
+        histograms[key].add(sample)
+    return histograms
+
+
+
+def summarize_buckets(rows: Iterable[Dict[str, Any]]) -> Dict[Tuple[str, str], LatencyHistogram]:
+    """把数据库中按桶聚合的统计（见 DatabaseManager.get_provider_metric_buckets）合并为直方图"""
+    histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+    for row in rows:
+        key = (row['provider'], row['action'])
+        if key not in histograms:
+            histograms[key] = LatencyHistogram()
+        histogram = histograms[key]
+        histogram.counts[row['bucket']] += row['count']
+        histogram.count += row['count']
+        histogram.errors += row['errors']
+        histogram.total_ms += row['total_ms'] or 0.0
+        histogram.max_ms = max(histogram.max_ms, row['max_ms'] or 0.0)
+        histogram.bytes += row['bytes'] or 0
+        histogram.retries += row['retries'] or 0
+        histogram.throttle_ms += row['throttle_ms'] or 0.0
+    return histograms
+
+
+metrics = MetricsStore()
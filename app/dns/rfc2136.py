@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+RFC 2136 动态更新DNS提供商实现
+直接管理自建的权威DNS服务器（BIND、Knot、PowerDNS等）:
+- 整区读取使用AXFR，一次TCP传输边接收边解析
+- 读取过的区域在内存中保留副本，再次读取时从副本的SOA序列号发起IXFR，只传输之后的变化；
+  服务器不支持IXFR或增量已不可用时回退到AXFR
+- 记录变更以（可选TSIG签名的）UPDATE消息提交，apply_changes 中同一批次的变更按 batch_size 合并为一条消息
+
+服务器上的记录没有ID，记录ID由 "完整名称/类型/记录数据" 组成，修改记录后ID随内容变化
+
+配置项:
+    server          服务器地址（IP或主机名），必填
+    port            端口，默认 53
+    zones           管理的区域列表（列表或逗号分隔的字符串），必填
+    tsig_key_name   TSIG密钥名称，与 tsig_secret 同时填写
+    tsig_secret     TSIG密钥（Base64）
+    tsig_algorithm  TSIG算法，默认 hmac-sha256
+    timeout         每个响应的等待时间（秒），默认 10
+    batch_size      每条UPDATE消息最多包含的变更数，默认 100
+    ixfr            是否使用IXFR增量读取，默认 true
+"""
+
+import time
+import socket
+import threading
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+import dns.name
+import dns.zone
+import dns.xfr
+import dns.query
+import dns.rcode
+import dns.rdata
+import dns.update
+import dns.message
+import dns.rdatatype
+import dns.rdataclass
+import dns.tsigkeyring
+
+from .base import DNSProviderBase, DNSRecord, DNSProviderFactory
+from .zonefile import ZoneFileParser, tokenize, format_rdata
+from .metrics import metrics, RequestSample
+
+
+# 区域传输中不作为记录管理的类型：SOA由服务器维护，DNSSEC相关记录由签名程序生成
+SKIP_TYPES = {'SOA', 'RRSIG', 'NSEC', 'NSEC3', 'NSEC3PARAM', 'DNSKEY', 'CDS', 'CDNSKEY'}
+
+
+class RFC2136Error(Exception):
+    """DNS服务器返回的错误"""
+    
+    def __init__(self, rcode: int, action: str):
+        super().__init__(f"DNS服务器错误: {action} 返回 {dns.rcode.to_text(rcode)}")
+        self.rcode = rcode
+
+
+def record_id(owner: dns.name.Name, rdata: dns.rdata.Rdata) -> str:
+    """由完整名称、类型和记录数据组成记录ID"""
+    return f'{owner.to_text()}/{dns.rdatatype.to_text(rdata.rdtype)}/{rdata.to_text()}'
+
+
+def parse_record_id(value: str) -> Tuple[dns.name.Name, dns.rdata.Rdata]:
+    """解析记录ID为 (完整名称, 记录数据)"""
+    try:
+        owner, rdtype, text = value.split('/', 2)
+        return dns.name.from_text(owner), dns.rdata.from_text(dns.rdataclass.IN, rdtype, text)
+    except Exception:
+        raise ValueError(f"无效的记录ID: {value}")
+
+
+class RFC2136DNSProvider(DNSProviderBase):
+    """RFC 2136 动态更新DNS提供商"""
+    
+    update_batch_size = 100
+    
+    # 读取过的区域副本（按服务器和区域），所有实例共享，用于IXFR增量读取
+    _zones: Dict[str, dns.zone.Zone] = {}
+    _zone_locks: Dict[str, threading.Lock] = {}
+    _zones_lock = threading.Lock()
+    
+    def __init__(self, config: Dict[str, Any]):
+        self.server = str(config.get('server', '')).strip()
+        self.port = int(config.get('port', 53))
+        zones = config.get('zones', [])
+        if isinstance(zones, str):
+            zones = zones.split(',')
+        self.zones = [zone.strip().rstrip('.') for zone in zones if zone.strip()]
+        self.key_name = str(config.get('tsig_key_name', '')).strip()
+        self.key_secret = str(config.get('tsig_secret', '')).strip()
+        self.key_algorithm = str(config.get('tsig_algorithm', 'hmac-sha256')).strip()
+        self.timeout = float(config.get('timeout', 10))
+        self.use_ixfr = bool(config.get('ixfr', True))
+        self.update_batch_size = int(config.get('batch_size', self.update_batch_size))
+        self.keyring = None
+        self.keyname = None
+        self._address = None
+        super().__init__(config)
+    
+    def validate_config(self) -> bool:
+        """验证配置"""
+        if not self.server:
+            raise ValueError("RFC 2136配置缺少服务器地址")
+        if not self.zones:
+            raise ValueError("RFC 2136配置缺少区域列表")
+        if bool(self.key_name) != bool(self.key_secret):
+            raise ValueError("TSIG密钥名称和密钥需要同时填写")
+        if self.key_name:
+            try:
+                self.keyring = dns.tsigkeyring.from_text({self.key_name: (self.key_algorithm, self.key_secret)})
+            except Exception as e:
+                raise ValueError(f"无效的TSIG密钥: {e}")
+            self.keyname = dns.name.from_text(self.key_name)
+        return True
+    
+    @property
+    def address(self) -> str:
+        """服务器IP地址（dnspython只接受IP地址，主机名在首次使用时解析）"""
+        if self._address is None:
+            info = socket.getaddrinfo(self.server, self.port, proto=socket.IPPROTO_TCP)
+            self._address = info[0][4][0]
+        return self._address
+    
+    def _origin(self, domain: str) -> dns.name.Name:
+        return dns.name.from_text(domain.rstrip('.'))
+    
+    def _zone_key(self, domain: str) -> str:
+        return f'{self.server}:{self.port}/{domain.rstrip(".").lower()}'
+    
+    @metrics.instrument(lambda message, action: action)
+    def _send(self, message: dns.message.Message, action: str) -> dns.message.Message:
+        """通过TCP发送查询或UPDATE消息，响应码不为NOERROR时抛出异常"""
+        response = dns.query.tcp(message, self.address, timeout=self.timeout, port=self.port)
+        context = metrics.current
+        if context is not None:
+            context.status = response.rcode()
+            context.bytes += len(response.wire or b'')
+        if response.rcode() != dns.rcode.NOERROR:
+            raise RFC2136Error(response.rcode(), action)
+        return response
+    
+    @metrics.instrument(lambda zone, query: dns.rdatatype.to_text(query.question[0].rdtype))
+    def _transfer(self, zone: dns.zone.Zone, query: dns.message.Message):
+        """把AXFR/IXFR的结果应用到区域副本，出错时副本保持不变"""
+        dns.query.inbound_xfr(self.address, zone, query, port=self.port, timeout=self.timeout)
+    
+    def _make_xfr_query(self, zone: dns.zone.Zone, serial: Optional[int]) -> dns.message.Message:
+        """serial 为0时从副本的SOA序列号发起IXFR，为None时发起AXFR"""
+        query, _ = dns.xfr.make_query(zone, serial=serial, keyring=self.keyring, keyname=self.keyname)
+        return query
+    
+    def _build_record(self, parser: ZoneFileParser, owner: dns.name.Name, ttl: int,
+                      rdata: dns.rdata.Rdata) -> Optional[DNSRecord]:
+        """把区域传输中的记录转换为DNSRecord，跳过不管理的类型"""
+        record_type = dns.rdatatype.to_text(rdata.rdtype)
+        if record_type in SKIP_TYPES:
+            return None
+        record = parser.build_record(owner.to_text(omit_final_dot=True), record_type,
+                                     tokenize(rdata.to_text()), ttl, parser.domain)
+        record.id = record_id(owner, rdata)
+        return record
+    
+    def _record_data(self, domain: str, record: DNSRecord) -> Tuple[dns.name.Name, dns.rdata.Rdata]:
+        """把DNSRecord转换为 (完整名称, 记录数据)"""
+        origin = self._origin(domain)
+        name = (record.name or '').strip().rstrip('.')
+        if name in ('', '@') or name.lower() == domain.rstrip('.').lower():
+            owner = origin
+        elif name.lower().endswith('.' + domain.rstrip('.').lower()):
+            owner = dns.name.from_text(name + '.')
+        else:
+            owner = dns.name.from_text(name, origin)
+        rdata = dns.rdata.from_text(dns.rdataclass.IN, record.type.upper(), format_rdata(record), origin=origin,
+                                    relativize=False)
+        return owner, rdata
+    
+    def get_domains(self) -> List[str]:
+        """获取域名列表（即配置的区域）"""
+        return list(self.zones)
+    
+    def get_records(self, domain: str) -> List[DNSRecord]:
+        """
+        获取DNS记录：首次读取使用AXFR，之后从区域副本的SOA序列号发起IXFR，
+        服务器返回的增量（或完整区域）应用到副本后输出
+        """
+        key = self._zone_key(domain)
+        with self._zones_lock:
+            lock = self._zone_locks.setdefault(key, threading.Lock())
+        
+        # 同一区域的读取串行执行，并发的读取在上一次完成后通常只需一次无变化的IXFR
+        with lock:
+            self.check_cancelled()
+            zone = self._zones.get(key) if self.use_ixfr else None
+            if zone is not None:
+                try:
+                    self._transfer(zone, self._make_xfr_query(zone, 0))
+                except Exception:
+                    zone = None
+            if zone is None:
+                zone = dns.zone.Zone(self._origin(domain), relativize=False)
+                self._transfer(zone, self._make_xfr_query(zone, None))
+            if self.use_ixfr:
+                with self._zones_lock:
+                    self._zones[key] = zone
+            
+            parser = ZoneFileParser(domain)
+            records = []
+            for owner, ttl, rdata in zone.iterate_rdatas():
+                record = self._build_record(parser, owner, ttl, rdata)
+                if record is not None:
+                    records.append(record)
+            return records
+    
+    def export_records(self, domain: str) -> Iterator[DNSRecord]:
+        """AXFR整区传输，边接收边产出记录（不使用也不更新区域副本）"""
+        origin = self._origin(domain)
+        parser = ZoneFileParser(domain)
+        start = time.perf_counter()
+        error = ''
+        try:
+            messages = dns.query.xfr(self.address, origin, port=self.port, timeout=self.timeout,
+                                     keyring=self.keyring, keyname=self.keyname, relativize=False)
+            for message in messages:
+                self.check_cancelled()
+                for rrset in message.answer:
+                    for rdata in rrset:
+                        record = self._build_record(parser, rrset.name, rrset.ttl, rdata)
+                        if record is not None:
+                            yield record
+        except Exception as e:
+            error = str(e)[:200] or type(e).__name__
+            raise
+        finally:
+            if metrics.enabled:
+                metrics.record(RequestSample(
+                    provider=self.name or self.provider_type,
+                    action='AXFR',
+                    latency_ms=(time.perf_counter() - start) * 1000,
+                    error=error
+                ))
+    
+    def get_zone_signature(self, domain: str) -> Optional[str]:
+        """以SOA序列号作为变化标识（服务器每次修改区域都会递增）"""
+        origin = self._origin(domain)
+        query = dns.message.make_query(origin, dns.rdatatype.SOA)
+        if self.keyring is not None:
+            query.use_tsig(self.keyring, self.keyname)
+        response = self._send(query, 'SOA')
+        rrset = response.get_rrset(response.answer, origin, dns.rdataclass.IN, dns.rdatatype.SOA)
+        if rrset is None:
+            raise Exception(f"未找到区域: {domain}")
+        return f'serial:{rrset[0].serial}'
+    
+    def test_connection(self) -> bool:
+        """测试连接：查询每个区域的SOA"""
+        try:
+            for zone in self.zones:
+                self.get_zone_signature(zone)
+            return True
+        except Exception as e:
+            print(f"连接测试失败: {e}")
+            return False
+    
+    def _update_message(self, domain: str) -> dns.update.UpdateMessage:
+        return dns.update.UpdateMessage(self._origin(domain), keyring=self.keyring, keyname=self.keyname)
+    
+    def _add(self, message: dns.update.UpdateMessage, domain: str, record: DNSRecord) -> str:
+        owner, rdata = self._record_data(domain, record)
+        message.add(owner, int(record.ttl), rdata)
+        return record_id(owner, rdata)
+    
+    def _delete(self, message: dns.update.UpdateMessage, value: str):
+        owner, rdata = parse_record_id(value)
+        message.delete(owner, rdata)
+    
+    def submit_batch(self, domain: str, changes: list):
+        """把一批变更合并为一条UPDATE消息，服务器保证整条消息要么全部生效要么全部不生效"""
+        message = self._update_message(domain)
+        new_ids = []
+        for change in changes:
+            if change.action in ('update', 'delete'):
+                self._delete(message, change.record.id)
+            if change.action in ('create', 'update'):
+                new_ids.append((change.record, self._add(message, domain, change.record)))
+            elif change.action != 'delete':
+                raise ValueError(f'不支持的变更类型: {change.action}')
+        self._send(message, 'UPDATE')
+        for record, value in new_ids:
+            record.id = value
+    
+    def add_record(self, domain: str, record: DNSRecord) -> str:
+        """添加DNS记录"""
+        message = self._update_message(domain)
+        value = self._add(message, domain, record)
+        self._send(message, 'UPDATE')
+        return value
+    
+    def update_record(self, domain: str, record: DNSRecord) -> bool:
+        """更新DNS记录：同一条消息中删除原记录并添加新记录，record.id 更新为新的记录ID"""
+        message = self._update_message(domain)
+        self._delete(message, record.id)
+        value = self._add(message, domain, record)
+        self._send(message, 'UPDATE')
+        record.id = value
+        return True
+    
+    def delete_record(self, domain: str, record_id: str) -> bool:
+        """删除DNS记录"""
+        message = self._update_message(domain)
+        self._delete(message, record_id)
+        self._send(message, 'UPDATE')
+        return True
+    
+    def get_record_types(self) -> List[str]:
+        """获取支持的记录类型"""
+        return ['A', 'AAAA', 'CNAME', 'MX', 'TXT', 'NS', 'SRV', 'CAA', 'PTR']
+
+
+# 注册RFC 2136 DNS提供商
+DNSProviderFactory.register('rfc2136', RFC2136DNSProvider)
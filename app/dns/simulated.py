@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""
+模拟DNS提供商实现
+不访问网络，按配置确定性地生成大量域名和记录，可注入延迟、错误率和限流，
+用于在没有真实账号的情况下对同步、缓存、数据库和界面进行压力测试
+
+记录按 (域名序号, 记录序号) 即时生成，不常驻内存；增删改保存在按命名空间共享的变更层中，
+同一配置创建的多个实例（如界面中每次操作新建的实例）看到的数据一致
+
+配置项（均可省略）:
+    zones              域名数量，默认 100
+    records            每个域名的平均记录数，默认 100
+    size_jitter        域名记录数的浮动比例（0~1），默认 0.5
+    seed               随机种子，相同种子生成相同的数据，默认 0
+    domain_suffix      域名后缀，默认 sim.test
+    page_size          每次模拟请求返回的条数，默认 100
+    latency_ms         每次模拟请求的延迟，默认 0
+    latency_jitter_ms  延迟的随机浮动上限，默认 0
+    error_rate         每次模拟请求失败的概率（0~1），默认 0
+    throttle_rps       每秒允许的请求数，0为不限流，默认 0
+    throttle_mode      超过限流时 error：抛出错误；wait：等待后重试，默认 error
+"""
+
+import re
+import time
+import random
+import threading
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+from .base import DNSProviderBase, DNSRecord, DNSProviderFactory, filter_records
+from .metrics import metrics
+
+
+RECORD_TYPES = ['A', 'A', 'A', 'AAAA', 'CNAME', 'CNAME', 'MX', 'TXT']
+
+
+class SimulatedError(Exception):
+    """模拟的API错误"""
+    pass
+
+
+class SimulatedThrottleError(SimulatedError):
+    """模拟的限流错误"""
+    pass
+
+
+class SimulatedState:
+    """同一命名空间共享的变更层和限流窗口"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.next_id = 1
+        # 域名序号 -> {'deleted': set(记录ID), 'updated': {记录ID: 记录}, 'added': {记录ID: 记录},
+        #             'version': 修改次数}
+        self.overlays: Dict[int, Dict[str, Any]] = {}
+        self.window_start = 0.0
+        self.window_count = 0
+    
+    def overlay(self, zone: int) -> Dict[str, Any]:
+        if zone not in self.overlays:
+            self.overlays[zone] = {'deleted': set(), 'updated': {}, 'added': {}, 'version': 0}
+        return self.overlays[zone]
+
+
+class SimulatedDNSProvider(DNSProviderBase):
+    """模拟DNS提供商"""
+    
+    _states: Dict[str, SimulatedState] = {}
+    _states_lock = threading.Lock()
+    
+    def __init__(self, config: Dict[str, Any]):
+        self.zones = int(config.get('zones', 100))
+        self.records = int(config.get('records', 100))
+        self.size_jitter = float(config.get('size_jitter', 0.5))
+        self.seed = int(config.get('seed', 0))
+        self.domain_suffix = str(config.get('domain_suffix', 'sim.test')).strip('.')
+        self.page_size = int(config.get('page_size', 100))
+        self.latency_ms = float(config.get('latency_ms', 0))
+        self.latency_jitter_ms = float(config.get('latency_jitter_ms', 0))
+        self.error_rate = float(config.get('error_rate', 0))
+        self.throttle_rps = int(config.get('throttle_rps', 0))
+        self.throttle_mode = config.get('throttle_mode', 'error')
+        super().__init__(config)
+        
+        self.domain_pattern = re.compile(rf'^zone(\d+)\.{re.escape(self.domain_suffix)}$')
+        self.random = random.Random()
+        self.state = self.get_state(f'{self.provider_type}:{self.seed}:{self.domain_suffix}')
+    
+    @classmethod
+    def get_state(cls, namespace: str) -> SimulatedState:
+        with cls._states_lock:
+            if namespace not in cls._states:
+                cls._states[namespace] = SimulatedState()
+            return cls._states[namespace]
+    
+    @classmethod
+    def reset_state(cls):
+        """清空所有命名空间的变更"""
+        with cls._states_lock:
+            cls._states.clear()
+    
+    def validate_config(self) -> bool:
+        """验证配置"""
+        if self.zones < 0 or self.records < 0 or self.page_size <= 0:
+            raise ValueError("模拟DNS配置错误：zones/records 不能为负数，page_size 必须大于0")
+        if not 0 <= self.error_rate <= 1 or not 0 <= self.size_jitter <= 1:
+            raise ValueError("模拟DNS配置错误：error_rate 和 size_jitter 必须在0到1之间")
+        if self.throttle_mode not in ('error', 'wait'):
+            raise ValueError("模拟DNS配置错误：throttle_mode 只能为 error 或 wait")
+        return True
+    
+    def acquire(self):
+        """按每秒窗口限流"""
+        if not self.throttle_rps:
+            return
+        while True:
+            with self.state.lock:
+                now = time.monotonic()
+                if now - self.state.window_start >= 1.0:
+                    self.state.window_start = now
+                    self.state.window_count = 0
+                if self.state.window_count < self.throttle_rps:
+                    self.state.window_count += 1
+                    return
+                wait = self.state.window_start + 1.0 - now
+            
+            if self.throttle_mode == 'error':
+                raise SimulatedThrottleError("模拟DNS API错误: 请求过于频繁，已被限流")
+            metrics.note_retry(wait, throttled=True)
+            time.sleep(wait)
+    
+    @metrics.instrument(lambda action, params=None: action)
+    def _make_request(self, action: str, params: Dict[str, Any] = None) -> Any:
+        """模拟一次API请求：限流、延迟和随机错误，然后在本地执行"""
+        self.acquire()
+        
+        delay = self.latency_ms + (self.random.uniform(0, self.latency_jitter_ms) if self.latency_jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise SimulatedError(f"模拟DNS API错误: {action} 请求失败")
+        
+        return getattr(self, f'action_{action}')(**(params or {}))
+    
+    # ---------- 确定性数据 ----------
+    
+    def domain_name(self, zone: int) -> str:
+        return f'zone{zone:05d}.{self.domain_suffix}'
+    
+    def zone_index(self, domain: str) -> int:
+        match = self.domain_pattern.match(domain.lower().rstrip('.'))
+        if not match or int(match.group(1)) >= self.zones:
+            raise SimulatedError(f"模拟DNS API错误: 未找到域名 {domain}")
+        return int(match.group(1))
+    
+    def zone_size(self, zone: int) -> int:
+        """域名的初始记录数"""
+        if not self.size_jitter:
+            return self.records
+        r = random.Random(self.seed * 1000003 + zone).random()
+        return max(1, round(self.records * (1 + self.size_jitter * (2 * r - 1))))
+    
+    def generate_record(self, zone: int, index: int) -> DNSRecord:
+        """生成域名第index条初始记录"""
+        record_type = RECORD_TYPES[(index * 7 + zone + self.seed) % len(RECORD_TYPES)]
+        priority = 0
+        if record_type == 'A':
+            value = f'10.{zone & 255}.{index >> 8 & 255}.{index & 255}'
+        elif record_type == 'AAAA':
+            value = f'fd00:{zone:x}::{index:x}'
+        elif record_type == 'CNAME':
+            value = f'cdn{index % 97}.{self.domain_suffix}'
+        elif record_type == 'MX':
+            value = f'mx{index % 5}.{self.domain_name(zone)}'
+            priority = 10 + index % 5 * 10
+        else:
+            value = f'v=sim{self.seed}-{zone}-{index}'
+        return DNSRecord(
+            id=f'{zone}-{index}',
+            name=f'host{index}',
+            type=record_type,
+            value=value,
+            ttl=600,
+            priority=priority
+        )
+    
+    def parse_record_id(self, zone: int, record_id: str) -> Tuple[bool, int]:
+        """判断记录ID是否为初始记录，返回 (是否初始记录, 序号)"""
+        prefix, _, index = str(record_id).partition('-')
+        if prefix == str(zone) and index.isdigit() and int(index) < self.zone_size(zone):
+            return True, int(index)
+        return False, -1
+    
+    # ---------- 模拟接口 ----------
+    
+    def action_ListDomains(self, offset: int, limit: int) -> List[str]:
+        return [self.domain_name(zone) for zone in range(offset, min(offset + limit, self.zones))]
+    
+    def action_ListRecords(self, domain: str, offset: int, limit: int) -> Dict[str, Any]:
+        """按初始记录序号分页，最后一页之后返回新增的记录；同时返回当前记录总数"""
+        zone = self.zone_index(domain)
+        size = self.zone_size(zone)
+        with self.state.lock:
+            overlay = self.state.overlays.get(zone)
+            deleted = set(overlay['deleted']) if overlay else set()
+            updated = dict(overlay['updated']) if overlay else {}
+            added = list(overlay['added'].values()) if overlay else []
+        
+        records = []
+        for index in range(offset, min(offset + limit, size)):
+            record_id = f'{zone}-{index}'
+            if record_id in deleted:
+                continue
+            records.append(updated.get(record_id) or self.generate_record(zone, index))
+        
+        # 新增记录排在初始记录之后
+        added_offset = max(0, offset - size)
+        remaining = limit - (min(offset + limit, size) - min(offset, size))
+        if remaining > 0:
+            records.extend(added[added_offset:added_offset + remaining])
+        return {
+            'records': [DNSRecord(**r.to_dict()) for r in records],
+            'total_count': size - len(deleted) + len(added)
+        }
+    
+    def action_QueryRecords(self, domain: str, name: Optional[str], type: Optional[str],
+                            value: Optional[str]) -> List[DNSRecord]:
+        """按条件筛选记录；主机记录为 host序号 时直接定位初始记录，不遍历整个域名"""
+        zone = self.zone_index(domain)
+        size = self.zone_size(zone)
+        with self.state.lock:
+            overlay = self.state.overlays.get(zone)
+            deleted = set(overlay['deleted']) if overlay else set()
+            updated = dict(overlay['updated']) if overlay else {}
+            added = list(overlay['added'].values()) if overlay else []
+        
+        match = re.match(r'^host(\d+)$', (name or '').lower())
+        if name is not None:
+            indexes = [int(match.group(1))] if match and int(match.group(1)) < size else []
+        else:
+            indexes = range(size)
+        
+        records = []
+        for index in indexes:
+            record_id = f'{zone}-{index}'
+            if record_id not in deleted and record_id not in updated:
+                records.append(self.generate_record(zone, index))
+        # 修改过的记录可能已改名，与新增记录一起筛选
+        records.extend(updated.values())
+        records.extend(added)
+        return [DNSRecord(**r.to_dict()) for r in filter_records(records, name, type, value)]
+    
+    def action_DescribeZone(self, domain: str) -> Dict[str, Any]:
+        """域名的记录数和修改次数（相当于区域的修改时间）"""
+        zone = self.zone_index(domain)
+        with self.state.lock:
+            overlay = self.state.overlays.get(zone)
+            if not overlay:
+                return {'record_count': self.zone_size(zone), 'version': 0}
+            return {
+                'record_count': self.zone_size(zone) - len(overlay['deleted']) + len(overlay['added']),
+                'version': overlay['version']
+            }
+    
+    def action_CreateRecord(self, domain: str, record: DNSRecord) -> str:
+        zone = self.zone_index(domain)
+        with self.state.lock:
+            record_id = f'n{self.state.next_id}'
+            self.state.next_id += 1
+            overlay = self.state.overlay(zone)
+            overlay['added'][record_id] = DNSRecord(**{**record.to_dict(), 'id': record_id})
+            overlay['version'] += 1
+        return record_id
+    
+    def action_UpdateRecord(self, domain: str, record: DNSRecord) -> bool:
+        zone = self.zone_index(domain)
+        generated, _ = self.parse_record_id(zone, record.id)
+        with self.state.lock:
+            overlay = self.state.overlay(zone)
+            stored = DNSRecord(**record.to_dict())
+            if record.id in overlay['added']:
+                overlay['added'][record.id] = stored
+            elif generated and record.id not in overlay['deleted']:
+                overlay['updated'][record.id] = stored
+            else:
+                raise SimulatedError(f"模拟DNS API错误: 记录不存在 {record.id}")
+            overlay['version'] += 1
+        return True
+    
+    def action_DeleteRecord(self, domain: str, record_id: str) -> bool:
+        zone = self.zone_index(domain)
+        generated, _ = self.parse_record_id(zone, record_id)
+        with self.state.lock:
+            overlay = self.state.overlay(zone)
+            if record_id in overlay['added']:
+                del overlay['added'][record_id]
+            elif generated and record_id not in overlay['deleted']:
+                overlay['deleted'].add(record_id)
+                overlay['updated'].pop(record_id, None)
+            else:
+                raise SimulatedError(f"模拟DNS API错误: 记录不存在 {record_id}")
+            overlay['version'] += 1
+        return True
+    
+    # ---------- 提供商接口 ----------
+    
+    def get_domains(self) -> List[str]:
+        """获取域名列表"""
+        domains = []
+        offset = 0
+        while True:
+            self.check_cancelled()
+            page = self._make_request('ListDomains', {'offset': offset, 'limit': self.page_size})
+            domains.extend(page)
+            if len(page) < self.page_size:
+                break
+            offset += self.page_size
+        return domains
+    
+    def get_records(self, domain: str) -> List[DNSRecord]:
+        """获取DNS记录"""
+        return [record for page, _ in self.iter_record_pages(domain) for record in page]
+    
+    def iter_record_pages(self, domain: str) -> Iterator[Tuple[List[DNSRecord], Optional[int]]]:
+        """逐页获取DNS记录（跳过初始记录全部被删除的空页）"""
+        offset = 0
+        while True:
+            self.check_cancelled()
+            result = self._make_request('ListRecords', {'domain': domain, 'offset': offset, 'limit': self.page_size})
+            page = result['records']
+            if page:
+                yield page, result['total_count']
+            offset += self.page_size
+            if not page and offset >= self.zone_size(self.zone_index(domain)):
+                break
+    
+    def query_records(self, domain: str, name: Optional[str] = None, type: Optional[str] = None,
+                      value: Optional[str] = None) -> List[DNSRecord]:
+        """按主机记录、类型和值查询记录（一次模拟请求）"""
+        return self._make_request('QueryRecords', {'domain': domain, 'name': name, 'type': type, 'value': value})
+    
+    def get_zone_signature(self, domain: str) -> Optional[str]:
+        """以记录数和修改次数作为变化标识"""
+        info = self._make_request('DescribeZone', {'domain': domain})
+        return f"count:{info['record_count']};version:{info['version']}"
+    
+    def add_record(self, domain: str, record: DNSRecord) -> str:
+        """添加DNS记录"""
+        return self._make_request('CreateRecord', {'domain': domain, 'record': record})
+    
+    def update_record(self, domain: str, record: DNSRecord) -> bool:
+        """更新DNS记录"""
+        return self._make_request('UpdateRecord', {'domain': domain, 'record': record})
+    
+    def delete_record(self, domain: str, record_id: str) -> bool:
+        """删除DNS记录"""
+        return self._make_request('DeleteRecord', {'domain': domain, 'record_id': record_id})
+    
+    def get_record_types(self) -> List[str]:
+        """获取支持的记录类型"""
+        return ['A', 'AAAA', 'CNAME', 'MX', 'TXT', 'NS', 'SRV', 'CAA']
+
+
+class MemoryDNSProvider(SimulatedDNSProvider):
+    """内存DNS提供商：与模拟提供商相同，使用独立的命名空间"""
+    pass
+
+
+# 注册模拟DNS提供商
+DNSProviderFactory.register('simulated', SimulatedDNSProvider)
+DNSProviderFactory.register('memory', MemoryDNSProvider)
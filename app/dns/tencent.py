@@ -8,20 +8,33 @@ import hmac
 import hashlib
 import time
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 import requests
-from .base import DNSProviderBase, DNSRecord, DNSProviderFactory
+from .base import DNSProviderBase, DNSRecord, DNSProviderFactory, filter_records
+from .metrics import metrics
+
+
+class TencentAPIError(Exception):
+    """腾讯云API返回的错误"""
+    
+    def __init__(self, code: str, message: str):
+        super().__init__(f"腾讯云DNS API错误: {message}")
+        self.code = code
 
 
 class TencentDNSProvider(DNSProviderBase):
     """腾讯云DNS提供商"""
     
+    min_ttl = 600
+    max_ttl = 604800
+    
     def __init__(self, config: Dict[str, Any]):
         self.secret_id = config.get('secret_id', '')
         self.secret_key = config.get('secret_key', '')
         self.region = config.get('region', 'ap-beijing')
         super().__init__(config)
         self.endpoint = 'dnspod.tencentcloudapi.com'
+        self.scheme = 'https'
         self.service = 'dnspod'
         self.version = '2021-03-23'
     
@@ -74,6 +87,7 @@ class TencentDNSProvider(DNSProviderBase):
         
         return authorization
     
+    @metrics.instrument(lambda action, params=None: action)
     def _make_request(self, action: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
         """发起API请求"""
         if params is None:
@@ -92,14 +106,15 @@ class TencentDNSProvider(DNSProviderBase):
             'X-TC-Region': self.region
         }
         
-        url = f"https://{self.endpoint}"
+        url = f"{self.scheme}://{self.endpoint}"
         response = requests.post(url, headers=headers, data=payload, timeout=30)
+        metrics.note_response(response)
         response.raise_for_status()
         
         result = response.json()
         if 'Error' in result.get('Response', {}):
             error = result['Response']['Error']
-            raise Exception(f"腾讯云DNS API错误: {error.get('Message', '未知错误')}")
+            raise TencentAPIError(error.get('Code', ''), error.get('Message', '未知错误'))
         
         return result.get('Response', {})
     
@@ -110,6 +125,7 @@ class TencentDNSProvider(DNSProviderBase):
         limit = 20
         
         while True:
+            self.check_cancelled()
             result = self._make_request('DescribeDomainList', {
                 'Offset': offset,
                 'Limit': limit
@@ -128,41 +144,80 @@ class TencentDNSProvider(DNSProviderBase):
         
         return domains
     
-    def get_records(self, domain: str) -> List[DNSRecord]:
-        """获取DNS记录"""
-        records = []
+    def _parse_record(self, record: Dict[str, Any]) -> DNSRecord:
+        return DNSRecord(
+            id=str(record['RecordId']),
+            name=record['Name'],
+            type=record['Type'],
+            value=record['Value'],
+            ttl=int(record['TTL']),
+            priority=int(record.get('MX', 0)),
+            enabled=record['Status'] == 'ENABLE'
+        )
+    
+    def _iter_pages(self, params: Dict[str, Any]) -> Iterator[Tuple[List[DNSRecord], Optional[int]]]:
+        """分页读取 DescribeRecordList 的结果，逐页产出 (记录, TotalCount)"""
         offset = 0
         limit = 20
         
         while True:
-            result = self._make_request('DescribeRecordList', {
-                'Domain': domain,
-                'Offset': offset,
-                'Limit': limit
-            })
+            self.check_cancelled()
+            try:
+                result = self._make_request('DescribeRecordList', {
+                    **params,
+                    'Offset': offset,
+                    'Limit': limit
+                })
+            except TencentAPIError as e:
+                # 没有匹配的记录时接口返回错误而不是空列表
+                if e.code == 'ResourceNotFound.NoDataOfRecord':
+                    break
+                raise
             
             record_list = result.get('RecordList', [])
             if not record_list:
                 break
             
-            for record in record_list:
-                dns_record = DNSRecord(
-                    id=str(record['RecordId']),
-                    name=record['Name'],
-                    type=record['Type'],
-                    value=record['Value'],
-                    ttl=int(record['TTL']),
-                    priority=int(record.get('MX', 0)),
-                    enabled=record['Status'] == 'ENABLE'
-                )
-                records.append(dns_record)
+            total = result.get('RecordCountInfo', {}).get('TotalCount')
+            yield [self._parse_record(record) for record in record_list], total
             
             if len(record_list) < limit:
                 break
             
             offset += limit
-        
-        return records
+    
+    def _list_records(self, params: Dict[str, Any]) -> List[DNSRecord]:
+        """读取所有页的记录"""
+        return [record for page, _ in self._iter_pages(params) for record in page]
+    
+    def get_records(self, domain: str) -> List[DNSRecord]:
+        """获取DNS记录"""
+        return self._list_records({'Domain': domain})
+    
+    def iter_record_pages(self, domain: str) -> Iterator[Tuple[List[DNSRecord], Optional[int]]]:
+        """逐页获取DNS记录"""
+        return self._iter_pages({'Domain': domain})
+    
+    def query_records(self, domain: str, name: Optional[str] = None, type: Optional[str] = None,
+                      value: Optional[str] = None) -> List[DNSRecord]:
+        """服务端筛选：Subdomain 和 RecordType 精确匹配，值通过 Keyword 模糊搜索后再精确筛选"""
+        params: Dict[str, Any] = {'Domain': domain}
+        if name is not None:
+            params['Subdomain'] = name.strip().rstrip('.') or '@'
+        if type:
+            params['RecordType'] = type.upper()
+        if value:
+            params['Keyword'] = value
+        return filter_records(self._list_records(params), name, type, value)
+    
+    def get_zone_signature(self, domain: str) -> Optional[str]:
+        """只读取一条记录，以记录总数作为变化标识"""
+        result = self._make_request('DescribeRecordList', {
+            'Domain': domain,
+            'Offset': 0,
+            'Limit': 1
+        })
+        return f"count:{result.get('RecordCountInfo', {}).get('TotalCount', 0)}"
     
     def add_record(self, domain: str, record: DNSRecord) -> str:
         """添加DNS记录"""
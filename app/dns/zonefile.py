@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+BIND区域文件（RFC 1035）导入导出
+解析器逐行流式处理，不需要把整个区域文件读入内存
+"""
+
+import re
+from typing import List, Iterable, Iterator, TextIO
+
+from .base import DNSRecord
+from .changeset import RecordChange, diff_records
+
+
+# 记录值为主机名的类型，导出时补全末尾的点，导入时转换为绝对域名
+HOSTNAME_TYPES = {'CNAME', 'NS', 'PTR', 'DNAME'}
+
+# 区域文件无法表示的提供商私有类型（如阿里云显性/隐性URL），导出为注释
+UNSUPPORTED_TYPES = {'REDIRECT_URL', 'FORWARD_URL'}
+
+CLASSES = {'IN', 'CH', 'HS', 'CS'}
+
+TTL_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+TXT_CHUNK_SIZE = 255
+
+
+class ZoneFileError(ValueError):
+    """区域文件格式错误"""
+    
+    def __init__(self, message: str, line_number: int = 0):
+        if line_number:
+            message = f'第 {line_number} 行: {message}'
+        super().__init__(message)
+        self.line_number = line_number
+
+
+def parse_ttl(text: str) -> int:
+    """解析TTL，支持BIND单位写法（如 1h30m）"""
+    if text.isdigit():
+        return int(text)
+    
+    parts = re.findall(r'(\d+)([smhdwSMHDW])', text)
+    if not parts or ''.join(n + u for n, u in parts) != text:
+        raise ValueError(f'无效的TTL: {text}')
+    return sum(int(n) * TTL_UNITS[u.lower()] for n, u in parts)
+
+
+def is_ttl(text: str) -> bool:
+    """判断token是否为TTL"""
+    try:
+        parse_ttl(text)
+        return True
+    except ValueError:
+        return False
+
+
+def tokenize(line: str) -> List[str]:
+    """把一行拆分为token，引号内的内容保持为单个token（保留引号），忽略注释"""
+    tokens = []
+    current = ''
+    in_quotes = False
+    escaped = False
+    for char in line:
+        if in_quotes:
+            current += char
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_quotes = False
+            continue
+        
+        if char == ';':
+            break
+        if char == '"':
+            in_quotes = True
+            current += char
+        elif char in '()':
+            if current:
+                tokens.append(current)
+                current = ''
+            tokens.append(char)
+        elif char.isspace():
+            if current:
+                tokens.append(current)
+                current = ''
+        else:
+            current += char
+    
+    if in_quotes:
+        raise ValueError('引号未闭合')
+    if current:
+        tokens.append(current)
+    return tokens
+
+
+def iter_entries(lines: Iterable[str]) -> Iterator[tuple]:
+    """
+    合并括号跨行的记录，逐条产出 (行号, 是否继承上一条的名称, tokens)
+    """
+    buffer: List[str] = []
+    depth = 0
+    start_line = 0
+    inherit_owner = False
+    
+    for line_number, line in enumerate(lines, 1):
+        line = line.rstrip('\r\n')
+        try:
+            tokens = tokenize(line)
+        except ValueError as e:
+            raise ZoneFileError(str(e), line_number)
+        
+        if depth == 0:
+            if not tokens:
+                continue
+            start_line = line_number
+            inherit_owner = line[:1].isspace()
+        
+        for token in tokens:
+            if token == '(':
+                depth += 1
+            elif token == ')':
+                depth -= 1
+                if depth < 0:
+                    raise ZoneFileError('括号不匹配', line_number)
+            else:
+                buffer.append(token)
+        
+        if depth == 0 and buffer:
+            yield start_line, inherit_owner, buffer
+            buffer = []
+    
+    if depth != 0:
+        raise ZoneFileError('括号未闭合', start_line)
+
+
+def unquote_txt(tokens: List[str]) -> str:
+    """合并TXT记录的多个字符串"""
+    parts = []
+    for token in tokens:
+        if len(token) >= 2 and token[0] == '"' and token[-1] == '"':
+            token = token[1:-1]
+        parts.append(re.sub(r'\\(.)', r'\1', token))
+    return ''.join(parts)
+
+
+def quote_txt(value: str) -> str:
+    """把TXT记录值转换为区域文件格式，超过255字节时拆分为多个字符串"""
+    if value.startswith('"') and value.endswith('"') and len(value) >= 2:
+        return value
+    
+    chunks = [value[i:i + TXT_CHUNK_SIZE] for i in range(0, len(value), TXT_CHUNK_SIZE)] or ['']
+    escaped = [chunk.replace('\\', '\\\\').replace('"', '\\"') for chunk in chunks]
+    return ' '.join(f'"{chunk}"' for chunk in escaped)
+
+
+class ZoneFileParser:
+    """流式区域文件解析器"""
+    
+    def __init__(self, domain: str, default_ttl: int = 600, skip_types: Iterable[str] = ('SOA',)):
+        self.domain = domain.rstrip('.').lower()
+        self.default_ttl = default_ttl
+        self.skip_types = {t.upper() for t in skip_types}
+    
+    def absolute(self, name: str, origin: str) -> str:
+        """把区域文件中的名称转换为不带末尾点的绝对域名"""
+        if name == '@':
+            return origin
+        if name.endswith('.'):
+            return name[:-1]
+        return f'{name}.{origin}' if origin else name
+    
+    def relative(self, fqdn: str) -> str:
+        """把绝对域名转换为相对于当前域名的记录名称"""
+        lowered = fqdn.lower()
+        if lowered == self.domain:
+            return '@'
+        if lowered.endswith('.' + self.domain):
+            return fqdn[:-len(self.domain) - 1]
+        raise ValueError(f'记录 {fqdn} 不属于域名 {self.domain}')
+    
+    def parse(self, lines: Iterable[str]) -> Iterator[DNSRecord]:
+        """逐条产出区域文件中的记录"""
+        origin = self.domain
+        ttl = self.default_ttl
+        owner = None
+        
+        for line_number, inherit_owner, tokens in iter_entries(lines):
+            try:
+                directive = tokens[0].upper()
+                if directive == '$ORIGIN':
+                    origin = self.absolute(tokens[1], origin)
+                    continue
+                if directive == '$TTL':
+                    ttl = parse_ttl(tokens[1])
+                    continue
+                if directive.startswith('$'):
+                    raise ValueError(f'不支持的指令: {tokens[0]}')
+                
+                if not inherit_owner:
+                    owner = self.absolute(tokens[0], origin)
+                    tokens = tokens[1:]
+                elif owner is None:
+                    raise ValueError('缺少记录名称')
+                
+                record_ttl = ttl
+                while tokens and (tokens[0].upper() in CLASSES or is_ttl(tokens[0])):
+                    if tokens[0].upper() not in CLASSES:
+                        record_ttl = parse_ttl(tokens[0])
+                    tokens = tokens[1:]
+                
+                if len(tokens) < 2:
+                    raise ValueError('记录格式不完整')
+                
+                record_type = tokens[0].upper()
+                if record_type in self.skip_types:
+                    continue
+                
+                yield self.build_record(owner, record_type, tokens[1:], record_ttl, origin)
+            except ZoneFileError:
+                raise
+            except (ValueError, IndexError) as e:
+                raise ZoneFileError(str(e) or '记录格式错误', line_number)
+    
+    def build_record(self, owner: str, record_type: str, rdata: List[str], ttl: int, origin: str) -> DNSRecord:
+        """根据记录类型解析记录值"""
+        priority = 0
+        if record_type in ('TXT', 'SPF'):
+            value = unquote_txt(rdata)
+        elif record_type == 'MX':
+            priority = int(rdata[0])
+            value = self.absolute(rdata[1], origin)
+        elif record_type == 'SRV':
+            priority = int(rdata[0])
+            value = f'{rdata[1]} {rdata[2]} {self.absolute(rdata[3], origin)}'
+        elif record_type in HOSTNAME_TYPES:
+            value = self.absolute(rdata[0], origin)
+        else:
+            value = ' '.join(rdata)
+        
+        return DNSRecord(
+            name=self.relative(owner),
+            type=record_type,
+            value=value,
+            ttl=ttl,
+            priority=priority
+        )
+
+
+def parse_zone(lines: Iterable[str], domain: str, default_ttl: int = 600) -> Iterator[DNSRecord]:
+    """流式解析区域文件，lines可以直接是打开的文件对象"""
+    return ZoneFileParser(domain, default_ttl).parse(lines)
+
+
+def format_rdata(record: DNSRecord) -> str:
+    """把记录值（含优先级）格式化为区域文件中的记录数据部分，主机名补全为绝对域名"""
+    record_type = record.type.upper()
+    value = record.value
+    
+    if record_type in ('TXT', 'SPF'):
+        value = quote_txt(value)
+    elif record_type == 'MX':
+        value = f'{record.priority} {fqdn(value)}'
+    elif record_type == 'SRV':
+        parts = value.split()
+        if len(parts) == 3:
+            parts[2] = fqdn(parts[2])
+        value = f'{record.priority} {" ".join(parts)}'
+    elif record_type in HOSTNAME_TYPES:
+        value = fqdn(value)
+    return value
+
+
+def format_record(record: DNSRecord) -> str:
+    """把记录格式化为区域文件中的一行"""
+    name = record.name if record.name else '@'
+    record_type = record.type.upper()
+    line = f'{name}\t{record.ttl}\tIN\t{record_type}\t{format_rdata(record)}'
+    if record_type in UNSUPPORTED_TYPES:
+        return f'; {line}'
+    return line
+
+
+def fqdn(name: str) -> str:
+    """补全主机名末尾的点"""
+    return name if name.endswith('.') else f'{name}.'
+
+
+def write_zone(records: Iterable[DNSRecord], domain: str, fp: TextIO, default_ttl: int = 600) -> int:
+    """把记录写为区域文件，records 可以是生成器，返回写入的记录数"""
+    fp.write(f'$ORIGIN {fqdn(domain)}\n')
+    fp.write(f'$TTL {default_ttl}\n')
+    count = 0
+    for record in records:
+        fp.write(format_record(record) + '\n')
+        count += 1
+    return count
+
+
+def is_zone_managed(record: DNSRecord) -> bool:
+    """区域文件导入时是否管理该记录：排除提供商私有类型和根域名NS"""
+    if record.type.upper() in UNSUPPORTED_TYPES:
+        return False
+    if record.type.upper() == 'NS' and (record.name or '@') == '@':
+        return False
+    return True
+
+
+def plan_zone_import(provider, domain: str, lines: Iterable[str],
+                     delete_missing: bool = True) -> List[RecordChange]:
+    """对比区域文件与远程记录，返回需要提交的变更"""
+    current = provider.get_records(domain)
+    desired = parse_zone(lines, domain)
+    return diff_records(current, desired, delete_missing,
+                        ignore=lambda record: not is_zone_managed(record))
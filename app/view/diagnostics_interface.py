@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+诊断界面
+按提供商和接口显示API调用延迟分位数（p50/p95/p99）、错误、重试和限流等待
+"""
+
+import time
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QHeaderView, QTableWidgetItem
+from qfluentwidgets import (
+    TableWidget, PushButton, FluentIcon as FIF, InfoBar, MessageBox,
+    StrongBodyLabel, BodyLabel, ComboBox
+)
+
+from ..common.database import db
+from ..dns.metrics import metrics, summarize_buckets, BUCKET_BOUNDS
+
+
+# 时间范围选项：(显示文本, 秒数)，None 表示本次运行的内存统计
+TIME_RANGES = [
+    ('本次运行', None),
+    ('最近1小时', 3600),
+    ('最近24小时', 86400),
+    ('最近7天', 7 * 86400),
+]
+
+
+def format_ms(value):
+    """格式化毫秒数"""
+    if value >= 1000:
+        return f'{value / 1000:.2f} s'
+    return f'{value:.0f} ms'
+
+
+class DiagnosticsInterface(QWidget):
+    """诊断界面"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.init_ui()
+        
+        # 自动刷新定时器，只在页面显示期间运行（见 showEvent/hideEvent）
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(10000)  # 10秒刷新一次
+        self.refresh_timer.timeout.connect(self.load_metrics)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.load_metrics()
+        self.refresh_timer.start()
+    
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_timer.stop()
+    
+    def init_ui(self):
+        """初始化UI"""
+        layout = QVBoxLayout(self)
+        
+        header_layout = QHBoxLayout()
+        header_layout.addWidget(StrongBodyLabel('API调用诊断'))
+        header_layout.addStretch()
+        
+        self.range_combo = ComboBox()
+        for text, seconds in TIME_RANGES:
+            self.range_combo.addItem(text, userData=seconds)
+        self.range_combo.currentIndexChanged.connect(self.load_metrics)
+        header_layout.addWidget(BodyLabel('时间范围:'))
+        header_layout.addWidget(self.range_combo)
+        
+        self.refresh_button = PushButton('刷新', self)
+        self.refresh_button.setIcon(FIF.SYNC)
+        self.refresh_button.clicked.connect(self.load_metrics)
+        header_layout.addWidget(self.refresh_button)
+        
+        self.clear_button = PushButton('清空统计', self)
+        self.clear_button.setIcon(FIF.DELETE)
+        self.clear_button.clicked.connect(self.clear_metrics)
+        header_layout.addWidget(self.clear_button)
+        
+        layout.addLayout(header_layout)
+        
+        self.summary_label = BodyLabel('')
+        layout.addWidget(self.summary_label)
+        
+        self.table = TableWidget(self)
+        self.table.setColumnCount(11)
+        self.table.setHorizontalHeaderLabels([
+            '提供商', '接口', '调用次数', '错误', 'p50', 'p95', 'p99', '最大',
+            '平均响应', '重试', '限流等待'
+        ])
+        
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        
+        layout.addWidget(self.table)
+    
+    def get_histograms(self):
+        """按当前时间范围获取直方图"""
+        seconds = self.range_combo.currentData()
+        if seconds is None:
+            return metrics.histograms()
+        
+        # 先写入内存中尚未落盘的样本，再在数据库中按延迟桶聚合
+        metrics.flush()
+        return summarize_buckets(db.get_provider_metric_buckets(time.time() - seconds, BUCKET_BOUNDS))
+    
+    def load_metrics(self):
+        """加载统计数据"""
+        try:
+            histograms = self.get_histograms()
+        except Exception as e:
+            InfoBar.error('错误', f'加载统计失败: {str(e)}', parent=self)
+            return
+        
+        # 按p95从慢到快排序，最需要关注的接口排在前面
+        items = sorted(histograms.items(), key=lambda item: item[1].percentile(95), reverse=True)
+        self.table.setRowCount(len(items))
+        
+        total = errors = 0
+        for row, ((provider, action), histogram) in enumerate(items):
+            total += histogram.count
+            errors += histogram.errors
+            values = [
+                provider,
+                action,
+                str(histogram.count),
+                str(histogram.errors),
+                format_ms(histogram.percentile(50)),
+                format_ms(histogram.percentile(95)),
+                format_ms(histogram.percentile(99)),
+                format_ms(histogram.max_ms),
+                f'{histogram.bytes / histogram.count / 1024:.1f} KB' if histogram.count else '-',
+                str(histogram.retries),
+                format_ms(histogram.throttle_ms),
+            ]
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+        
+        self.summary_label.setText(f'共 {total} 次调用，{errors} 次失败，{len(items)} 个接口')
+    
+    def clear_metrics(self):
+        """清空统计"""
+        msg_box = MessageBox('确认清空', '确定要清空所有API调用统计吗？', self)
+        if msg_box.exec_():
+            metrics.flush()
+            metrics.reset()
+            db.clear_provider_metrics()
+            self.load_metrics()
+            InfoBar.success('成功', '统计已清空', parent=self)
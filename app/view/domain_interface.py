@@ -3,28 +3,24 @@
 域名管理界面
 """
 
-import json
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+import time
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QIcon  # Import QIcon
 from PyQt5.QtWidgets import QWidget, QHeaderView, QTableWidgetItem, QListWidgetItem, QHBoxLayout, QDialog
 from qfluentwidgets import (
     TableWidget, PushButton, FluentIcon as FIF, InfoBar, InfoBarPosition,
     MessageBox, LineEdit, ComboBox, CardWidget, 
     StrongBodyLabel, BodyLabel, PrimaryPushButton, TransparentPushButton,
-    IndeterminateProgressBar, VBoxLayout, ListWidget
+    IndeterminateProgressBar, ProgressBar, VBoxLayout, ListWidget
 )
 
 from ..common.database import db
-from ..dns.base import DNSProviderFactory
-
-
-def get_provider_config(provider_id):
-    """获取DNS提供商配置的公共方法"""
-    providers = db.get_dns_providers()
-    for provider in providers:
-        if provider['id'] == provider_id:
-            return provider
-    return None
+from ..common.sync import SyncJob
+from ..common.profiler import profiled
+from ..common.registry import provider_registry
+from ..common.singleflight import fetch_records
+from ..dns.base import CancelToken
+from ..dns import aliyun, tencent, cloudflare, simulated, rfc2136  # 导入所有提供商实现
 
 
 class DomainFetchWorker(QThread):
@@ -35,12 +31,21 @@ class DomainFetchWorker(QThread):
     def __init__(self, provider_data):
         super().__init__()
         self.provider_data = provider_data
+        self.cancel_token = CancelToken()
+    
+    def cancel(self):
+        """请求取消，在下一页请求之前停止"""
+        self.cancel_token.cancel()
     
+    @profiled
     def run(self):
         try:
-            # 创建DNS提供商实例
-            config = json.loads(self.provider_data['config'])
-            provider = DNSProviderFactory.create(self.provider_data['type'], config)
+            # 创建DNS提供商实例（配置由注册表缓存）
+            provider = provider_registry.create(self.provider_data['id'])
+            if provider is None:
+                self.finished.emit(False, [], '未找到DNS提供商配置')
+                return
+            provider.cancel_token = self.cancel_token
             
             # 获取域名列表
             domains = provider.get_domains()
@@ -57,18 +62,27 @@ class RecordCountWorker(QThread):
     
     def __init__(self, row, domain_data, provider_data):
         super().__init__()
-        self.row = row
+        self.row = row  # 列表刷新后可能由界面更新
         self.domain_data = domain_data
         self.provider_data = provider_data
+        self.cancel_token = CancelToken()
+    
+    def cancel(self):
+        """请求取消，在下一页请求之前停止"""
+        self.cancel_token.cancel()
     
+    @profiled
     def run(self):
         try:
-            # 创建DNS提供商实例
-            config = json.loads(self.provider_data['config'])
-            provider = DNSProviderFactory.create(self.provider_data['type'], config)
+            # 创建DNS提供商实例（配置由注册表缓存）
+            provider = provider_registry.create(self.provider_data['id'])
+            if provider is None:
+                self.finished.emit(self.row, -1, '未找到DNS提供商配置')
+                return
+            provider.cancel_token = self.cancel_token
             
-            # 获取记录列表
-            records = provider.get_records(self.domain_data['domain'])
+            # 获取记录列表，与记录界面同时读取同一域名时共享一次请求
+            records = fetch_records(provider, self.provider_data['id'], self.domain_data['domain'])
             
             self.finished.emit(self.row, len(records), '')
         except Exception as e:
@@ -144,7 +158,9 @@ class DomainAddDialog(QDialog):
             self.provider_combo.addItem(text=provider['name'], icon=QIcon(), userData=provider)
     
     def on_provider_changed(self):
-        """提供商选择改变"""
+        """提供商选择改变，取消正在获取的上一个提供商的域名列表"""
+        if self.fetch_worker and self.fetch_worker.isRunning():
+            self.fetch_worker.cancel()
         if hasattr(self, 'domain_list'):
             self.domain_list.clear()
         if hasattr(self, 'save_button'):
@@ -161,19 +177,24 @@ class DomainAddDialog(QDialog):
             InfoBar.warning('警告', '正在获取域名列表，请稍候', parent=self)
             return
         
-        self.fetch_worker = DomainFetchWorker(self.current_provider_data)
-        self.fetch_worker.finished.connect(self.on_fetch_finished)
+        worker = DomainFetchWorker(self.current_provider_data)
+        worker.finished.connect(lambda success, domains, error_msg, w=worker: self.on_fetch_finished(
+            success, domains, error_msg, w))
+        self.fetch_worker = worker
         
         self.progress_bar.show()
         self.fetch_button.setEnabled(False)
         
         self.fetch_worker.start()
     
-    def on_fetch_finished(self, success, domains, error_msg):
+    def on_fetch_finished(self, success, domains, error_msg, worker=None):
         """获取域名完成"""
         self.progress_bar.hide()
         self.fetch_button.setEnabled(True)
         
+        if worker is not None and worker.cancel_token.cancelled:
+            return  # 已切换提供商或关闭对话框
+        
         if not success:
             InfoBar.error('错误', f'获取域名列表失败: {error_msg}', parent=self)
             return
@@ -226,6 +247,158 @@ class DomainAddDialog(QDialog):
                 InfoBar.warning('警告', '没有可添加的域名', parent=self)
         except Exception as e:
             InfoBar.error('错误', f'添加失败: {str(e)}', parent=self)
+    
+    def stop_fetch(self):
+        """取消正在进行的域名列表获取并等待线程退出"""
+        if self.fetch_worker and self.fetch_worker.isRunning():
+            self.fetch_worker.cancel()
+            self.fetch_worker.wait()
+    
+    def closeEvent(self, event):
+        self.stop_fetch()
+        super().closeEvent(event)
+    
+    def reject(self):
+        self.stop_fetch()
+        super().reject()
+
+
+class SyncAllWorker(QThread):
+    """全量同步工作线程"""
+    
+    progress = pyqtSignal(object)  # SyncStats
+    finished = pyqtSignal(object)  # SyncStats
+    
+    # 进度信号的最小间隔（秒），避免大量域名时刷爆事件队列
+    PROGRESS_INTERVAL = 0.2
+    
+    def __init__(self):
+        super().__init__()
+        self.job = SyncJob()
+        self.last_progress = 0.0
+    
+    def on_progress(self, stats):
+        now = time.monotonic()
+        if now - self.last_progress >= self.PROGRESS_INTERVAL:
+            self.last_progress = now
+            self.progress.emit(stats)
+    
+    def cancel(self):
+        self.job.cancel()
+    
+    @profiled
+    def run(self):
+        try:
+            stats = self.job.run(self.on_progress)
+        except Exception as e:
+            stats = self.job.stats.snapshot()
+            stats.errors.append(str(e))
+            stats.finished_at = time.monotonic()
+        self.finished.emit(stats)
+
+
+class SyncAllDialog(QDialog):
+    """全量同步对话框"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.worker = None
+        self.init_ui()
+    
+    def init_ui(self):
+        """初始化UI"""
+        self.setWindowTitle('同步全部')
+        self.resize(520, 420)
+        
+        layout = VBoxLayout(self)
+        layout.addWidget(BodyLabel('并发同步所有DNS提供商的域名和记录到本地'))
+        
+        self.progress_bar = ProgressBar(self)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+        
+        self.status_label = BodyLabel('准备中...')
+        layout.addWidget(self.status_label)
+        self.rate_label = BodyLabel('')
+        layout.addWidget(self.rate_label)
+        
+        layout.addWidget(BodyLabel('错误:'))
+        self.error_list = ListWidget()
+        layout.addWidget(self.error_list)
+        
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        
+        self.cancel_button = TransparentPushButton('取消', self)
+        self.cancel_button.clicked.connect(self.cancel_sync)
+        button_layout.addWidget(self.cancel_button)
+        
+        self.close_button = PrimaryPushButton('关闭', self)
+        self.close_button.clicked.connect(self.accept)
+        self.close_button.setEnabled(False)
+        button_layout.addWidget(self.close_button)
+        
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+    
+    def start(self):
+        """启动同步"""
+        self.worker = SyncAllWorker()
+        self.worker.progress.connect(self.update_stats)
+        self.worker.finished.connect(self.on_finished)
+        self.worker.start()
+    
+    def update_stats(self, stats):
+        """刷新进度与吞吐"""
+        if stats.zones_total:
+            self.progress_bar.setValue(int(stats.zones_done * 100 / stats.zones_total))
+        self.status_label.setText(
+            f'提供商 {stats.providers} 个，域名 {stats.zones_done}/{stats.zones_total}，'
+            f'记录 {stats.records} 条，新增域名 {stats.domains_added} 个'
+        )
+        self.rate_label.setText(
+            f'{stats.zones_per_sec:.1f} 域名/秒，{stats.records_per_sec:.0f} 记录/秒，'
+            f'错误 {len(stats.errors)} 个，耗时 {stats.elapsed:.1f} 秒'
+        )
+        for error in stats.errors[self.error_list.count():]:
+            self.error_list.addItem(error)
+    
+    def on_finished(self, stats):
+        """同步完成"""
+        self.update_stats(stats)
+        self.progress_bar.setValue(100)
+        self.cancel_button.setEnabled(False)
+        self.close_button.setEnabled(True)
+        
+        summary = f'同步域名 {stats.zones_done} 个，记录 {stats.records} 条'
+        if stats.cancelled:
+            summary = f'已取消，{summary}'
+        db.add_operation_log('sync', 'domain', None, f'全量同步: {summary}',
+                             'error' if stats.errors else 'success',
+                             f'{len(stats.errors)} 个错误' if stats.errors else None)
+    
+    def cancel_sync(self):
+        """取消同步"""
+        if self.worker and self.worker.isRunning():
+            self.worker.cancel()
+            self.cancel_button.setEnabled(False)
+            self.status_label.setText('正在取消...')
+        else:
+            self.reject()
+    
+    def closeEvent(self, event):
+        """同步进行中时先取消并等待线程退出"""
+        if self.worker and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.wait()
+        super().closeEvent(event)
+    
+    def reject(self):
+        if self.worker and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.wait()
+        super().reject()
 
 
 class DomainInterface(QWidget):
@@ -234,8 +407,10 @@ class DomainInterface(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.record_count_workers = {}  # 存储记录数量工作线程
+        self.stale_count_workers = set()  # 域名已不在列表中并取消、结果将被丢弃但尚未退出的线程
         self.init_ui()
-        self.load_domains()
+        # 首帧绘制后再读取数据库并发起记录数量请求
+        QTimer.singleShot(0, self.load_domains)
     
     def create_header_layout(self):
         """创建标题和按钮布局"""
@@ -248,6 +423,11 @@ class DomainInterface(QWidget):
         self.add_button.clicked.connect(self.add_domain)
         header_layout.addWidget(self.add_button)
         
+        self.sync_all_button = PushButton('同步全部', self)
+        self.sync_all_button.setIcon(FIF.CLOUD_DOWNLOAD)
+        self.sync_all_button.clicked.connect(self.sync_all)
+        header_layout.addWidget(self.sync_all_button)
+        
         self.refresh_button = PushButton('刷新', self)
         self.refresh_button.setIcon(FIF.SYNC)
         self.refresh_button.clicked.connect(self.load_domains)
@@ -280,16 +460,23 @@ class DomainInterface(QWidget):
         # 添加域名表格
         layout.addWidget(self.create_table())
     
+    @profiled
     def load_domains(self):
         """加载域名列表"""
         domains = db.get_domains()
         self.table.setRowCount(len(domains))
         
-        # 清理之前的工作线程
+        # 仍在列表中的域名沿用正在运行的工作线程（更新行号），其余的取消，在下一页请求前停止（结果丢弃）
+        running = {}
         for worker in self.record_count_workers.values():
-            if worker.isRunning():
-                worker.terminate()
-                worker.wait()
+            if worker.isRunning() and not worker.cancel_token.cancelled:
+                running[worker.domain_data['id']] = worker
+        listed = {domain['id'] for domain in domains}
+        for domain_id, worker in list(running.items()):
+            if domain_id not in listed:
+                worker.cancel()
+                self.stale_count_workers.add(worker)
+                del running[domain_id]
         self.record_count_workers.clear()
         
         for row, domain in enumerate(domains):
@@ -306,7 +493,12 @@ class DomainInterface(QWidget):
             self.table.setCellWidget(row, 3, self.create_action_buttons(domain))
             
             # 异步获取记录数量
-            self.load_record_count(row, domain)
+            worker = running.get(domain['id'])
+            if worker is not None:
+                worker.row = row
+                self.record_count_workers[row] = worker
+            else:
+                self.load_record_count(row, domain)
     
     def create_action_buttons(self, domain):
         """创建操作按钮组件"""
@@ -330,24 +522,31 @@ class DomainInterface(QWidget):
         """异步加载域名记录数量"""
         try:
             # 获取DNS提供商配置
-            provider_data = get_provider_config(domain['provider_id'])
+            provider_data = provider_registry.get(domain['provider_id'])
             if not provider_data:
                 self.table.setItem(row, 1, QTableWidgetItem('配置错误'))
                 return
             
             # 创建并启动记录数量工作线程
             worker = RecordCountWorker(row, domain, provider_data)
-            worker.finished.connect(self.on_record_count_finished)
+            worker.finished.connect(lambda row, count, error_message, w=worker: self.on_record_count_finished(
+                row, count, error_message, w))
             self.record_count_workers[row] = worker
             worker.start()
             
         except Exception as e:
             self.table.setItem(row, 1, QTableWidgetItem('加载失败'))
     
-    def on_record_count_finished(self, row, count, error_message):
+    def on_record_count_finished(self, row, count, error_message, worker=None):
         """记录数量加载完成回调"""
-        if row in self.record_count_workers:
-            del self.record_count_workers[row]
+        if worker is not None:
+            row = worker.row  # 列表刷新后沿用的线程发出的可能是旧行号
+            if self.record_count_workers.get(row) is not worker:
+                # 域名已不在列表中，丢弃结果；run() 已执行到最后，等待线程结束后再释放
+                worker.wait()
+                self.stale_count_workers.discard(worker)
+                return
+        self.record_count_workers.pop(row, None)
         
         if error_message:
             self.table.setItem(row, 1, QTableWidgetItem('加载失败'))
@@ -362,21 +561,38 @@ class DomainInterface(QWidget):
         if dialog.exec_() == QDialog.Accepted:
             self.load_domains()
             # 同时刷新记录管理界面的域名列表
-            main_window = self.window()
-            if hasattr(main_window, 'record_interface'):
-                main_window.record_interface.load_domains()
+            self.refresh_record_domains()
             InfoBar.success('成功', '域名添加成功', parent=self)
     
+    def sync_all(self):
+        """并发同步所有提供商的域名和记录"""
+        if not db.get_dns_providers():
+            InfoBar.warning('警告', '请先添加DNS提供商', parent=self)
+            return
+        
+        dialog = SyncAllDialog(self)
+        dialog.start()
+        dialog.exec_()
+        self.load_domains()
+        self.refresh_record_domains()
+    
 
     
+    def refresh_record_domains(self):
+        """刷新记录管理界面的域名列表（该界面尚未创建时无需刷新）"""
+        main_window = self.window()
+        if hasattr(main_window, 'get_interface'):
+            record_interface = main_window.get_interface('record', create=False)
+            if record_interface:
+                record_interface.load_domains()
+    
     def manage_records(self, domain):
         """管理DNS记录"""
         # 切换到DNS记录界面，并传递域名信息
         main_window = self.window()  # 使用window()方法获取顶级窗口
-        if hasattr(main_window, 'record_interface'):
+        if hasattr(main_window, 'get_interface'):
             main_window.record_interface.set_current_domain(domain)
-            main_window.stackedWidget.setCurrentWidget(main_window.record_interface)
-            main_window.navigationInterface.setCurrentItem(main_window.record_interface.objectName())
+            main_window.switch_to_interface('record')
         else:
             InfoBar.error('错误', '无法找到记录管理界面', parent=self)
     
@@ -392,20 +608,13 @@ class DomainInterface(QWidget):
         
         if msg_box.exec_():
             try:
-                # 删除域名下的所有记录
-                records = db.get_dns_records(domain['id'])
-                for record in records:
-                    db.delete_dns_record(record['id'])
-                
-                # 删除域名
+                # 删除域名，域名下的记录由外键级联删除
                 db.delete_domain(domain['id'])
                 
                 db.add_operation_log('delete', 'domain', domain['id'], f'本地删除域名: {domain["domain"]}')
                 self.load_domains()
                 # 同时刷新记录管理界面的域名列表
-                main_window = self.window()
-                if hasattr(main_window, 'record_interface'):
-                    main_window.record_interface.load_domains()
+                self.refresh_record_domains()
                 InfoBar.success('成功', '域名删除成功', parent=self)
             except Exception as e:
                 InfoBar.error('错误', f'删除失败: {str(e)}', parent=self)
\ No newline at end of file
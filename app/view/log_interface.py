@@ -12,6 +12,7 @@ from qfluentwidgets import (
 )
 
 from ..common.database import db
+from ..common.profiler import profiled
 
 
 class LogInterface(QWidget):
@@ -20,7 +21,8 @@ class LogInterface(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.init_ui()
-        self.load_logs()
+        # 首帧绘制后再读取数据库
+        QTimer.singleShot(0, self.load_logs)
         
         # 设置自动刷新定时器
         self.refresh_timer = QTimer()
@@ -38,13 +40,13 @@ class LogInterface(QWidget):
         
         # 筛选控件
         self.operation_combo = ComboBox()
-        self.operation_combo.addItems(['全部操作', 'create', 'update', 'delete', 'sync'])
+        self.operation_combo.addItems(['全部操作', 'create', 'update', 'delete', 'sync', 'drift', 'maintenance'])
         self.operation_combo.currentTextChanged.connect(self.filter_logs)
         header_layout.addWidget(BodyLabel('操作类型:'))
         header_layout.addWidget(self.operation_combo)
         
         self.target_combo = ComboBox()
-        self.target_combo.addItems(['全部类型', 'provider', 'domain', 'record'])
+        self.target_combo.addItems(['全部类型', 'provider', 'domain', 'record', 'database'])
         self.target_combo.currentTextChanged.connect(self.filter_logs)
         header_layout.addWidget(BodyLabel('目标类型:'))
         header_layout.addWidget(self.target_combo)
@@ -128,6 +130,7 @@ class LogInterface(QWidget):
         
         return card
     
+    @profiled
     def load_logs(self):
         """加载操作日志"""
         try:
@@ -194,6 +197,7 @@ class LogInterface(QWidget):
         
         self.display_logs(filtered_logs)
     
+    @profiled
     def display_logs(self, logs):
         """显示日志"""
         self.table.setRowCount(len(logs))
@@ -240,7 +244,9 @@ class LogInterface(QWidget):
             'create': '创建',
             'update': '更新',
             'delete': '删除',
-            'sync': '同步'
+            'sync': '同步',
+            'drift': '外部修改',
+            'maintenance': '维护'
         }
         return operation_map.get(operation, operation)
     
@@ -249,7 +255,8 @@ class LogInterface(QWidget):
         target_map = {
             'provider': 'DNS提供商',
             'domain': '域名',
-            'record': 'DNS记录'
+            'record': 'DNS记录',
+            'database': '数据库'
         }
         return target_map.get(target_type, target_type)
     
@@ -3,29 +3,72 @@
 主窗口实现
 """
 
-from PyQt5.QtCore import Qt, QSize
-from PyQt5.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout
+import importlib
+import threading
+from PyQt5.QtCore import Qt, QSize, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QApplication
 from qfluentwidgets import (
     NavigationInterface, NavigationItemPosition, NavigationWidget,
-    qrouter, FluentIcon as FIF, FluentWindow, SplashScreen
+    qrouter, FluentIcon as FIF, FluentWindow, SplashScreen, InfoBar, InfoBarPosition
 )
 
-from .provider_interface import ProviderInterface
-from .domain_interface import DomainInterface
-from .record_interface import RecordInterface
-from .log_interface import LogInterface
-from .setting_interface import SettingInterface
 from ..common.config import cfg
+from ..common.profiler import profiler
+
+# 启动后延迟执行数据库维护的时间（毫秒）
+MAINTENANCE_DELAY_MS = 60000
+
+
+class LazyInterface(QWidget):
+    """延迟创建的子界面容器，首次切换到该页面时才导入模块并创建真实界面"""
+    
+    def __init__(self, module_name, class_name, object_name, parent=None):
+        super().__init__(parent)
+        self.setObjectName(object_name)
+        self.module_name = module_name
+        self.class_name = class_name
+        self.interface = None
+        
+        self.v_layout = QVBoxLayout(self)
+        self.v_layout.setContentsMargins(0, 0, 0, 0)
+    
+    def is_created(self):
+        """真实界面是否已创建"""
+        return self.interface is not None
+    
+    def ensure_created(self):
+        """创建并返回真实界面"""
+        if self.interface is None:
+            module = importlib.import_module(self.module_name, __package__)
+            self.interface = getattr(module, self.class_name)(self)
+            self.v_layout.addWidget(self.interface)
+        return self.interface
 
 
 class MainWindow(FluentWindow):
     """主窗口"""
     
+    # 漂移检测事件由后台线程发出，经信号转到界面线程处理
+    driftDetected = pyqtSignal(object)
+    # cfg.configChanged 在调用 set 的线程中触发（如后台维护线程），同样转到界面线程处理
+    configChanged = pyqtSignal(str, object)
+    
     def __init__(self):
         super().__init__()
         self.init_window()
-        self.init_navigation()
+        self.init_profiling()
+        self.init_drift()
+        self.init_maintenance()
         
+        # 显示启动画面，子界面在窗口首帧绘制之后再创建
+        self.splash_screen = SplashScreen(self.windowIcon(), self)
+        self.splash_screen.setIconSize(QSize(102, 102))
+        self.show()
+        QApplication.processEvents()
+        
+        self.init_navigation()
+        self.splash_screen.finish()
+    
     def init_window(self):
         """初始化窗口"""
         self.resize(cfg.get('window.width', 1200), cfg.get('window.height', 800))
@@ -38,43 +81,167 @@ class MainWindow(FluentWindow):
         if cfg.get('window.maximized', False):
             self.showMaximized()
     
-    def create_interfaces(self):
-        """创建所有子界面"""
-        self.provider_interface = ProviderInterface(self)
-        self.provider_interface.setObjectName('providerInterface')
-        
-        self.domain_interface = DomainInterface(self)
-        self.domain_interface.setObjectName('domainInterface')
+    def init_profiling(self):
+        """性能分析模式下定时发送事件循环心跳，用于检测界面卡顿"""
+        self.heartbeat_timer = QTimer(self)
+        self.heartbeat_timer.setInterval(50)
+        self.heartbeat_timer.timeout.connect(profiler.beat)
+        if profiler.running:
+            self.heartbeat_timer.start()
+        self.configChanged.connect(self.on_config_changed)
+        cfg.configChanged.connect(self.configChanged.emit)
+    
+    def init_drift(self):
+        """按配置启动后台漂移检测"""
+        self.drift_scheduler = None
+        self.driftDetected.connect(self.on_drift_detected)
+        if cfg.get('drift.enabled', False):
+            self.start_drift()
+    
+    def start_drift(self):
+        """启动漂移检测调度器"""
+        from ..common.drift import DriftScheduler
         
-        self.record_interface = RecordInterface(self)
-        self.record_interface.setObjectName('recordInterface')
+        if self.drift_scheduler is None:
+            self.drift_scheduler = DriftScheduler(
+                interval=cfg.get('drift.interval', 600),
+                min_interval=cfg.get('drift.min_interval', 60),
+                max_interval=cfg.get('drift.max_interval', 3600),
+                on_drift=self.driftDetected.emit
+            )
+        self.drift_scheduler.start()
+    
+    def stop_drift(self):
+        """停止漂移检测调度器"""
+        if self.drift_scheduler is not None:
+            self.drift_scheduler.stop()
+            self.drift_scheduler = None
+    
+    def init_maintenance(self):
+        """启动一段时间后在后台线程执行到期的数据库维护，避免与启动时的数据加载争用数据库"""
+        QTimer.singleShot(MAINTENANCE_DELAY_MS, self.start_maintenance)
+    
+    def start_maintenance(self):
+        from ..common.maintenance import run_due_maintenance
         
-        self.log_interface = LogInterface(self)
-        self.log_interface.setObjectName('logInterface')
+        def run():
+            try:
+                run_due_maintenance()
+            except Exception as e:
+                print(f"数据库维护失败: {e}")
         
-        self.setting_interface = SettingInterface(self)
-        self.setting_interface.setObjectName('settingInterface')
+        threading.Thread(target=run, name='db-maintenance', daemon=True).start()
+    
+    def on_drift_detected(self, event):
+        """提示检测到的外部修改，并刷新已打开的日志界面"""
+        InfoBar.warning(
+            '检测到记录变化',
+            f'{event.domain} 在其他地方被修改：{event.summary()}',
+            duration=5000,
+            position=InfoBarPosition.TOP_RIGHT,
+            parent=self
+        )
+        log_interface = self.get_interface('log', create=False)
+        if log_interface is not None:
+            log_interface.load_logs()
+    
+    def on_config_changed(self, key, value):
+        """在设置中开关性能分析模式或漂移检测时立即生效"""
+        if key == 'profiling.enabled':
+            if value:
+                profiler.start(cfg.get('profiling.block_threshold_ms', 200))
+                self.heartbeat_timer.start()
+            else:
+                self.heartbeat_timer.stop()
+                profiler.stop()
+        elif key == 'drift.enabled':
+            if value:
+                self.start_drift()
+            else:
+                self.stop_drift()
+    
+    def create_interfaces(self):
+        """创建所有子界面容器，真实界面在首次导航时创建"""
+        self.interfaces = {
+            'provider': LazyInterface('.provider_interface', 'ProviderInterface', 'providerInterface', self),
+            'domain': LazyInterface('.domain_interface', 'DomainInterface', 'domainInterface', self),
+            'record': LazyInterface('.record_interface', 'RecordInterface', 'recordInterface', self),
+            'log': LazyInterface('.log_interface', 'LogInterface', 'logInterface', self),
+            'diagnostics': LazyInterface('.diagnostics_interface', 'DiagnosticsInterface', 'diagnosticsInterface', self),
+            'setting': LazyInterface('.setting_interface', 'SettingInterface', 'settingInterface', self),
+        }
+    
+    def get_interface(self, key, create=True):
+        """获取子界面，create为False时未创建的界面返回None"""
+        container = self.interfaces[key]
+        if not create and not container.is_created():
+            return None
+        return container.ensure_created()
+    
+    @property
+    def provider_interface(self):
+        return self.get_interface('provider')
+    
+    @property
+    def domain_interface(self):
+        return self.get_interface('domain')
+    
+    @property
+    def record_interface(self):
+        return self.get_interface('record')
+    
+    @property
+    def log_interface(self):
+        return self.get_interface('log')
+    
+    @property
+    def diagnostics_interface(self):
+        return self.get_interface('diagnostics')
+    
+    @property
+    def setting_interface(self):
+        return self.get_interface('setting')
+    
+    def switch_to_interface(self, key):
+        """切换到指定子界面"""
+        self.switchTo(self.interfaces[key])
+    
+    def switchTo(self, interface):
+        """切换页面前先创建真实界面，保证切换动画显示的是实际内容"""
+        if isinstance(interface, LazyInterface):
+            interface.ensure_created()
+        super().switchTo(interface)
+    
+    def on_current_interface_changed(self, index):
+        """页面改变时创建真实界面（如通过返回按钮切换）"""
+        widget = self.stackedWidget.widget(index)
+        if isinstance(widget, LazyInterface):
+            widget.ensure_created()
     
     def setup_navigation(self):
         """设置导航栏"""
         # 添加导航项
-        self.addSubInterface(self.provider_interface, FIF.CLOUD, 'DNS提供商')
-        self.addSubInterface(self.domain_interface, FIF.GLOBE, '域名管理')
-        self.addSubInterface(self.record_interface, FIF.EDIT, 'DNS记录')
+        self.addSubInterface(self.interfaces['provider'], FIF.CLOUD, 'DNS提供商')
+        self.addSubInterface(self.interfaces['domain'], FIF.GLOBE, '域名管理')
+        self.addSubInterface(self.interfaces['record'], FIF.EDIT, 'DNS记录')
         
         self.navigationInterface.addSeparator()
         
-        self.addSubInterface(self.log_interface, FIF.HISTORY, '操作日志')
+        self.addSubInterface(self.interfaces['log'], FIF.HISTORY, '操作日志')
+        self.addSubInterface(self.interfaces['diagnostics'], FIF.SPEED_HIGH, '诊断')
         
         # 添加设置页面到底部
         self.addSubInterface(
-            self.setting_interface, FIF.SETTING, '设置', 
+            self.interfaces['setting'], FIF.SETTING, '设置',
             NavigationItemPosition.BOTTOM
         )
         
+        self.stackedWidget.currentChanged.connect(self.on_current_interface_changed)
+        
         # 设置默认界面
-        self.stackedWidget.setCurrentWidget(self.provider_interface)
-        self.navigationInterface.setCurrentItem(self.provider_interface.objectName())
+        self.interfaces['provider'].ensure_created()
+        self.stackedWidget.setCurrentWidget(self.interfaces['provider'])
+        self.navigationInterface.setCurrentItem(self.interfaces['provider'].objectName())
     
     def init_navigation(self):
         """初始化导航栏"""
@@ -92,4 +259,7 @@ class MainWindow(FluentWindow):
             cfg.set('window.height', self.height())
         
         cfg.save_config()
-        event.accept()
\ No newline at end of file
+        self.heartbeat_timer.stop()
+        profiler.stop()
+        self.stop_drift()
+        event.accept()
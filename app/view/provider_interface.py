@@ -4,7 +4,7 @@ DNS提供商管理界面
 """
 
 import json
-from PyQt5.QtCore import Qt, pyqtSignal, QThread
+from PyQt5.QtCore import Qt, pyqtSignal, QThread, QTimer
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QHeaderView, QDialog, QTableWidgetItem
 from qfluentwidgets import (
     TableWidget, PushButton, FluentIcon as FIF, InfoBar, InfoBarPosition,
@@ -13,8 +13,9 @@ from qfluentwidgets import (
 )
 
 from ..common.database import db
+from ..common.profiler import profiled
 from ..dns.base import DNSProviderFactory
-from ..dns import aliyun, tencent, cloudflare  # 导入所有提供商实现
+from ..dns import aliyun, tencent, cloudflare, simulated, rfc2136  # 导入所有提供商实现
 
 
 class ProviderConfigDialog(QDialog):
@@ -44,7 +45,7 @@ class ProviderConfigDialog(QDialog):
         # 提供商类型
         layout.addWidget(BodyLabel('提供商类型:'))
         self.type_combo = ComboBox()
-        self.type_combo.addItems(['aliyun', 'tencent', 'cloudflare'])
+        self.type_combo.addItems(['aliyun', 'tencent', 'cloudflare', 'rfc2136', 'simulated', 'memory'])
         self.type_combo.currentTextChanged.connect(self.on_type_changed)
         layout.addWidget(self.type_combo)
         
@@ -115,15 +116,55 @@ class ProviderConfigDialog(QDialog):
         self.tencent_secret_key_edit.setPlaceholderText('请输入Secret Key')
         tencent_layout.addWidget(self.tencent_secret_key_edit)
         
+        # RFC 2136（自建权威DNS服务器）配置界面
+        self.rfc2136_widget = QWidget()
+        rfc2136_layout = QVBoxLayout(self.rfc2136_widget)
+        rfc2136_layout.addWidget(BodyLabel('服务器地址:'))
+        self.rfc2136_server_edit = LineEdit()
+        self.rfc2136_server_edit.setPlaceholderText('如 192.0.2.53 或 ns1.example.com')
+        rfc2136_layout.addWidget(self.rfc2136_server_edit)
+        rfc2136_layout.addWidget(BodyLabel('端口:'))
+        self.rfc2136_port_edit = LineEdit()
+        self.rfc2136_port_edit.setPlaceholderText('53')
+        rfc2136_layout.addWidget(self.rfc2136_port_edit)
+        rfc2136_layout.addWidget(BodyLabel('区域（多个用逗号分隔）:'))
+        self.rfc2136_zones_edit = LineEdit()
+        self.rfc2136_zones_edit.setPlaceholderText('example.com, example.net')
+        rfc2136_layout.addWidget(self.rfc2136_zones_edit)
+        rfc2136_layout.addWidget(BodyLabel('TSIG密钥名称（可留空）:'))
+        self.rfc2136_key_name_edit = LineEdit()
+        self.rfc2136_key_name_edit.setPlaceholderText('如 update-key')
+        rfc2136_layout.addWidget(self.rfc2136_key_name_edit)
+        rfc2136_layout.addWidget(BodyLabel('TSIG密钥（Base64）:'))
+        self.rfc2136_secret_edit = LineEdit()
+        self.rfc2136_secret_edit.setPlaceholderText('请输入TSIG密钥')
+        rfc2136_layout.addWidget(self.rfc2136_secret_edit)
+        rfc2136_layout.addWidget(BodyLabel('TSIG算法:'))
+        self.rfc2136_algorithm_combo = ComboBox()
+        self.rfc2136_algorithm_combo.addItems(['hmac-sha256', 'hmac-sha512', 'hmac-sha1', 'hmac-md5'])
+        rfc2136_layout.addWidget(self.rfc2136_algorithm_combo)
+        
+        # 模拟提供商配置界面
+        self.simulated_widget = QWidget()
+        simulated_layout = QVBoxLayout(self.simulated_widget)
+        simulated_layout.addWidget(BodyLabel('模拟参数（JSON，可留空）:'))
+        self.simulated_config_edit = LineEdit()
+        self.simulated_config_edit.setPlaceholderText('{"zones": 1000, "records": 1000, "latency_ms": 50, "error_rate": 0.01}')
+        simulated_layout.addWidget(self.simulated_config_edit)
+        
         # 将所有配置界面添加到布局中，但先隐藏
         self.config_layout.addWidget(self.cloudflare_widget)
         self.config_layout.addWidget(self.aliyun_widget)
         self.config_layout.addWidget(self.tencent_widget)
+        self.config_layout.addWidget(self.rfc2136_widget)
+        self.config_layout.addWidget(self.simulated_widget)
         
         # 初始时隐藏所有配置界面
         self.cloudflare_widget.hide()
         self.aliyun_widget.hide()
         self.tencent_widget.hide()
+        self.rfc2136_widget.hide()
+        self.simulated_widget.hide()
     
     def on_type_changed(self, provider_type):
         """提供商类型改变"""
@@ -131,6 +172,8 @@ class ProviderConfigDialog(QDialog):
         self.cloudflare_widget.hide()
         self.aliyun_widget.hide()
         self.tencent_widget.hide()
+        self.rfc2136_widget.hide()
+        self.simulated_widget.hide()
         
         # 根据提供商类型显示对应的配置界面
         if provider_type == 'cloudflare':
@@ -142,6 +185,12 @@ class ProviderConfigDialog(QDialog):
         elif provider_type == 'tencent':
             self.tencent_widget.show()
             self.example_label.setText('请输入您的腾讯云Secret ID和Key，可在腾讯云控制台的"访问管理" → "API密钥管理"中获取。')
+        elif provider_type == 'rfc2136':
+            self.rfc2136_widget.show()
+            self.example_label.setText('通过AXFR/IXFR读取、RFC 2136动态更新修改自建的权威DNS服务器（BIND、Knot等），服务器需允许本机（或TSIG密钥）进行区域传输和动态更新。')
+        elif provider_type in ('simulated', 'memory'):
+            self.simulated_widget.show()
+            self.example_label.setText('模拟提供商不访问网络，按参数生成确定性的测试数据，可设置 zones、records、seed、latency_ms、error_rate、throttle_rps 等，用于压力测试。')
         else:
             self.example_label.setText('请选择DNS提供商类型。')
     
@@ -167,6 +216,36 @@ class ProviderConfigDialog(QDialog):
             elif provider_type == 'tencent':
                 self.tencent_secret_id_edit.setText(config.get('secret_id', ''))
                 self.tencent_secret_key_edit.setText(config.get('secret_key', ''))
+            elif provider_type == 'rfc2136':
+                self.rfc2136_server_edit.setText(config.get('server', ''))
+                self.rfc2136_port_edit.setText(str(config.get('port', '')))
+                zones = config.get('zones', [])
+                self.rfc2136_zones_edit.setText(', '.join(zones) if isinstance(zones, list) else zones)
+                self.rfc2136_key_name_edit.setText(config.get('tsig_key_name', ''))
+                self.rfc2136_secret_edit.setText(config.get('tsig_secret', ''))
+                self.rfc2136_algorithm_combo.setCurrentText(config.get('tsig_algorithm', 'hmac-sha256'))
+            elif provider_type in ('simulated', 'memory'):
+                self.simulated_config_edit.setText(json.dumps(config, ensure_ascii=False) if config else '')
+    
+    def rfc2136_config(self):
+        """收集RFC 2136配置，缺少必填项时提示并返回None"""
+        server = self.rfc2136_server_edit.text().strip()
+        zones = [z.strip() for z in self.rfc2136_zones_edit.text().split(',') if z.strip()]
+        port = self.rfc2136_port_edit.text().strip() or '53'
+        if not server or not zones:
+            InfoBar.warning('警告', '请输入服务器地址和区域', parent=self)
+            return None
+        if not port.isdigit():
+            InfoBar.warning('警告', '端口必须是数字', parent=self)
+            return None
+        return {
+            'server': server,
+            'port': int(port),
+            'zones': zones,
+            'tsig_key_name': self.rfc2136_key_name_edit.text().strip(),
+            'tsig_secret': self.rfc2136_secret_edit.text().strip(),
+            'tsig_algorithm': self.rfc2136_algorithm_combo.currentText()
+        }
     
     def test_connection(self):
         """测试连接"""
@@ -197,6 +276,17 @@ class ProviderConfigDialog(QDialog):
                     return
                 config['secret_id'] = secret_id
                 config['secret_key'] = secret_key
+            elif provider_type == 'rfc2136':
+                config = self.rfc2136_config()
+                if config is None:
+                    return
+            elif provider_type in ('simulated', 'memory'):
+                config_text = self.simulated_config_edit.text().strip()
+                try:
+                    config = json.loads(config_text) if config_text else {}
+                except json.JSONDecodeError:
+                    InfoBar.warning('警告', '模拟参数不是有效的JSON', parent=self)
+                    return
             
             provider = DNSProviderFactory.create(provider_type, config)
             if provider.test_connection():
@@ -241,6 +331,17 @@ class ProviderConfigDialog(QDialog):
                     return
                 config['secret_id'] = secret_id
                 config['secret_key'] = secret_key
+            elif provider_type == 'rfc2136':
+                config = self.rfc2136_config()
+                if config is None:
+                    return
+            elif provider_type in ('simulated', 'memory'):
+                config_text = self.simulated_config_edit.text().strip()
+                try:
+                    config = json.loads(config_text) if config_text else {}
+                except json.JSONDecodeError:
+                    InfoBar.warning('警告', '模拟参数不是有效的JSON', parent=self)
+                    return
             
             # 验证配置
             provider = DNSProviderFactory.create(provider_type, config)
@@ -273,7 +374,8 @@ class ProviderInterface(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.init_ui()
-        self.load_providers()
+        # 首帧绘制后再读取数据库
+        QTimer.singleShot(0, self.load_providers)
     
     def init_ui(self):
         """初始化UI"""
@@ -311,6 +413,7 @@ class ProviderInterface(QWidget):
         
         layout.addWidget(self.table)
     
+    @profiled
     def load_providers(self):
         """加载提供商列表"""
         providers = db.get_dns_providers()
@@ -389,7 +492,7 @@ class ProviderInterface(QWidget):
             self
         )
         
-        if msg_box.exec_() == MessageBox.Yes:
+        if msg_box.exec_():
             try:
                 db.delete_dns_provider(provider['id'])
                 db.add_operation_log('delete', 'provider', provider['id'], f'删除提供商: {provider["name"]}')
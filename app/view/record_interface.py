@@ -3,33 +3,49 @@
 DNS记录管理界面
 """
 
-import json
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QHeaderView, QSplitter, QTreeWidgetItem, QTableWidgetItem, QDialog
+import time
+from datetime import datetime, timezone
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QHeaderView, QSplitter, QTreeWidgetItem, QTableWidgetItem, QDialog, QFileDialog
 from qfluentwidgets import (
     TableWidget, PushButton, FluentIcon as FIF, InfoBar, InfoBarPosition,
     MessageBox, Dialog, LineEdit, ComboBox, CardWidget, TreeWidget,
     StrongBodyLabel, BodyLabel, PrimaryPushButton, TransparentPushButton,
-    SpinBox, TextEdit, IndeterminateProgressBar
+    SpinBox, TextEdit, IndeterminateProgressBar, ProgressBar, ListWidget
 )
 
 from ..common.database import db
-from ..dns.base import DNSProviderFactory, DNSRecord
+from ..common.profiler import profiled
+from ..common.registry import provider_registry
+from ..common.snapshot import snapshots
+from ..common.singleflight import fetch_records, forget_records
+from ..common.rollback import (
+    log_record_change, log_changes, plan_rollback_to_log, plan_rollback_to_snapshot, apply_rollback
+)
+from ..dns.base import DNSRecord, CancelToken
+from ..dns import aliyun, tencent, cloudflare, simulated, rfc2136  # 导入所有提供商实现
+from ..dns.changeset import apply_changes, record_content
+from ..dns.zonefile import write_zone, plan_zone_import
 
 
-def get_provider_config(domain_data):
-    """获取DNS提供商配置的公共方法"""
-    providers = db.get_dns_providers()
-    for provider in providers:
-        if provider['id'] == domain_data['provider_id']:
-            return provider
-    return None
+def cache_record_change(domain_id, old_record, new_record):
+    """
+    把单条记录的变更写入本地记录缓存（new_record 为None表示删除），
+    失败只打印，不影响远程操作的结果
+    """
+    try:
+        if new_record is None:
+            db.delete_cached_dns_record(domain_id, old_record.id)
+        else:
+            db.upsert_cached_dns_record(domain_id, new_record.to_dict(), old_record.id if old_record else None)
+    except Exception as e:
+        print(f"更新本地记录缓存失败: {e}")
 
 
 class RecordSaveWorker(QThread):
     """DNS记录保存工作线程"""
     
-    finished = pyqtSignal(bool, str)
+    finished = pyqtSignal(bool, object, str)  # success, 保存后的记录（含远程记录ID）, message
     
     def __init__(self, domain_data, record_data, name, record_type, value, ttl, priority, is_update=False):
         super().__init__()
@@ -42,21 +58,19 @@ class RecordSaveWorker(QThread):
         self.priority = priority
         self.is_update = is_update
     
+    @profiled
     def run(self):
         try:
-            # 获取DNS提供商配置
-            provider_data = get_provider_config(self.domain_data)
-            if not provider_data:
-                self.finished.emit(False, [], '未找到DNS提供商配置')
+            # 创建DNS提供商实例（配置由注册表缓存）
+            provider_id = self.domain_data['provider_id']
+            provider = provider_registry.create(provider_id)
+            if provider is None:
+                self.finished.emit(False, None, '未找到DNS提供商配置')
                 return
             
-            # 创建DNS提供商实例
-            config = json.loads(provider_data['config'])
-            provider = DNSProviderFactory.create(provider_data['type'], config)
-            
             # 创建DNS记录对象
             dns_record = DNSRecord(
-                id=self.record_data.get('id') if self.record_data else None,
+                id=self.record_data.id if self.record_data else None,
                 name=self.name,
                 type=self.record_type,
                 value=self.value,
@@ -67,64 +81,90 @@ class RecordSaveWorker(QThread):
             if self.is_update:
                 # 更新DNS记录到服务商
                 success = provider.update_record(self.domain_data['domain'], dns_record)
+                forget_records(provider_id, self.domain_data['domain'])
                 if success:
-                    # 记录操作日志
-                    db.add_operation_log('update', 'record', self.record_data.get('id', 0), 
-                                       f'更新DNS记录: {self.name}.{self.domain_data["domain"]}')
-                    self.finished.emit(True, 'DNS记录已更新到服务商')
+                    # 记录操作日志（含变更前后的内容，用于回滚）
+                    log_record_change('update', self.domain_data['domain'], provider_id,
+                                      self.record_data, dns_record,
+                                      f'更新DNS记录: {self.name}.{self.domain_data["domain"]}')
+                    cache_record_change(self.domain_data['id'], self.record_data, dns_record)
+                    self.finished.emit(True, dns_record, 'DNS记录已更新到服务商')
                 else:
-                    self.finished.emit(False, 'DNS记录更新失败')
+                    self.finished.emit(False, None, 'DNS记录更新失败')
             else:
                 # 添加DNS记录到服务商
                 remote_record_id = provider.add_record(self.domain_data['domain'], dns_record)
+                forget_records(provider_id, self.domain_data['domain'])
                 if remote_record_id:
-                    # 记录操作日志
-                    db.add_operation_log('create', 'record', 0, 
-                                       f'创建DNS记录: {self.name}.{self.domain_data["domain"]}')
-                    self.finished.emit(True, 'DNS记录已添加到服务商')
+                    # 记录操作日志（含变更前后的内容，用于回滚）
+                    dns_record.id = remote_record_id
+                    log_record_change('create', self.domain_data['domain'], provider_id,
+                                      None, dns_record,
+                                      f'创建DNS记录: {self.name}.{self.domain_data["domain"]}')
+                    cache_record_change(self.domain_data['id'], None, dns_record)
+                    self.finished.emit(True, dns_record, 'DNS记录已添加到服务商')
                 else:
-                    self.finished.emit(False, 'DNS记录添加失败')
+                    self.finished.emit(False, None, 'DNS记录添加失败')
                     
         except Exception as e:
-            self.finished.emit(False, f'保存失败: {str(e)}')
+            self.finished.emit(False, None, f'保存失败: {str(e)}')
 
 
 class RecordLoadWorker(QThread):
     """DNS记录加载工作线程"""
     
-    finished = pyqtSignal(bool, list, str)
+    # 使用object类型，跨线程传递时不复制记录列表
+    page_loaded = pyqtSignal(object, int, int)  # 新到达的记录, 已读取条数, 记录总数（未知为-1）
+    finished = pyqtSignal(bool, object, str)
+    
+    # 分页信号的最小间隔（秒），间隔内到达的页合并为一批，避免大量记录时刷爆事件队列
+    PAGE_INTERVAL = 0.1
     
     def __init__(self, domain_data):
         super().__init__()
         self.domain_data = domain_data
+        self.cancel_token = CancelToken()
+        self.pending = []
+        self.loaded = 0
+        self.last_emit = 0.0
+    
+    def cancel(self):
+        """请求取消，在下一页请求之前停止"""
+        self.cancel_token.cancel()
     
+    def on_page(self, page, total):
+        self.pending.extend(page)
+        self.loaded += len(page)
+        now = time.monotonic()
+        if now - self.last_emit >= self.PAGE_INTERVAL:
+            self.last_emit = now
+            batch, self.pending = self.pending, []
+            self.page_loaded.emit(batch, self.loaded, -1 if total is None else total)
+    
+    @profiled
     def run(self):
         try:
-            # 获取DNS提供商配置
-            provider_data = get_provider_config(self.domain_data)
-            if not provider_data:
+            # 创建DNS提供商实例（配置由注册表缓存）
+            provider_id = self.domain_data['provider_id']
+            provider = provider_registry.create(provider_id)
+            if provider is None:
                 self.finished.emit(False, [], '未找到DNS提供商配置')
                 return
             
-            # 创建DNS提供商实例并获取记录
-            config = json.loads(provider_data['config'])
-            provider = DNSProviderFactory.create(provider_data['type'], config)
-            records = provider.get_records(self.domain_data['domain'])
+            # 逐页获取记录，同一域名正在进行的读取（如域名列表的记录数）直接共享；
+            # 未发出的最后一批由 finished 携带的完整列表补齐
+            provider.cancel_token = self.cancel_token
+            records = fetch_records(provider, provider_id, self.domain_data['domain'],
+                                    on_page=self.on_page)
             
-            # 转换为字典格式以兼容现有代码
-            record_list = []
-            for record in records:
-                record_dict = {
-                    'id': record.id,
-                    'name': record.name,
-                    'type': record.type,
-                    'value': record.value,
-                    'ttl': record.ttl,
-                    'priority': record.priority
-                }
-                record_list.append(record_dict)
+            # 保存快照，内容未变化时不会产生新快照
+            try:
+                snapshots.take(self.domain_data['domain'], records, provider_id, 'load')
+            except Exception as e:
+                print(f"保存快照失败: {e}")
             
-            self.finished.emit(True, record_list, '')
+            # 直接传递DNSRecord对象，不再逐条复制为字典
+            self.finished.emit(True, records, '')
             
         except Exception as e:
             self.finished.emit(False, [], f'获取DNS记录失败: {str(e)}')
@@ -140,26 +180,27 @@ class RecordDeleteWorker(QThread):
         self.domain_data = domain_data
         self.record = record
     
+    @profiled
     def run(self):
         try:
-            # 获取DNS提供商配置
-            provider_data = get_provider_config(self.domain_data)
-            if not provider_data:
-                self.finished.emit(False, [], '未找到DNS提供商配置')
+            # 创建DNS提供商实例（配置由注册表缓存）
+            provider_id = self.domain_data['provider_id']
+            provider = provider_registry.create(provider_id)
+            if provider is None:
+                self.finished.emit(False, '未找到DNS提供商配置')
                 return
             
-            # 创建DNS提供商实例
-            config = json.loads(provider_data['config'])
-            provider = DNSProviderFactory.create(provider_data['type'], config)
-            
             # 从DNS服务商删除记录
-            if self.record.get('id'):
-                success = provider.delete_record(self.domain_data['domain'], self.record['id'])
+            if self.record.id:
+                success = provider.delete_record(self.domain_data['domain'], self.record.id)
+                forget_records(provider_id, self.domain_data['domain'])
                 if success:
-                    # 记录操作日志
-                    name = self.record['name'] if self.record['name'] else '@'
-                    db.add_operation_log('delete', 'record', 0, 
-                                       f'删除DNS记录: {name}.{self.domain_data["domain"]}')
+                    # 记录操作日志（含删除前的内容，用于回滚）
+                    name = self.record.name if self.record.name else '@'
+                    log_record_change('delete', self.domain_data['domain'], provider_id,
+                                      self.record, None,
+                                      f'删除DNS记录: {name}.{self.domain_data["domain"]}')
+                    cache_record_change(self.domain_data['id'], self.record, None)
                     self.finished.emit(True, 'DNS记录已从服务商删除')
                 else:
                     self.finished.emit(False, 'DNS记录删除失败')
@@ -170,6 +211,305 @@ class RecordDeleteWorker(QThread):
             self.finished.emit(False, f'删除失败: {str(e)}')
 
 
+class RecordVerifyWorker(QThread):
+    """
+    单条记录修改后的验证线程：只查询同名同类型的记录，确认修改已在服务商生效，
+    按查询结果修正本地记录缓存。服务商的列表接口可能滞后于写入，
+    查询结果与修改不一致时按 RETRY_DELAYS 间隔重新查询，全部不一致才按未生效处理
+    """
+    
+    finished = pyqtSignal(object, str)  # 服务商上的记录（不存在为None）, error_message
+    
+    RETRY_DELAYS = (0.5, 1.0, 2.0)  # 秒
+    
+    def __init__(self, domain_data, old_record, new_record):
+        super().__init__()
+        self.domain_data = domain_data
+        self.old_record = old_record  # 新增时为None
+        self.new_record = new_record  # 删除时为None
+    
+    @profiled
+    def run(self):
+        try:
+            provider_id = self.domain_data['provider_id']
+            provider = provider_registry.create(provider_id)
+            if provider is None:
+                self.finished.emit(None, '未找到DNS提供商配置')
+                return
+            
+            target = self.new_record or self.old_record
+            for delay in self.RETRY_DELAYS + (None,):
+                records = fetch_records(provider, provider_id, self.domain_data['domain'],
+                                        name=target.name or '@', type=target.type)
+                remote = next((r for r in records if r.id == target.id), None)
+                if self.is_applied(remote) or delay is None:
+                    break
+                time.sleep(delay)
+            
+            # 缓存以服务商上的实际状态为准：修改未生效时恢复为修改前的记录
+            if remote is not None:
+                cache_record_change(self.domain_data['id'], target, remote)
+            elif self.new_record is not None:
+                cache_record_change(self.domain_data['id'], self.new_record, self.old_record)
+            self.finished.emit(remote, '')
+        except Exception as e:
+            self.finished.emit(None, str(e))
+    
+    def is_applied(self, remote) -> bool:
+        """服务商上的记录是否已反映修改：删除后不存在，新增或修改后存在且内容一致"""
+        if self.new_record is None:
+            return remote is None
+        return remote is not None and record_content(remote) == record_content(self.new_record)
+
+
+class ZoneImportWorker(QThread):
+    """区域文件导入工作线程：与远程记录对比后只提交变更"""
+    
+    finished = pyqtSignal(bool, str)
+    
+    def __init__(self, domain_data, file_path):
+        super().__init__()
+        self.domain_data = domain_data
+        self.file_path = file_path
+    
+    @profiled
+    def run(self):
+        try:
+            # 创建DNS提供商实例（配置由注册表缓存）
+            provider_id = self.domain_data['provider_id']
+            provider = provider_registry.create(provider_id)
+            if provider is None:
+                self.finished.emit(False, '未找到DNS提供商配置')
+                return
+            
+            domain = self.domain_data['domain']
+            
+            # 流式解析区域文件并与远程记录对比
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                changes = plan_zone_import(provider, domain, f)
+            
+            if not changes:
+                self.finished.emit(True, '区域文件与当前记录一致，无需变更')
+                return
+            
+            applied, failed = apply_changes(provider, domain, changes)
+            forget_records(provider_id, domain)
+            log_changes(domain, provider_id, applied, failed, '区域文件导入')
+            
+            message = f'共 {len(changes)} 条变更，成功 {len(applied)} 条，失败 {len(failed)} 条'
+            self.finished.emit(not failed, message)
+        
+        except Exception as e:
+            self.finished.emit(False, f'导入失败: {str(e)}')
+
+
+class RollbackWorker(QThread):
+    """回滚工作线程：changes 为空时计算回滚变更集，否则提交"""
+    
+    finished = pyqtSignal(bool, object, str)  # success, changes, message
+    
+    def __init__(self, domain_data, target, changes=None):
+        super().__init__()
+        self.domain_data = domain_data
+        self.target = target  # ('snapshot', 快照ID) 或 ('log', 日志ID)
+        self.changes = changes
+        self.cancel_token = CancelToken()
+    
+    def cancel(self):
+        """请求取消：计算变更集时在下一页请求之前停止，提交时剩余的变更计入失败"""
+        self.cancel_token.cancel()
+    
+    @profiled
+    def run(self):
+        try:
+            provider_id = self.domain_data['provider_id']
+            provider = provider_registry.create(provider_id)
+            if provider is None:
+                self.finished.emit(False, [], '未找到DNS提供商配置')
+                return
+            
+            provider.cancel_token = self.cancel_token
+            domain = self.domain_data['domain']
+            
+            if self.changes is None:
+                kind, target_id = self.target
+                if kind == 'snapshot':
+                    changes, _ = plan_rollback_to_snapshot(provider, domain, provider_id, target_id)
+                else:
+                    changes, _ = plan_rollback_to_log(provider, domain, provider_id, target_id)
+                self.finished.emit(True, changes, f'共 {len(changes)} 条变更')
+                return
+            
+            applied, failed = apply_rollback(provider, domain, provider_id, self.changes)
+            forget_records(provider_id, domain)
+            message = f'共 {len(self.changes)} 条变更，成功 {len(applied)} 条，失败 {len(failed)} 条'
+            self.finished.emit(not failed, [], message)
+        
+        except Exception as e:
+            self.finished.emit(False, [], f'回滚失败: {str(e)}')
+
+
+class RollbackDialog(QDialog):
+    """回滚对话框：选择快照或操作日志，预览并提交逆向变更"""
+    
+    def __init__(self, parent=None, domain_data=None):
+        super().__init__(parent)
+        self.domain_data = domain_data
+        self.worker = None
+        self.changes = []
+        self.applied = False
+        self.init_ui()
+        self.load_targets()
+    
+    def init_ui(self):
+        """初始化UI"""
+        self.setWindowTitle(f'回滚 - {self.domain_data["domain"]}')
+        self.resize(640, 480)
+        
+        layout = QVBoxLayout(self)
+        layout.addWidget(BodyLabel('回滚到:'))
+        self.target_combo = ComboBox()
+        self.target_combo.currentIndexChanged.connect(self.on_target_changed)
+        layout.addWidget(self.target_combo)
+        
+        self.status_label = BodyLabel('请选择快照或操作记录，然后预览变更')
+        layout.addWidget(self.status_label)
+        
+        self.progress_bar = IndeterminateProgressBar(self)
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+        
+        self.change_list = ListWidget()
+        layout.addWidget(self.change_list)
+        
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        
+        self.preview_button = PushButton('预览', self)
+        self.preview_button.clicked.connect(self.preview)
+        button_layout.addWidget(self.preview_button)
+        
+        self.cancel_button = TransparentPushButton('关闭', self)
+        self.cancel_button.clicked.connect(self.close_dialog)
+        button_layout.addWidget(self.cancel_button)
+        
+        self.apply_button = PrimaryPushButton('回滚', self)
+        self.apply_button.clicked.connect(self.apply)
+        self.apply_button.setEnabled(False)
+        button_layout.addWidget(self.apply_button)
+        
+        layout.addLayout(button_layout)
+    
+    def load_targets(self):
+        """加载可回滚到的快照和记录变更日志"""
+        domain = self.domain_data['domain']
+        provider_id = self.domain_data['provider_id']
+        targets = []
+        for snapshot in snapshots.history(domain, provider_id, limit=50):
+            created = datetime.fromtimestamp(snapshot.created_at).strftime('%Y-%m-%d %H:%M:%S')
+            text = f'快照 #{snapshot.id}  {created}  {snapshot.record_count} 条记录'
+            targets.append((snapshot.created_at, text, ('snapshot', snapshot.id)))
+        for log in db.get_record_change_logs(domain, provider_id)[:100]:
+            text = f'撤销 #{log["id"]} 及之后的变更  {log["created_at"]}  {log["details"] or ""}'
+            created = datetime.strptime(log['created_at'], '%Y-%m-%d %H:%M:%S').replace(
+                tzinfo=timezone.utc).timestamp()
+            targets.append((created, text, ('log', log['id'])))
+        
+        targets.sort(key=lambda item: item[0], reverse=True)
+        for _, text, target in targets:
+            self.target_combo.addItem(text, userData=target)
+        self.preview_button.setEnabled(bool(targets))
+    
+    def on_target_changed(self, index):
+        """切换目标后需要重新预览"""
+        self.changes = []
+        self.change_list.clear()
+        self.apply_button.setEnabled(False)
+    
+    def set_busy(self, busy, message=''):
+        self.progress_bar.setVisible(busy)
+        self.preview_button.setEnabled(not busy)
+        self.target_combo.setEnabled(not busy)
+        if busy:
+            self.apply_button.setEnabled(False)
+        if message:
+            self.status_label.setText(message)
+    
+    def preview(self):
+        """计算回滚变更集"""
+        target = self.target_combo.currentData()
+        if not target or (self.worker and self.worker.isRunning()):
+            return
+        self.on_target_changed(self.target_combo.currentIndex())
+        self.set_busy(True, '正在获取当前记录并计算变更...')
+        self.worker = RollbackWorker(self.domain_data, target)
+        self.worker.finished.connect(self.on_preview_finished)
+        self.worker.start()
+    
+    def on_preview_finished(self, success, changes, message):
+        if self.worker.cancel_token.cancelled:
+            return  # 关闭对话框时已取消
+        self.set_busy(False, message)
+        if not success:
+            InfoBar.error('错误', message, parent=self)
+            return
+        self.changes = changes
+        domain = self.domain_data['domain']
+        for change in changes:
+            self.change_list.addItem(change.describe(domain))
+        self.apply_button.setEnabled(bool(changes))
+    
+    def apply(self):
+        """提交回滚"""
+        if not self.changes or (self.worker and self.worker.isRunning()):
+            return
+        msg_box = MessageBox(
+            '确认回滚',
+            f'将向DNS服务商提交 {len(self.changes)} 条变更，确定要回滚域名 "{self.domain_data["domain"]}" 吗？',
+            self
+        )
+        if not msg_box.exec_():
+            return
+        self.set_busy(True, '正在提交回滚...')
+        self.worker = RollbackWorker(self.domain_data, self.target_combo.currentData(), self.changes)
+        self.worker.finished.connect(self.on_apply_finished)
+        self.worker.start()
+    
+    def on_apply_finished(self, success, changes, message):
+        self.set_busy(False, message)
+        self.changes = []
+        self.applied = True
+        if success:
+            InfoBar.success('成功', message, parent=self)
+        else:
+            InfoBar.error('错误', message, parent=self)
+    
+    def stop_preview(self) -> bool:
+        """取消正在进行的预览并等待线程退出；正在提交回滚时返回False"""
+        if not (self.worker and self.worker.isRunning()):
+            return True
+        if self.worker.changes is not None:
+            return False
+        self.worker.cancel()
+        self.worker.wait()
+        return True
+    
+    def close_dialog(self):
+        if not self.stop_preview():
+            InfoBar.warning('警告', '正在执行中，请稍候', parent=self)
+            return
+        if self.applied:
+            self.accept()
+        else:
+            self.reject()
+    
+    def closeEvent(self, event):
+        if not self.stop_preview():
+            event.ignore()
+            return
+        super().closeEvent(event)
+
+
 class RecordEditDialog(QDialog):
     """DNS记录编辑对话框"""
     
@@ -178,6 +518,7 @@ class RecordEditDialog(QDialog):
         self.domain_data = domain_data
         self.record_data = record_data
         self.save_worker = None
+        self.saved_record = None  # 保存成功后的记录（含远程记录ID）
         self.init_ui()
         
         if record_data:
@@ -275,11 +616,11 @@ class RecordEditDialog(QDialog):
     
     def load_record_data(self):
         """加载记录数据"""
-        self.name_edit.setText(self.record_data['name'])
-        self.type_combo.setCurrentText(self.record_data['type'])
-        self.value_edit.setText(self.record_data['value'])
-        self.ttl_spin.setValue(self.record_data['ttl'])
-        self.priority_spin.setValue(self.record_data['priority'])
+        self.name_edit.setText(self.record_data.name)
+        self.type_combo.setCurrentText(self.record_data.type)
+        self.value_edit.setText(self.record_data.value)
+        self.ttl_spin.setValue(self.record_data.ttl)
+        self.priority_spin.setValue(self.record_data.priority)
     
     def validate_form(self):
         """验证表单输入"""
@@ -318,7 +659,7 @@ class RecordEditDialog(QDialog):
         self.save_worker.finished.connect(self.on_save_finished)
         self.save_worker.start()
     
-    def on_save_finished(self, success, message):
+    def on_save_finished(self, success, record, message):
         """保存完成回调"""
         # 恢复保存按钮状态
         self.save_button.setEnabled(True)
@@ -326,6 +667,7 @@ class RecordEditDialog(QDialog):
         
         if success:
             InfoBar.success('成功', message, parent=self)
+            self.saved_record = record
             self.accept()
         else:
             InfoBar.error('错误', message, parent=self)
@@ -334,13 +676,25 @@ class RecordEditDialog(QDialog):
 class RecordInterface(QWidget):
     """DNS记录管理界面"""
     
+    # 每次事件循环最多插入的表格行数，每行带操作按钮，一次插入大批记录会长时间阻塞界面
+    ROWS_PER_TICK = 50
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.current_domain = None
         self.load_worker = None
+        self.stale_load_workers = set()  # 已切换域名并取消、结果将被丢弃但尚未退出的加载线程
         self.delete_worker = None
+        self.zone_import_worker = None
+        self.verify_workers = set()  # 单条记录修改后的验证线程
+        self.records = []  # 已加载的记录，包括尚未插入表格的
+        self.pending_rows = []  # 等待插入表格的记录
+        self.row_timer = QTimer(self)
+        self.row_timer.setInterval(0)
+        self.row_timer.timeout.connect(self.flush_rows)
         self.init_ui()
-        self.load_domains()
+        # 首帧绘制后再读取数据库
+        QTimer.singleShot(0, self.load_domains)
     
     def create_left_panel(self):
         """创建左侧域名列表面板"""
@@ -375,6 +729,24 @@ class RecordInterface(QWidget):
         self.refresh_button.setEnabled(False)
         header_layout.addWidget(self.refresh_button)
         
+        self.export_zone_button = PushButton('导出区域文件', self)
+        self.export_zone_button.setIcon(FIF.SAVE)
+        self.export_zone_button.clicked.connect(self.export_zone)
+        self.export_zone_button.setEnabled(False)
+        header_layout.addWidget(self.export_zone_button)
+        
+        self.import_zone_button = PushButton('导入区域文件', self)
+        self.import_zone_button.setIcon(FIF.FOLDER)
+        self.import_zone_button.clicked.connect(self.import_zone)
+        self.import_zone_button.setEnabled(False)
+        header_layout.addWidget(self.import_zone_button)
+        
+        self.rollback_button = PushButton('回滚', self)
+        self.rollback_button.setIcon(FIF.HISTORY)
+        self.rollback_button.clicked.connect(self.rollback)
+        self.rollback_button.setEnabled(False)
+        header_layout.addWidget(self.rollback_button)
+        
         return header_layout
     
     def create_right_panel(self):
@@ -385,11 +757,16 @@ class RecordInterface(QWidget):
         # 添加标题和按钮
         right_layout.addLayout(self.create_header_layout())
         
-        # 进度条
+        # 进度条，加载记录且已知记录总数时显示确定进度
         self.progress_bar = IndeterminateProgressBar(self)
         self.progress_bar.hide()
         right_layout.addWidget(self.progress_bar)
         
+        self.load_progress_bar = ProgressBar(self)
+        self.load_progress_bar.setRange(0, 100)
+        self.load_progress_bar.hide()
+        right_layout.addWidget(self.load_progress_bar)
+        
         # 状态标签
         self.status_label = BodyLabel('')
         self.status_label.hide()
@@ -428,6 +805,7 @@ class RecordInterface(QWidget):
         # 设置分割器比例
         splitter.setSizes([300, 800])
     
+    @profiled
     def load_domains(self):
         """加载域名列表"""
         self.domain_tree.clear()
@@ -455,65 +833,140 @@ class RecordInterface(QWidget):
         # 启用按钮
         self.add_button.setEnabled(True)
         self.refresh_button.setEnabled(True)
+        self.export_zone_button.setEnabled(True)
+        self.import_zone_button.setEnabled(True)
+        self.rollback_button.setEnabled(True)
         
         # 加载记录
         self.load_records()
     
+    @profiled
     def load_records(self):
         """加载DNS记录"""
         if not self.current_domain:
             return
         
-        # 检查是否有正在运行的加载任务
+        # 同一域名已在加载时不重复启动；切换了域名时取消旧的加载，在下一页请求前停止（结果丢弃）
         if self.load_worker and self.load_worker.isRunning():
-            return
+            if self.load_worker.domain_data['id'] == self.current_domain['id']:
+                return
+            self.load_worker.cancel()
+            self.stale_load_workers.add(self.load_worker)
         
-        # 显示加载状态
+        # 显示加载状态，记录逐页追加到清空后的表格
         self.progress_bar.show()
+        self.load_progress_bar.hide()
         self.status_label.setText('正在加载DNS记录...')
         self.status_label.show()
         self.refresh_button.setEnabled(False)
+        self.export_zone_button.setEnabled(False)
+        self.clear_table()
         
         # 创建并启动加载工作线程
-        self.load_worker = RecordLoadWorker(self.current_domain)
-        self.load_worker.finished.connect(self.on_load_finished)
-        self.load_worker.start()
+        worker = RecordLoadWorker(self.current_domain)
+        worker.page_loaded.connect(lambda records, loaded, total, w=worker: self.on_page_loaded(
+            records, loaded, total, w))
+        worker.finished.connect(lambda success, records, message, w=worker: self.on_load_finished(
+            success, records, message, w))
+        self.load_worker = worker
+        worker.start()
     
-    def on_load_finished(self, success, records, message):
+    def on_page_loaded(self, records, loaded, total, worker=None):
+        """一批记录到达：追加到表格并更新进度"""
+        if worker is not None and worker is not self.load_worker:
+            return
+        
+        if total > 0:
+            self.progress_bar.hide()
+            self.load_progress_bar.setValue(min(100, int(loaded * 100 / total)))
+            self.load_progress_bar.show()
+            self.status_label.setText(f'正在加载DNS记录... {loaded}/{total}')
+        else:
+            self.status_label.setText(f'正在加载DNS记录... {loaded}')
+        
+        self.records.extend(records)
+        self.queue_rows(records)
+    
+    @profiled
+    def on_load_finished(self, success, records, message, worker=None):
         """加载完成回调"""
+        if worker is not None and worker is not self.load_worker:
+            # 加载期间已切换到其他域名，丢弃旧域名的结果；run() 已执行到最后，等待线程结束后再释放
+            worker.wait()
+            self.stale_load_workers.discard(worker)
+            return
+        
         # 隐藏加载状态
         self.progress_bar.hide()
+        self.load_progress_bar.hide()
         self.status_label.hide()
         self.refresh_button.setEnabled(True)
+        self.export_zone_button.setEnabled(True)
         
         if not success:
             InfoBar.error('错误', message, parent=self)
-            self.table.setRowCount(0)
+            self.clear_table()
+            return
+        
+        # 已逐页到达的记录是完整列表的前缀，只追加其余部分
+        received = len(self.records)
+        self.records = records
+        self.queue_rows(records[received:])
+    
+    def clear_table(self):
+        """清空记录和表格，丢弃尚未插入的行"""
+        self.row_timer.stop()
+        self.pending_rows = []
+        self.records = []
+        self.table.setRowCount(0)
+    
+    def queue_rows(self, records):
+        """记录排队，由 flush_rows 分批插入表格"""
+        self.pending_rows.extend(records)
+        if self.pending_rows and not self.row_timer.isActive():
+            self.row_timer.start()
+    
+    def flush_rows(self):
+        """插入一批排队的记录，每批之间让出事件循环"""
+        batch = self.pending_rows[:self.ROWS_PER_TICK]
+        del self.pending_rows[:self.ROWS_PER_TICK]
+        self.append_records(batch)
+        if not self.pending_rows:
+            self.row_timer.stop()
+    
+    def append_records(self, records):
+        """把记录追加到表格末尾"""
+        if not records:
             return
         
-        # 更新表格
-        self.table.setRowCount(len(records))
+        start = self.table.rowCount()
+        self.table.setUpdatesEnabled(False)
+        self.table.setRowCount(start + len(records))
+        for row, record in enumerate(records, start):
+            self.set_row(row, record)
+        self.table.setUpdatesEnabled(True)
+    
+    def set_row(self, row, record):
+        """填充表格的一行"""
+        # 名称
+        name = record.name if record.name else '@'
+        self.table.setItem(row, 0, QTableWidgetItem(name))
         
-        for row, record in enumerate(records):
-            # 名称
-            name = record['name'] if record['name'] else '@'
-            self.table.setItem(row, 0, QTableWidgetItem(name))
-            
-            # 类型
-            self.table.setItem(row, 1, QTableWidgetItem(record['type']))
-            
-            # 值
-            self.table.setItem(row, 2, QTableWidgetItem(record['value']))
-            
-            # TTL
-            self.table.setItem(row, 3, QTableWidgetItem(str(record['ttl'])))
-            
-            # 优先级
-            priority = str(record['priority']) if record['priority'] > 0 else '-'
-            self.table.setItem(row, 4, QTableWidgetItem(priority))
-            
-            # 操作按钮
-            self.table.setCellWidget(row, 5, self.create_action_buttons(record))
+        # 类型
+        self.table.setItem(row, 1, QTableWidgetItem(record.type))
+        
+        # 值
+        self.table.setItem(row, 2, QTableWidgetItem(record.value))
+        
+        # TTL
+        self.table.setItem(row, 3, QTableWidgetItem(str(record.ttl)))
+        
+        # 优先级
+        priority = str(record.priority) if record.priority > 0 else '-'
+        self.table.setItem(row, 4, QTableWidgetItem(priority))
+        
+        # 操作按钮
+        self.table.setCellWidget(row, 5, self.create_action_buttons(record))
     
     def create_action_buttons(self, record):
         """创建操作按钮组件"""
@@ -540,26 +993,26 @@ class RecordInterface(QWidget):
         
         dialog = RecordEditDialog(self, self.current_domain)
         if dialog.exec_() == Dialog.Accepted:
-            self.load_records()
+            self.apply_local_change(None, dialog.saved_record)
             InfoBar.success('成功', 'DNS记录添加成功', parent=self)
     
     def edit_record(self, record):
         """编辑DNS记录"""
         dialog = RecordEditDialog(self, self.current_domain, record)
         if dialog.exec_() == Dialog.Accepted:
-            self.load_records()
+            self.apply_local_change(record, dialog.saved_record)
             InfoBar.success('成功', 'DNS记录更新成功', parent=self)
     
     def delete_record(self, record):
         """删除DNS记录"""
-        name = record['name'] if record['name'] else '@'
+        name = record.name if record.name else '@'
         msg_box = MessageBox(
             '确认删除',
-            f'确定要删除DNS记录 "{name}.{self.current_domain["domain"]}" ({record["type"]}) 吗？\n\n注意：这将从DNS服务商中永久删除该记录！',
+            f'确定要删除DNS记录 "{name}.{self.current_domain["domain"]}" ({record.type}) 吗？\n\n注意：这将从DNS服务商中永久删除该记录！',
             self
         )
         
-        if msg_box.exec_() == MessageBox.Yes:
+        if msg_box.exec_():
             # 检查是否有正在运行的删除任务
             if self.delete_worker and self.delete_worker.isRunning():
                 return
@@ -582,8 +1035,167 @@ class RecordInterface(QWidget):
         
         if success:
             InfoBar.success('成功', message, parent=self)
-            self.load_records()  # 重新加载记录列表
+            self.apply_local_change(self.delete_worker.record, None)
         else:
             InfoBar.error('错误', message, parent=self)
     
+    def apply_local_change(self, old_record, new_record):
+        """
+        把已提交到服务商的单条修改直接应用到表格（old_record 为None表示新增，new_record 为None表示删除），
+        不重新读取整个域名；之后在后台只查询这条记录，确认修改已生效
+        """
+        if self.load_worker and self.load_worker.isRunning():
+            # 正在进行的加载可能开始于修改之前，取消后重新加载
+            self.load_worker.cancel()
+            self.stale_load_workers.add(self.load_worker)
+            self.load_worker = None
+            self.load_records()
+            return
+        
+        if not self.replace_record(old_record, new_record):
+            self.load_records()
+            return
+        
+        worker = RecordVerifyWorker(self.current_domain, old_record, new_record)
+        worker.finished.connect(lambda remote, error_message, w=worker: self.on_verify_finished(
+            remote, error_message, w))
+        self.verify_workers.add(worker)
+        worker.start()
+    
+    def on_verify_finished(self, remote, error_message, worker):
+        """验证完成：以服务商上的实际状态修正表格，修改未生效时恢复"""
+        # run() 已执行到最后，等待线程结束后再释放
+        worker.wait()
+        self.verify_workers.discard(worker)
+        if not self.current_domain or worker.domain_data['id'] != self.current_domain['id']:
+            return
+        if error_message:
+            InfoBar.warning('提示', f'无法确认修改是否生效: {error_message}', parent=self)
+            return
+        
+        old_record, new_record = worker.old_record, worker.new_record
+        if new_record is not None:
+            if remote is None:
+                # 找不到（可能已重新加载）时 replace_record 不做任何修改
+                if self.replace_record(new_record, old_record):
+                    InfoBar.error('错误', '服务商上未找到修改后的记录，已恢复显示，建议刷新', parent=self)
+            elif remote.to_dict() != new_record.to_dict():
+                self.replace_record(new_record, remote)
+        elif remote is not None:
+            self.replace_record(None, remote)
+            InfoBar.error('错误', '记录仍存在于服务商，已恢复显示，建议刷新', parent=self)
+    
+    def replace_record(self, old_record, new_record):
+        """
+        替换表格中的一条记录（old_record 为None时追加，new_record 为None时删除），
+        按对象查找，记录已不在表格中（如已重新加载）时返回False
+        """
+        if old_record is None:
+            self.records.append(new_record)
+            self.queue_rows([new_record])
+            return True
+        
+        index = next((i for i, record in enumerate(self.records) if record is old_record), -1)
+        if index < 0:
+            return False
+        
+        # 尚未插入表格的记录在 pending_rows 中，顺序与 records 的末尾一致
+        shown = self.table.rowCount()
+        if new_record is None:
+            del self.records[index]
+            if index < shown:
+                self.table.removeRow(index)
+            else:
+                del self.pending_rows[index - shown]
+        else:
+            self.records[index] = new_record
+            if index < shown:
+                self.set_row(index, new_record)
+            else:
+                self.pending_rows[index - shown] = new_record
+        return True
+    
+    def export_zone(self):
+        """把当前域名的记录导出为BIND区域文件"""
+        if not self.current_domain:
+            return
+        
+        domain = self.current_domain['domain']
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            '导出区域文件',
+            f'{domain}.zone',
+            '区域文件 (*.zone *.txt);;所有文件 (*)'
+        )
+        
+        if not file_path:
+            return
+        
+        try:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                write_zone(self.records, domain, f)
+            InfoBar.success('成功', f'已导出 {len(self.records)} 条记录到: {file_path}', parent=self)
+        except Exception as e:
+            InfoBar.error('错误', f'导出失败: {str(e)}', parent=self)
+    
+    def import_zone(self):
+        """从BIND区域文件导入记录"""
+        if not self.current_domain:
+            return
+        
+        if self.zone_import_worker and self.zone_import_worker.isRunning():
+            InfoBar.warning('警告', '正在导入中，请稍候', parent=self)
+            return
+        
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            '导入区域文件',
+            '',
+            '区域文件 (*.zone *.txt);;所有文件 (*)'
+        )
+        
+        if not file_path:
+            return
+        
+        msg_box = MessageBox(
+            '确认导入',
+            f'将以区域文件内容为准同步域名 "{self.current_domain["domain"]}" 的记录，'
+            f'文件中不存在的记录将从DNS服务商删除。\n\n确定要继续吗？',
+            self
+        )
+        
+        if not msg_box.exec_():
+            return
+        
+        # 显示导入状态
+        self.progress_bar.show()
+        self.status_label.setText('正在导入区域文件...')
+        self.status_label.show()
+        self.import_zone_button.setEnabled(False)
+        
+        self.zone_import_worker = ZoneImportWorker(self.current_domain, file_path)
+        self.zone_import_worker.finished.connect(self.on_zone_import_finished)
+        self.zone_import_worker.start()
+    
+    def on_zone_import_finished(self, success, message):
+        """区域文件导入完成回调"""
+        self.progress_bar.hide()
+        self.status_label.hide()
+        self.import_zone_button.setEnabled(True)
+        
+        if success:
+            InfoBar.success('成功', message, parent=self)
+        else:
+            InfoBar.error('错误', message, parent=self)
+        self.load_records()
+    
+    def rollback(self):
+        """把当前域名回滚到某个快照或操作日志之前的状态"""
+        if not self.current_domain:
+            return
+        
+        dialog = RollbackDialog(self, self.current_domain)
+        if dialog.exec_() == QDialog.Accepted:
+            self.load_records()
+    
     # 移除同步相关方法，现在直接从DNS服务商获取实时数据
\ No newline at end of file
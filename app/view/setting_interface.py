@@ -15,6 +15,7 @@ from qfluentwidgets import (
 
 from ..common.config import cfg
 from ..common.database import db
+from ..common.profiler import profiler
 
 
 class SettingInterface(ScrollArea):
@@ -97,8 +98,32 @@ class SettingInterface(ScrollArea):
             lambda checked: cfg.set('check_update', checked)
         )
         
+        # 性能分析模式
+        self.profiling_card = SwitchSettingCard(
+            FIF.SPEED_HIGH,
+            '性能分析模式',
+            '记录耗时函数和界面卡顿，结果保存在 profiles 目录（也可使用 --profile 启动）',
+            parent=self.app_group
+        )
+        self.profiling_card.switchButton.setChecked(cfg.get('profiling.enabled', False))
+        self.profiling_card.switchButton.checkedChanged.connect(self.on_profiling_changed)
+        
+        # 后台漂移检测
+        self.drift_card = SwitchSettingCard(
+            FIF.SEARCH,
+            '后台漂移检测',
+            '定期检查域名记录是否在其他地方被修改，发现后更新本地缓存并写入操作日志',
+            parent=self.app_group
+        )
+        self.drift_card.switchButton.setChecked(cfg.get('drift.enabled', False))
+        self.drift_card.switchButton.checkedChanged.connect(
+            lambda checked: cfg.set('drift.enabled', checked)
+        )
+        
         self.app_group.addSettingCard(self.auto_save_card)
         self.app_group.addSettingCard(self.check_update_card)
+        self.app_group.addSettingCard(self.profiling_card)
+        self.app_group.addSettingCard(self.drift_card)
         
         # 数据管理组
         self.data_group = SettingCardGroup('数据管理', self.scroll_widget)
@@ -176,6 +201,15 @@ class SettingInterface(ScrollArea):
         self.expand_layout.addWidget(self.data_group)
         self.expand_layout.addWidget(self.about_group)
     
+    def on_profiling_changed(self, checked):
+        """性能分析模式开关"""
+        session_dir = profiler.session_dir
+        cfg.set('profiling.enabled', checked)
+        if checked:
+            InfoBar.success('成功', f'性能分析已开启，结果目录: {profiler.session_dir}', parent=self)
+        elif session_dir:
+            InfoBar.success('成功', f'性能分析结果已保存: {session_dir}', parent=self)
+    
     def on_theme_changed(self, theme_text):
         """主题改变事件"""
         theme_map = {
@@ -223,18 +257,7 @@ class SettingInterface(ScrollArea):
                 return
             
             # 获取所有数据
-            data = {
-                'providers': db.get_dns_providers(),
-                'domains': db.get_domains(),
-                'records': []
-            }
-            
-            # 获取所有记录
-            for domain in data['domains']:
-                records = db.get_dns_records(domain['id'])
-                for record in records:
-                    record['domain_name'] = domain['domain']
-                    data['records'].append(record)
+            data = db.export_data()
             
             # 写入文件
             import json
@@ -242,7 +265,7 @@ class SettingInterface(ScrollArea):
                 json.dump(data, f, ensure_ascii=False, indent=2)
             
             InfoBar.success('成功', f'数据已导出到: {file_path}', parent=self)
-            
+        
         except Exception as e:
             InfoBar.error('错误', f'导出失败: {str(e)}', parent=self)
     
@@ -266,7 +289,7 @@ class SettingInterface(ScrollArea):
                 self
             )
             
-            if msg_box.exec_() != MessageBox.Yes:
+            if not msg_box.exec_():
                 return
             
             # 读取文件
@@ -274,41 +297,11 @@ class SettingInterface(ScrollArea):
             with open(file_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
-            # 导入提供商
-            provider_map = {}
-            for provider in data.get('providers', []):
-                new_id = db.add_dns_provider(
-                    provider['name'] + '_imported',
-                    provider['type'],
-                    provider['config']
-                )
-                provider_map[provider['id']] = new_id
-            
-            # 导入域名
-            domain_map = {}
-            for domain in data.get('domains', []):
-                if domain['provider_id'] in provider_map:
-                    new_id = db.add_domain(
-                        domain['domain'],
-                        provider_map[domain['provider_id']]
-                    )
-                    domain_map[domain['id']] = new_id
-            
-            # 导入记录
-            for record in data.get('records', []):
-                if record['domain_id'] in domain_map:
-                    db.add_dns_record(
-                        domain_map[record['domain_id']],
-                        record.get('record_id', ''),
-                        record['name'],
-                        record['type'],
-                        record['value'],
-                        record['ttl'],
-                        record['priority']
-                    )
+            # 导入提供商、域名和记录
+            db.import_data(data)
             
             InfoBar.success('成功', '数据导入完成', parent=self)
-            
+        
         except Exception as e:
             InfoBar.error('错误', f'导入失败: {str(e)}', parent=self)
     
@@ -320,7 +313,7 @@ class SettingInterface(ScrollArea):
             self
         )
         
-        if msg_box.exec_() == MessageBox.Yes:
+        if msg_box.exec_():
             try:
                 # 这里需要在数据库中添加清空所有数据的方法
                 InfoBar.warning('提示', '清空数据功能正在开发中', parent=self)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+CloudFlare 整区导出/导入基准测试
+在本地模拟API服务器（见 stub_servers.py）上对比两种方式：
+- 整区读取：分页读取 /dns_records 与BIND导出接口（export_records）
+- 批量新增：逐条创建记录与BIND导入接口（import_records）
+
+用法:
+    python benchmarks/cloudflare_bulk.py [--sizes 1000,10000,50000] [--latency-ms 20] [--page-size 100]
+                                         [--creates 1000] [--workers 8] [--output results.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_servers import StubProcess, StubOptions, synthetic_record
+from app.dns.base import DNSRecord
+from app.dns.changeset import RecordChange, apply_changes
+
+
+def result(benchmark, mode, seconds, count, unit, **extra):
+    """构建一条结果"""
+    entry = {
+        'benchmark': benchmark,
+        'mode': mode,
+        'seconds': round(seconds, 4),
+        'count': count,
+        'throughput': round(count / seconds, 1) if seconds > 0 else 0.0,
+        'unit': unit,
+    }
+    entry.update(extra)
+    print(f"{benchmark:<8} {mode:<8} {count:>7} {entry['throughput']:>12.1f} {unit}  ({seconds:.2f}s, "
+          f"{extra.get('requests', 0)} 请求)", file=sys.stderr)
+    return entry
+
+
+def bench_read(server, provider, size):
+    """同一区域分别分页读取和整区导出"""
+    domain = f'records-{size}.bench.test'
+    results = []
+    for mode in ('paged', 'export'):
+        server.reset_counters()
+        start = time.perf_counter()
+        if mode == 'paged':
+            count = len(provider.get_records(domain))
+        else:
+            count = sum(1 for _ in provider.export_records(domain))
+        results.append(result('read', mode, time.perf_counter() - start, count, 'records/s',
+                              records=size, **server.stats()))
+    return results
+
+
+def bench_create(server, provider, creates, workers):
+    """向空区域分别逐条创建和整批导入"""
+    results = []
+    for mode in ('single', 'import'):
+        domain = f'{mode}.bench.test'
+        changes = [RecordChange('create', DNSRecord(**synthetic_record(i))) for i in range(creates)]
+        # 阈值设为0时 apply_changes 逐条创建，设为1时整批导入
+        provider.bulk_import_threshold = 1 if mode == 'import' else 0
+        server.reset_counters()
+        start = time.perf_counter()
+        applied, failed = apply_changes(provider, domain, changes, max_workers=workers)
+        results.append(result('create', mode, time.perf_counter() - start, len(applied), 'records/s',
+                              records=creates, workers=workers, failed=len(failed), **server.stats()))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CloudFlare 整区导出/导入基准测试')
+    parser.add_argument('--sizes', default='1000,10000,50000', help='区域记录数，逗号分隔')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='模拟服务器每个请求的延迟')
+    parser.add_argument('--page-size', type=int, default=100, help='模拟服务器单页最多返回条数')
+    parser.add_argument('--creates', type=int, default=1000, help='批量新增测试的记录数')
+    parser.add_argument('--workers', type=int, default=8, help='逐条创建的并发数')
+    parser.add_argument('--output', help='结果输出文件，默认输出到stdout')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    spec = [(f'records-{size}.bench.test', size) for size in sizes]
+    spec += [('single.bench.test', 0), ('import.bench.test', 0)]
+    options = StubOptions(latency_ms=args.latency_ms, max_page_size=args.page_size)
+
+    results = []
+    with StubProcess('cloudflare', spec, options) as server:
+        provider = server.create_provider()
+        provider.export_threshold = 0
+        for size in sizes:
+            results.extend(bench_read(server, provider, size))
+        results.extend(bench_create(server, provider, args.creates, args.workers))
+
+    report = {
+        'benchmark': 'cloudflare_bulk',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': {k: v for k, v in vars(args).items() if k != 'output'},
+        'results': results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+数据库维护基准测试
+在临时数据库中构造大量软删除的记录（模拟长期使用后的记录缓存），删除部分索引以模拟旧版本数据库，
+执行一次维护并输出释放的空间和常用查询耗时的变化
+
+用法:
+    python benchmarks/db_maintenance.py [--domains 50] [--live 500] [--dead 5000] [--archive] [--output results.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from dataclasses import asdict
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.common.database import DatabaseManager
+from app.common.maintenance import run_maintenance
+
+
+def build_database(path, domains, live, dead):
+    """每个域名 live 条启用记录和 dead 条一年前软删除的记录"""
+    database = DatabaseManager(path)
+    provider_id = database.add_dns_provider('bench', 'simulated', '{}')
+    domain_ids = [database.add_domain(f'zone{index}.bench.test', provider_id) for index in range(domains)]
+    with database.connect() as conn:
+        cursor = conn.cursor()
+        for domain_id in domain_ids:
+            cursor.executemany("""
+                INSERT INTO dns_records (domain_id, record_id, name, type, value, enabled, updated_at)
+                VALUES (?, ?, ?, 'A', ?, ?, datetime('now', '-365 days'))
+            """, [(domain_id, str(i), f'host{i}', f'10.0.{i >> 8 & 255}.{i & 255}', int(i < live))
+                  for i in range(live + dead)])
+        for name in DatabaseManager.PARTIAL_INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        conn.commit()
+    return database
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据库维护基准测试')
+    parser.add_argument('--domains', type=int, default=50, help='域名数')
+    parser.add_argument('--live', type=int, default=500, help='每个域名的启用记录数')
+    parser.add_argument('--dead', type=int, default=5000, help='每个域名的软删除记录数')
+    parser.add_argument('--archive', action='store_true', help='清除前归档软删除的记录')
+    parser.add_argument('--output', help='结果输出文件，默认输出到stdout')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        database = build_database(os.path.join(workdir, 'bench.db'), args.domains, args.live, args.dead)
+        print(f'构造数据库 {time.perf_counter() - start:.2f}s', file=sys.stderr)
+        report = run_maintenance(retention_days=30, archive=args.archive, database=database)
+        print(report.summary(), file=sys.stderr)
+    
+    result = asdict(report)
+    result.update(reclaimed_bytes=report.reclaimed_bytes, speedup=round(report.speedup, 2))
+    output = {
+        'benchmark': 'db_maintenance',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': {k: v for k, v in vars(args).items() if k != 'output'},
+        'result': result,
+    }
+    text = json.dumps(output, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+提供商吞吐基准测试
+启动本地模拟API服务器（见 stub_servers.py），测量各提供商在不同区域规模下的
+get_domains、get_records、批量变更，以及本地数据库写入和界面表格填充的吞吐，结果以JSON输出
+
+用法:
+    python benchmarks/provider_suite.py [--sizes 1000,10000,100000] [--providers aliyun,tencent,cloudflare]
+                                        [--latency-ms 0] [--page-size 500] [--throttle-rps 0]
+                                        [--zones 200] [--mutations 200] [--workers 8]
+                                        [--ui-max 10000] [--no-ui]
+                                        [--output results.json] [--compare baseline.json] [--tolerance 0.2]
+
+--compare 指定以前的结果文件时，吞吐下降超过 tolerance 的项目会被列出，并以退出码1结束
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# 数据库文件在当前目录创建，先切换到临时目录，避免污染工作区
+ORIGINAL_CWD = os.getcwd()
+os.chdir(tempfile.mkdtemp(prefix='dnsmgr-bench-'))
+
+from stub_servers import StubProcess, StubOptions, PROVIDER_TYPES, synthetic_record
+from app.common.database import db
+from app.dns.base import DNSRecord
+from app.dns.changeset import RecordChange, apply_changes
+
+
+def result(benchmark, seconds, count, unit, **extra):
+    """构建一条结果"""
+    entry = {
+        'benchmark': benchmark,
+        'seconds': round(seconds, 4),
+        'count': count,
+        'throughput': round(count / seconds, 1) if seconds > 0 else 0.0,
+        'unit': unit,
+    }
+    entry.update(extra)
+    print(f"{benchmark:<12} {extra.get('provider', '-'):<10} {extra.get('records', count):>7} "
+          f"{entry['throughput']:>12.1f} {unit}  ({seconds:.2f}s)", file=sys.stderr)
+    return entry
+
+
+def result_key(entry):
+    """用于对比的结果键"""
+    return (entry['benchmark'], entry.get('provider', ''), entry.get('records', 0), entry.get('workers', 0))
+
+
+def bench_provider(kind, sizes, args):
+    """单个提供商的网络相关基准"""
+    spec = [(f'zone{i}.bench.test', 0) for i in range(args.zones)]
+    spec += [(f'records-{size}.bench.test', size) for size in sizes]
+    spec.append(('mutations.bench.test', 0))
+    
+    options = StubOptions(latency_ms=args.latency_ms, max_page_size=args.page_size,
+                          throttle_rps=args.throttle_rps)
+    results = []
+    with StubProcess(kind, spec, options) as server:
+        provider = server.create_provider()
+        
+        server.reset_counters()
+        start = time.perf_counter()
+        domains = provider.get_domains()
+        results.append(result('get_domains', time.perf_counter() - start, len(domains), 'zones/s',
+                              provider=kind, records=len(spec), **server.stats()))
+        
+        for size in sizes:
+            server.reset_counters()
+            start = time.perf_counter()
+            records = provider.get_records(f'records-{size}.bench.test')
+            results.append(result('get_records', time.perf_counter() - start, len(records), 'records/s',
+                                  provider=kind, records=size, **server.stats()))
+        
+        for workers in sorted({1, args.workers}):
+            changes = [
+                RecordChange('create', DNSRecord(**{**synthetic_record(i), 'name': f'm{workers}-{i}'}))
+                for i in range(args.mutations)
+            ]
+            server.reset_counters()
+            start = time.perf_counter()
+            applied, failed = apply_changes(provider, 'mutations.bench.test', changes, max_workers=workers)
+            results.append(result('mutate', time.perf_counter() - start, len(applied), 'changes/s',
+                                  provider=kind, records=args.mutations, workers=workers, failed=len(failed),
+                                  **server.stats()))
+            
+            deletes = [RecordChange('delete', change.record) for change in applied]
+            apply_changes(provider, 'mutations.bench.test', deletes, max_workers=workers)
+    return results
+
+
+def bench_db(sizes):
+    """本地数据库整域名替换写入"""
+    provider_id = db.add_dns_provider('bench-db', 'cloudflare', '{}')
+    results = []
+    for size in sizes:
+        domain_id = db.add_domain(f'db-{size}.bench.test', provider_id)
+        records = [{**synthetic_record(i), 'id': str(i)} for i in range(size)]
+        start = time.perf_counter()
+        db.replace_dns_records(domain_id, records)
+        results.append(result('db_write', time.perf_counter() - start, size, 'records/s', records=size))
+    return results
+
+
+def bench_ui(sizes, ui_max):
+    """记录表格填充（离屏渲染）"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication([])
+        from app.view.record_interface import RecordInterface
+    except ImportError as e:
+        print(f'跳过界面基准: {e}', file=sys.stderr)
+        return []
+    
+    results = []
+    for size in sizes:
+        if size > ui_max:
+            print(f'跳过界面基准 {size} 条（超过 --ui-max {ui_max}）', file=sys.stderr)
+            continue
+        records = [DNSRecord(**{**synthetic_record(i), 'id': str(i)}) for i in range(size)]
+        interface = RecordInterface()
+        app.processEvents()
+        start = time.perf_counter()
+        interface.on_load_finished(True, records, '')
+        app.processEvents()
+        results.append(result('ui_fill', time.perf_counter() - start, size, 'rows/s', records=size))
+        interface.deleteLater()
+        app.processEvents()
+    return results
+
+
+def compare(results, baseline_file, tolerance):
+    """与基线对比，返回吞吐下降超过阈值的项目"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = {result_key(entry): entry for entry in json.load(f).get('results', [])}
+    
+    regressions = []
+    for entry in results:
+        old = baseline.get(result_key(entry))
+        if not old or not old.get('throughput'):
+            continue
+        ratio = entry['throughput'] / old['throughput']
+        if ratio < 1 - tolerance:
+            regressions.append({
+                'key': list(result_key(entry)),
+                'baseline': old['throughput'],
+                'current': entry['throughput'],
+                'ratio': round(ratio, 3)
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='提供商吞吐基准测试')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='区域记录数，逗号分隔')
+    parser.add_argument('--providers', default=','.join(PROVIDER_TYPES), help='提供商类型，逗号分隔')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='模拟服务器每个请求的延迟')
+    parser.add_argument('--page-size', type=int, default=500, help='模拟服务器单页最多返回条数')
+    parser.add_argument('--throttle-rps', type=int, default=0, help='模拟服务器每秒请求上限，0为不限')
+    parser.add_argument('--zones', type=int, default=200, help='get_domains 测试的域名数量')
+    parser.add_argument('--mutations', type=int, default=200, help='批量变更测试的记录数')
+    parser.add_argument('--workers', type=int, default=8, help='批量变更的并发数')
+    parser.add_argument('--ui-max', type=int, default=10000, help='界面表格填充测试的最大记录数')
+    parser.add_argument('--no-ui', action='store_true', help='跳过界面表格填充测试')
+    parser.add_argument('--output', help='结果输出文件，默认输出到stdout')
+    parser.add_argument('--compare', help='用于对比的基线结果文件')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='允许的吞吐下降比例')
+    args = parser.parse_args()
+    
+    output = os.path.join(ORIGINAL_CWD, args.output) if args.output else None
+    baseline = os.path.join(ORIGINAL_CWD, args.compare) if args.compare else None
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    providers = [p for p in args.providers.split(',') if p]
+    
+    results = []
+    for kind in providers:
+        results.extend(bench_provider(kind, sizes, args))
+    results.extend(bench_db(sizes))
+    if not args.no_ui:
+        results.extend(bench_ui(sizes, args.ui_max))
+    
+    report = {
+        'benchmark': 'provider_suite',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+        'results': results,
+    }
+    
+    exit_code = 0
+    if baseline:
+        report['regressions'] = compare(results, baseline, args.tolerance)
+        for regression in report['regressions']:
+            print(f"性能下降: {regression['key']} {regression['baseline']} -> {regression['current']}",
+                  file=sys.stderr)
+        exit_code = 1 if report['regressions'] else 0
+    
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
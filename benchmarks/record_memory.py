@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+记录加载内存基准测试（tracemalloc）
+模拟从提供商API响应构建记录并交给界面的过程，对比旧的字典复制流程与当前的DNSRecord直传流程
+
+用法:
+    python benchmarks/record_memory.py [--records 100000]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.dns.base import DNSRecord
+
+RECORD_TYPES = ['A', 'AAAA', 'CNAME', 'MX', 'TXT']
+
+
+@dataclass
+class LegacyDNSRecord:
+    """旧版记录类（无__slots__），用于对比"""
+    id: Optional[str] = None
+    name: str = ""
+    type: str = "A"
+    value: str = ""
+    ttl: int = 600
+    priority: int = 0
+    enabled: bool = True
+
+
+def api_response(count):
+    """生成模拟的API响应（与阿里云DescribeDomainRecords的记录结构一致）"""
+    for i in range(count):
+        yield {
+            'RecordId': str(10000000 + i),
+            'RR': f'host{i}',
+            # 模拟JSON解码：每条记录的类型都是独立的字符串对象
+            'Type': json.loads(f'"{RECORD_TYPES[i % len(RECORD_TYPES)]}"'),
+            'Value': f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}',
+            'TTL': '600',
+            'Priority': '0',
+            'Status': 'ENABLE'
+        }
+
+
+def load_legacy(count):
+    """旧流程：构建记录后再逐条复制为字典交给界面"""
+    records = [
+        LegacyDNSRecord(
+            id=item['RecordId'], name=item['RR'], type=item['Type'], value=item['Value'],
+            ttl=int(item['TTL']), priority=int(item['Priority']), enabled=item['Status'] == 'ENABLE'
+        )
+        for item in api_response(count)
+    ]
+    record_list = []
+    for record in records:
+        record_list.append({
+            'id': record.id,
+            'name': record.name,
+            'type': record.type,
+            'value': record.value,
+            'ttl': record.ttl,
+            'priority': record.priority
+        })
+    return records, record_list
+
+
+def load_current(count):
+    """当前流程：构建DNSRecord后直接交给界面"""
+    return [
+        DNSRecord(
+            id=item['RecordId'], name=item['RR'], type=item['Type'], value=item['Value'],
+            ttl=int(item['TTL']), priority=int(item['Priority']), enabled=item['Status'] == 'ENABLE'
+        )
+        for item in api_response(count)
+    ]
+
+
+def measure(func, count):
+    """测量峰值与常驻内存"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(count)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {
+        'seconds': round(elapsed, 4),
+        'retained_mb': round(current / 1024 / 1024, 2),
+        'peak_mb': round(peak / 1024 / 1024, 2),
+        'bytes_per_record': round(current / count, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='记录加载内存基准测试')
+    parser.add_argument('--records', type=int, default=100000, help='记录数量')
+    args = parser.parse_args()
+    
+    result = {
+        'benchmark': 'record_memory',
+        'records': args.records,
+        'legacy': measure(load_legacy, args.records),
+        'current': measure(load_current, args.records)
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+RFC 2136 提供商基准测试
+在本进程内的权威DNS服务器模拟（见 stub_dns_server.py）上对比:
+- 整区读取：AXFR完整传输与区域副本存在时的IXFR增量读取（服务端修改 --changes 条记录后）
+- 记录变更：每条变更一条UPDATE消息与按 batch_size 合并为一条消息
+
+用法:
+    python benchmarks/rfc2136_transfer.py [--sizes 1000,10000,50000] [--changes 100] [--updates 1000]
+                                          [--batch-size 100] [--latency-ms 1] [--tsig] [--output results.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_dns_server import StubDNSServer
+from app.dns.base import DNSRecord
+from app.dns.changeset import RecordChange, apply_changes
+
+
+def result(benchmark, mode, seconds, count, unit, **extra):
+    """构建一条结果"""
+    entry = {
+        'benchmark': benchmark,
+        'mode': mode,
+        'seconds': round(seconds, 4),
+        'count': count,
+        'throughput': round(count / seconds, 1) if seconds > 0 else 0.0,
+        'unit': unit,
+    }
+    entry.update(extra)
+    print(f"{benchmark:<8} {mode:<8} {count:>7} {entry['throughput']:>12.1f} {unit}  ({seconds:.2f}s, "
+          f"{extra.get('bytes', 0)} 字节)", file=sys.stderr)
+    return entry
+
+
+def bench_read(server, provider, size, changes):
+    """同一区域先AXFR完整读取，服务端修改后再IXFR增量读取"""
+    domain = f'records-{size}.bench.test'
+    results = []
+    for mode in ('axfr', 'ixfr'):
+        if mode == 'ixfr':
+            server.edit(domain, add=[DNSRecord(name=f'changed{i}', type='A', value=f'192.0.2.{i % 250}')
+                                     for i in range(changes)])
+        server.reset_counters()
+        start = time.perf_counter()
+        count = len(provider.get_records(domain))
+        results.append(result('read', mode, time.perf_counter() - start, count, 'records/s',
+                              records=size, changes=changes if mode == 'ixfr' else 0, **server.stats()))
+    return results
+
+
+def bench_update(server, provider, updates, batch_size):
+    """向空区域分别逐条提交和合并提交新增"""
+    results = []
+    for mode, size in (('single', 0), ('batched', batch_size)):
+        domain = f'{mode}.bench.test'
+        changes = [RecordChange('create', DNSRecord(name=f'host{i}', type='A', value=f'10.0.{i >> 8 & 255}.{i & 255}'))
+                   for i in range(updates)]
+        provider.update_batch_size = size
+        server.reset_counters()
+        start = time.perf_counter()
+        applied, failed = apply_changes(provider, domain, changes)
+        results.append(result('update', mode, time.perf_counter() - start, len(applied), 'records/s',
+                              records=updates, batch_size=size, failed=len(failed), **server.stats()))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RFC 2136 提供商基准测试')
+    parser.add_argument('--sizes', default='1000,10000,50000', help='区域记录数，逗号分隔')
+    parser.add_argument('--changes', type=int, default=100, help='两次读取之间服务端修改的记录数')
+    parser.add_argument('--updates', type=int, default=1000, help='变更提交测试的记录数')
+    parser.add_argument('--batch-size', type=int, default=100, help='合并提交时每条UPDATE消息的变更数')
+    parser.add_argument('--latency-ms', type=float, default=1.0, help='模拟服务器每条请求的延迟')
+    parser.add_argument('--tsig', action='store_true', help='要求TSIG签名')
+    parser.add_argument('--output', help='结果输出文件，默认输出到stdout')
+    args = parser.parse_args()
+    
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    spec = [(f'records-{size}.bench.test', size) for size in sizes]
+    spec += [('single.bench.test', 0), ('batched.bench.test', 0)]
+    secret = StubDNSServer.TEST_SECRET if args.tsig else ''
+    
+    results = []
+    with StubDNSServer(spec, tsig_secret=secret, latency_ms=args.latency_ms) as server:
+        provider = server.create_provider()
+        for size in sizes:
+            results.extend(bench_read(server, provider, size, args.changes))
+        results.extend(bench_update(server, provider, args.updates, args.batch_size))
+    
+    report = {
+        'benchmark': 'rfc2136_transfer',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': {k: v for k, v in vars(args).items() if k != 'output'},
+        'results': results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
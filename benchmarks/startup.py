@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+GUI启动耗时基准测试
+统计模块导入、主窗口构建以及首帧绘制（time-to-first-frame）的耗时
+
+用法:
+    python benchmarks/startup.py [--runs 5] [--workdir DIR] [--offscreen]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once():
+    """在当前进程中测量一次启动，结果以JSON输出到stdout"""
+    start = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    
+    from PyQt5.QtCore import Qt, QObject, QEvent, QTimer
+    from PyQt5.QtWidgets import QApplication
+    
+    timings = {}
+    
+    class FirstFrameFilter(QObject):
+        """记录主窗口第一次绘制事件的时间"""
+        
+        def __init__(self):
+            super().__init__()
+            self.window = None
+        
+        def eventFilter(self, obj, event):
+            if (event.type() == QEvent.Paint and 'first_frame' not in timings
+                    and self.window is not None and obj is self.window):
+                timings['first_frame'] = time.perf_counter() - start
+            return False
+    
+    QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
+    app = QApplication(sys.argv[:1])
+    first_frame_filter = FirstFrameFilter()
+    app.installEventFilter(first_frame_filter)
+    timings['qapplication'] = time.perf_counter() - start
+    
+    from app.view import main_window
+    timings['import'] = time.perf_counter() - start
+    
+    # 构造前记录窗口类，首帧可能在构造函数内部（启动画面）发生
+    original_show = main_window.MainWindow.show
+    
+    def show(window):
+        first_frame_filter.window = window
+        original_show(window)
+    
+    main_window.MainWindow.show = show
+    window = main_window.MainWindow()
+    timings['window_created'] = time.perf_counter() - start
+    
+    # 等待延迟加载的数据库操作执行完毕
+    QTimer.singleShot(0, app.quit)
+    app.exec_()
+    timings['idle'] = time.perf_counter() - start
+    timings.setdefault('first_frame', timings['window_created'])
+    
+    window.close()
+    print(json.dumps(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GUI启动耗时基准测试')
+    parser.add_argument('--runs', type=int, default=5, help='测量次数（每次使用独立进程）')
+    parser.add_argument('--workdir', help='运行目录（数据库与配置文件所在目录），默认使用临时目录')
+    parser.add_argument('--offscreen', action='store_true', help='使用offscreen平台插件，无需显示器')
+    parser.add_argument('--once', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.once:
+        run_once()
+        return
+    
+    workdir = args.workdir or tempfile.mkdtemp(prefix='fluentdns-bench-')
+    env = dict(os.environ)
+    if args.offscreen:
+        env['QT_QPA_PLATFORM'] = 'offscreen'
+    
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--once'],
+            cwd=workdir, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    
+    result = {'benchmark': 'startup', 'runs': args.runs, 'unit': 'seconds'}
+    for key in samples[0]:
+        values = sorted(sample[key] for sample in samples)
+        result[key] = {
+            'min': round(values[0], 4),
+            'median': round(values[len(values) // 2], 4),
+            'max': round(values[-1], 4)
+        }
+    
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
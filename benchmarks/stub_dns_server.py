@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+"""
+本地权威DNS服务器模拟（RFC 2136 提供商的测试替身）
+在本进程的线程中通过TCP应答SOA查询、AXFR、IXFR和UPDATE，可要求TSIG签名:
+- 区域数据按 [(域名, 记录数)] 用与 stub_servers.py 相同的确定性记录生成
+- 每次UPDATE递增SOA序列号并记录增量日志，IXFR按日志返回增量，日志不覆盖请求的序列号时返回完整区域
+- AXFR按 xfr_chunk 条记录拆分为多条消息，签名时按 RFC 8945 连续签名
+
+用法:
+    with StubDNSServer([('example.test', 1000)], tsig_secret=StubDNSServer.TEST_SECRET) as server:
+        provider = server.create_provider()
+        provider.get_records('example.test')
+"""
+
+import os
+import sys
+import time
+import struct
+import threading
+import socketserver
+from typing import Dict, List, Any, Optional, Tuple
+
+import dns.name
+import dns.rcode
+import dns.rdata
+import dns.rrset
+import dns.flags
+import dns.opcode
+import dns.update
+import dns.message
+import dns.rdatatype
+import dns.rdataclass
+import dns.tsigkeyring
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.dns.base import DNSProviderFactory, DNSRecord
+from app.dns.zonefile import format_rdata
+from app.dns import rfc2136  # 注册提供商
+from stub_servers import synthetic_record
+
+# (名称, TTL, 记录数据)
+RR = Tuple[dns.name.Name, int, dns.rdata.Rdata]
+
+
+class StubZone:
+    """单个区域的记录和增量日志"""
+    
+    def __init__(self, domain: str, record_count: int = 0, journal_size: int = 100):
+        self.origin = dns.name.from_text(domain)
+        self.serial = 1
+        self.journal_size = journal_size
+        # (名称, 类型) -> [TTL, {记录数据: None}]（用字典保持插入顺序）
+        self.rrsets: Dict[Tuple[dns.name.Name, int], List[Any]] = {}
+        # [(起始序列号, 结束序列号, 删除的记录, 新增的记录)]
+        self.journal: List[Tuple[int, int, List[RR], List[RR]]] = []
+        self.lock = threading.Lock()
+        
+        ns = dns.name.from_text('ns1', self.origin)
+        self._put(self.origin, 3600, dns.rdata.from_text(dns.rdataclass.IN, dns.rdatatype.NS, ns.to_text()))
+        for index in range(record_count):
+            self._put(*self.to_rr(DNSRecord(**synthetic_record(index))))
+    
+    def to_rr(self, record: DNSRecord) -> RR:
+        name = dns.name.from_text(record.name, self.origin) if record.name not in ('', '@') else self.origin
+        rdata = dns.rdata.from_text(dns.rdataclass.IN, record.type, format_rdata(record),
+                                    origin=self.origin, relativize=False)
+        return name, int(record.ttl), rdata
+    
+    def _put(self, name: dns.name.Name, ttl: int, rdata: dns.rdata.Rdata):
+        entry = self.rrsets.setdefault((name, rdata.rdtype), [ttl, {}])
+        entry[0] = ttl  # RFC 2136: 新增记录的TTL应用到整个记录集
+        entry[1][rdata] = None
+    
+    def soa(self) -> dns.rrset.RRset:
+        text = f'ns1 hostmaster {self.serial} 3600 600 86400 300'
+        return dns.rrset.from_rdata(self.origin, 3600,
+                                    dns.rdata.from_text(dns.rdataclass.IN, dns.rdatatype.SOA, text,
+                                                        origin=self.origin, relativize=False))
+    
+    def all_rrsets(self) -> List[dns.rrset.RRset]:
+        return [dns.rrset.from_rdata_list(name, ttl, list(rdatas))
+                for (name, _), (ttl, rdatas) in self.rrsets.items() if rdatas]
+    
+    def count(self) -> int:
+        return sum(len(rdatas) for _, rdatas in self.rrsets.values())
+    
+    def apply(self, update: List[dns.rrset.RRset]) -> int:
+        """应用UPDATE消息的更新段，返回响应码；有变化时递增序列号并写入增量日志"""
+        for rrset in update:
+            if not rrset.name.is_subdomain(self.origin):
+                return dns.rcode.NOTZONE
+        
+        with self.lock:
+            before: Dict[Tuple[dns.name.Name, int], Tuple[int, set]] = {}
+            
+            def touch(key):
+                if key not in before:
+                    ttl, rdatas = self.rrsets.get(key, [0, {}])
+                    before[key] = (ttl, set(rdatas))
+            
+            for rrset in update:
+                if rrset.rdclass == dns.rdataclass.IN:
+                    for rdata in rrset:
+                        touch((rrset.name, rdata.rdtype))
+                        self._put(rrset.name, rrset.ttl, rdata)
+                elif rrset.rdclass == dns.rdataclass.ANY:
+                    keys = [key for key in self.rrsets if key[0] == rrset.name
+                            and (rrset.rdtype == dns.rdatatype.ANY or key[1] == rrset.rdtype)]
+                    for key in keys:
+                        if key[1] in (dns.rdatatype.SOA, dns.rdatatype.NS) and key[0] == self.origin:
+                            continue
+                        touch(key)
+                        self.rrsets[key][1].clear()
+                elif rrset.rdclass == dns.rdataclass.NONE:
+                    for rdata in rrset:
+                        key = (rrset.name, rdata.rdtype)
+                        if key in self.rrsets:
+                            touch(key)
+                            self.rrsets[key][1].pop(rdata, None)
+                else:
+                    return dns.rcode.FORMERR
+            
+            deleted: List[RR] = []
+            added: List[RR] = []
+            for key, (old_ttl, old_rdatas) in before.items():
+                new_ttl, new_rdatas = self.rrsets.get(key, [0, {}])
+                deleted.extend((key[0], old_ttl, r) for r in old_rdatas if r not in new_rdatas or old_ttl != new_ttl)
+                added.extend((key[0], new_ttl, r) for r in new_rdatas if r not in old_rdatas or old_ttl != new_ttl)
+                if not new_rdatas:
+                    self.rrsets.pop(key, None)
+            if deleted or added:
+                self.journal.append((self.serial, self.serial + 1, deleted, added))
+                self.serial += 1
+                del self.journal[:-self.journal_size]
+            return dns.rcode.NOERROR
+    
+    def ixfr(self, serial: int) -> Optional[List[dns.rrset.RRset]]:
+        """从serial开始的增量（不含首尾的当前SOA），日志不覆盖时返回None"""
+        if serial == self.serial:
+            return []
+        start = next((i for i, entry in enumerate(self.journal) if entry[0] == serial), None)
+        if start is None:
+            return None
+        rrsets = []
+        for old_serial, new_serial, deleted, added in self.journal[start:]:
+            rrsets.append(self.soa_with_serial(old_serial))
+            rrsets.extend(dns.rrset.from_rdata(name, ttl, rdata) for name, ttl, rdata in deleted)
+            rrsets.append(self.soa_with_serial(new_serial))
+            rrsets.extend(dns.rrset.from_rdata(name, ttl, rdata) for name, ttl, rdata in added)
+        return rrsets
+    
+    def soa_with_serial(self, serial: int) -> dns.rrset.RRset:
+        rrset = self.soa()
+        return dns.rrset.from_rdata(self.origin, rrset.ttl, rrset[0].replace(serial=serial))
+
+
+class StubDNSHandler(socketserver.BaseRequestHandler):
+    """TCP连接处理，一个连接上可以依次发送多条消息"""
+    
+    def handle(self):
+        server: 'StubDNSServer' = self.server.stub
+        while True:
+            header = self.read(2)
+            if not header:
+                return
+            wire = self.read(struct.unpack('!H', header)[0])
+            if wire is None:
+                return
+            try:
+                query = dns.message.from_wire(wire, keyring=server.keyring)
+            except Exception:
+                # 签名校验失败等，与BIND一致返回不签名的NOTAUTH
+                server.count('rejected')
+                query = dns.message.from_wire(wire, keyring=False)
+                response = dns.message.Message(id=query.id)
+                response.flags = dns.flags.QR
+                response.set_opcode(query.opcode())
+                response.question = list(query.question)
+                response.set_rcode(dns.rcode.NOTAUTH)
+                wire = response.to_wire()
+                self.request.sendall(struct.pack('!H', len(wire)) + wire)
+                return
+            for response, _ in server.respond(query):
+                self.request.sendall(struct.pack('!H', len(response)) + response)
+                server.count('bytes', len(response))
+    
+    def read(self, size: int) -> Optional[bytes]:
+        data = b''
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+
+class StubDNSServer:
+    """本地权威DNS服务器"""
+    
+    TEST_KEY_NAME = 'fluentdns-test.'
+    TEST_SECRET = 'c3R1Yi1kbnMtc2VydmVyLXRzaWcta2V5LWZvci10ZXN0cw=='
+    
+    def __init__(self, spec: List[Tuple[str, int]], tsig_key_name: str = TEST_KEY_NAME,
+                 tsig_secret: str = '', latency_ms: float = 0.0, xfr_chunk: int = 500,
+                 ixfr: bool = True, journal_size: int = 100):
+        """tsig_secret 非空时要求所有传输和UPDATE使用TSIG签名；ixfr 为False时IXFR总是返回完整区域"""
+        self.zones = {dns.name.from_text(domain): StubZone(domain, count, journal_size) for domain, count in spec}
+        self.tsig_key_name = tsig_key_name
+        self.tsig_secret = tsig_secret
+        self.keyring = dns.tsigkeyring.from_text({tsig_key_name: tsig_secret}) if tsig_secret else None
+        self.latency_ms = latency_ms
+        self.xfr_chunk = xfr_chunk
+        self.ixfr_enabled = ixfr
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.tcpd = None
+        self.thread = None
+    
+    @property
+    def port(self) -> int:
+        return self.tcpd.server_address[1]
+    
+    def start(self) -> 'StubDNSServer':
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.tcpd = socketserver.ThreadingTCPServer(('127.0.0.1', 0), StubDNSHandler)
+        self.tcpd.daemon_threads = True
+        self.tcpd.stub = self
+        self.thread = threading.Thread(target=self.tcpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        if self.tcpd is not None:
+            self.tcpd.shutdown()
+            self.tcpd.server_close()
+            self.tcpd = None
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+    
+    def reset_counters(self):
+        with self._lock:
+            self.counters.clear()
+    
+    def create_provider(self, **config):
+        """创建指向本服务器的提供商实例，config 覆盖默认配置"""
+        data = {
+            'server': '127.0.0.1',
+            'port': self.port,
+            'zones': [origin.to_text(omit_final_dot=True) for origin in self.zones],
+        }
+        if self.keyring is not None:
+            data['tsig_key_name'] = self.tsig_key_name
+            data['tsig_secret'] = self.tsig_secret
+        data.update(config)
+        return DNSProviderFactory.create('rfc2136', data)
+    
+    def zone(self, domain: str) -> StubZone:
+        return self.zones[dns.name.from_text(domain)]
+    
+    def edit(self, domain: str, add: List[DNSRecord] = (), delete: List[DNSRecord] = ()) -> int:
+        """在服务端直接修改记录（模拟其他工具的修改），返回新的序列号"""
+        zone = self.zone(domain)
+        update = dns.update.UpdateMessage(zone.origin)
+        for record in delete:
+            name, _, rdata = zone.to_rr(record)
+            update.delete(name, rdata)
+        for record in add:
+            update.add(*zone.to_rr(record))
+        zone.apply(update.update)
+        return zone.serial
+    
+    def respond(self, query: dns.message.Message):
+        """生成应答，逐条产出 (消息wire, 是否为多消息传输)"""
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        
+        signed = query.had_tsig
+        if self.keyring is not None and not signed:
+            self.count('refused')
+            yield self.reply(query, dns.rcode.REFUSED), False
+            return
+        
+        opcode = query.opcode()
+        zone = self.zones.get(query.question[0].name) if query.question else None
+        if zone is None:
+            yield self.reply(query, dns.rcode.NOTAUTH), False
+            return
+        
+        if opcode == dns.opcode.UPDATE:
+            self.count('update')
+            yield self.reply(query, zone.apply(query.update)), False
+            return
+        if opcode != dns.opcode.QUERY:
+            yield self.reply(query, dns.rcode.NOTIMP), False
+            return
+        
+        rdtype = query.question[0].rdtype
+        if rdtype == dns.rdatatype.SOA:
+            self.count('soa')
+            response = dns.message.make_response(query)
+            response.flags |= dns.flags.AA
+            response.answer.append(zone.soa())
+            yield response.to_wire(), False
+            return
+        if rdtype not in (dns.rdatatype.AXFR, dns.rdatatype.IXFR):
+            yield self.reply(query, dns.rcode.NOTIMP), False
+            return
+        
+        with zone.lock:
+            soa = zone.soa()
+            body = None
+            if rdtype == dns.rdatatype.IXFR and self.ixfr_enabled:
+                client = query.authority[0][0].serial if query.authority else None
+                body = zone.ixfr(client) if client is not None else None
+            if body is None:
+                self.count('axfr')
+                body = zone.all_rrsets()
+            else:
+                self.count('ixfr')
+                self.count('ixfr_rrs', len(body))
+            rrsets = [soa] + body + [soa] if body or rdtype == dns.rdatatype.AXFR else [soa]
+        
+        yield from self.transfer(query, rrsets)
+    
+    def reply(self, query: dns.message.Message, rcode: int) -> bytes:
+        response = dns.message.make_response(query)
+        response.set_rcode(rcode)
+        return response.to_wire()
+    
+    def transfer(self, query: dns.message.Message, rrsets: List[dns.rrset.RRset]):
+        """按 xfr_chunk 条记录拆分为多条消息，签名的传输在消息之间延续TSIG上下文"""
+        tsig_ctx = None
+        chunk: List[dns.rrset.RRset] = []
+        size = 0
+        first = True
+        
+        def render(answer):
+            nonlocal tsig_ctx, first
+            response = dns.message.make_response(query)
+            response.flags |= dns.flags.AA
+            response.answer = answer
+            if not first:
+                # 与BIND一致，只有第一条消息带问题段
+                response.question = []
+            wire = response.to_wire(multi=True, tsig_ctx=tsig_ctx)
+            tsig_ctx = response.tsig_ctx if query.had_tsig else None
+            first = False
+            return wire
+        
+        for rrset in rrsets:
+            chunk.append(rrset)
+            size += len(rrset)
+            if size >= self.xfr_chunk:
+                yield render(chunk), True
+                chunk = []
+                size = 0
+        if chunk:
+            yield render(chunk), True
@@ -0,0 +1,586 @@
+# -*- coding: utf-8 -*-
+"""
+本地DNS提供商API模拟服务器
+在本机端口上模拟阿里云RPC、腾讯云DNSPod（TC3）和CloudFlare v4接口，
+支持配置响应延迟、单页最大条数和限流，用于基准测试，不校验签名
+
+用法:
+    store = ZoneStore()
+    store.add_zone('example.com', 10000)
+    with StubServer('cloudflare', store, StubOptions(latency_ms=20)) as server:
+        provider = server.create_provider()
+        provider.get_records('example.com')
+
+StubProcess 在子进程中运行同样的服务器，避免服务端与被测客户端争用GIL，
+区域数据按 [(域名, 记录数)] 在子进程中生成，请求计数通过 /__stub/ 控制接口读取
+"""
+
+import os
+import sys
+import json
+import email
+import time
+import threading
+import multiprocessing
+import urllib.parse
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any, Optional, Tuple, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.dns.base import DNSProviderFactory, DNSRecord
+from app.dns.zonefile import ZoneFileParser, format_record
+from app.dns import aliyun, tencent, cloudflare  # 导入所有提供商实现
+
+RECORD_TYPES = ['A', 'AAAA', 'CNAME', 'MX', 'TXT']
+
+PROVIDER_TYPES = ['aliyun', 'tencent', 'cloudflare']
+
+
+def synthetic_record(index: int) -> Dict[str, Any]:
+    """生成第index条确定性的模拟记录"""
+    record_type = RECORD_TYPES[index % len(RECORD_TYPES)]
+    if record_type == 'A':
+        value = f'10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}'
+    elif record_type == 'AAAA':
+        value = f'fd00::{index:x}'
+    elif record_type == 'CNAME':
+        value = f'target{index}.example.net'
+    elif record_type == 'MX':
+        value = f'mx{index}.example.net'
+    else:
+        value = f'v=bench{index}'
+    return {
+        'name': f'host{index}',
+        'type': record_type,
+        'value': value,
+        'ttl': 600,
+        'priority': 10 if record_type == 'MX' else 0
+    }
+
+
+@dataclass
+class StubOptions:
+    """模拟服务器参数"""
+    latency_ms: float = 0.0  # 每个请求的额外延迟
+    max_page_size: int = 500  # 单页最多返回的条数（客户端请求更多时截断）
+    throttle_rps: int = 0  # 每秒允许的请求数，超过后返回限流错误，0表示不限流
+
+
+class ZoneStore:
+    """模拟服务器共享的域名和记录数据"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self.zones: Dict[str, Dict[str, Any]] = {}  # 域名 -> {'id', 'records': {记录ID: 记录}, 'order': [记录ID]}
+        self.record_zone: Dict[int, str] = {}  # 记录ID -> 域名
+    
+    def new_id(self) -> int:
+        with self._lock:
+            value = self._next_id
+            self._next_id += 1
+            return value
+    
+    def add_zone(self, domain: str, record_count: int = 0):
+        """添加域名并生成record_count条确定性记录"""
+        zone = {'id': f'{len(self.zones) + 1:032x}', 'records': {}, 'order': []}
+        self.zones[domain] = zone
+        for index in range(record_count):
+            self.add_record(domain, synthetic_record(index))
+    
+    @classmethod
+    def from_spec(cls, spec: List[Tuple[str, int]]) -> 'ZoneStore':
+        """按 [(域名, 记录数)] 生成数据"""
+        store = cls()
+        for domain, record_count in spec:
+            store.add_zone(domain, record_count)
+        return store
+    
+    def add_record(self, domain: str, record: Dict[str, Any]) -> int:
+        record_id = self.new_id()
+        with self._lock:
+            self.zones[domain]['records'][record_id] = dict(record)
+            self.zones[domain]['order'].append(record_id)
+            self.record_zone[record_id] = domain
+        return record_id
+    
+    def update_record(self, record_id: int, record: Dict[str, Any]):
+        with self._lock:
+            domain = self.record_zone[record_id]
+            self.zones[domain]['records'][record_id] = dict(record)
+    
+    def delete_record(self, record_id: int):
+        with self._lock:
+            domain = self.record_zone.pop(record_id)
+            del self.zones[domain]['records'][record_id]
+            self.zones[domain]['order'].remove(record_id)
+    
+    def page(self, domain: str, offset: int, limit: int,
+             match: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Tuple[List[Tuple[int, Dict[str, Any]]], int]:
+        """按偏移分页读取记录（match 为可选的筛选条件），返回 (记录列表, 总数)"""
+        with self._lock:
+            zone = self.zones[domain]
+            ids = zone['order']
+            if match is not None:
+                ids = [record_id for record_id in ids if match(zone['records'][record_id])]
+            return [(record_id, zone['records'][record_id]) for record_id in ids[offset:offset + limit]], len(ids)
+    
+    def zone_by_id(self, zone_id: str) -> Optional[str]:
+        for domain, zone in self.zones.items():
+            if zone['id'] == zone_id:
+                return domain
+        return None
+
+
+def create_provider(kind: str, address: str):
+    """创建指向模拟服务器（host:port）的提供商实例"""
+    if kind == 'aliyun':
+        provider = DNSProviderFactory.create('aliyun', {'access_key_id': 'bench', 'access_key_secret': 'bench'})
+        provider.endpoint = f'http://{address}'
+    elif kind == 'tencent':
+        provider = DNSProviderFactory.create('tencent', {'secret_id': 'bench', 'secret_key': 'bench'})
+        provider.scheme = 'http'
+        provider.endpoint = address
+    else:
+        provider = DNSProviderFactory.create('cloudflare', {'api_token': 'bench'})
+        provider.base_url = f'http://{address}/client/v4'
+    provider.name = f'stub-{kind}'
+    return provider
+
+
+class StubError(Exception):
+    """返回给客户端的API错误"""
+    
+    def __init__(self, code: str, message: str, status: int = 400):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """请求处理：按服务器类型分发到对应的接口实现"""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_GET(self):
+        self.handle_api('GET')
+    
+    def do_POST(self):
+        self.handle_api('POST')
+    
+    def do_PUT(self):
+        self.handle_api('PUT')
+    
+    def do_DELETE(self):
+        self.handle_api('DELETE')
+    
+    def handle_api(self, method: str):
+        stub = self.server.stub
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        
+        if stub.options.latency_ms:
+            time.sleep(stub.options.latency_ms / 1000.0)
+        
+        if self.path.startswith('/__stub/'):
+            status, result = 200, stub.control(self.path)
+        else:
+            throttled = not stub.acquire()
+            status, result = getattr(stub, f'handle_{stub.kind}')(method, self.path, self.headers, body, throttled)
+        
+        if isinstance(result, str):
+            data, content_type = result.encode('utf-8'), 'text/plain; charset=utf-8'
+        else:
+            data, content_type = json.dumps(result, ensure_ascii=False).encode('utf-8'), 'application/json'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubServer:
+    """单个提供商的模拟API服务器"""
+    
+    def __init__(self, kind: str, store: ZoneStore, options: Optional[StubOptions] = None):
+        if kind not in PROVIDER_TYPES:
+            raise ValueError(f'不支持的模拟服务器类型: {kind}')
+        self.kind = kind
+        self.store = store
+        self.options = options or StubOptions()
+        self.requests = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._window_start = 0.0
+        self._window_count = 0
+        self.httpd = None
+        self.thread = None
+    
+    @property
+    def address(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'{host}:{port}'
+    
+    def start(self) -> 'StubServer':
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def reset_counters(self):
+        with self._lock:
+            self.requests = 0
+            self.throttled = 0
+    
+    def acquire(self) -> bool:
+        """统计请求数并按每秒窗口限流，返回是否放行"""
+        with self._lock:
+            self.requests += 1
+            if not self.options.throttle_rps:
+                return True
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            if self._window_count > self.options.throttle_rps:
+                self.throttled += 1
+                return False
+            return True
+    
+    def create_provider(self):
+        """创建指向本服务器的提供商实例"""
+        return create_provider(self.kind, self.address)
+    
+    def control(self, path: str) -> Dict[str, Any]:
+        """控制接口：/__stub/stats 读取计数，/__stub/reset 清零计数"""
+        if path.startswith('/__stub/reset'):
+            self.reset_counters()
+        return {'requests': self.requests, 'throttled': self.throttled}
+    
+    def page_size(self, requested: int) -> int:
+        return max(1, min(int(requested), self.options.max_page_size))
+    
+    # ---------- 阿里云 RPC ----------
+    
+    def handle_aliyun(self, method, path, headers, body, throttled):
+        params = {k: v[0] for k, v in urllib.parse.parse_qs(urllib.parse.urlsplit(path).query).items()}
+        if throttled:
+            return 400, {'Code': 'Throttling.User', 'Message': 'Request was denied due to user flow control.'}
+        try:
+            return 200, self.aliyun_action(params.get('Action', ''), params)
+        except StubError as e:
+            return e.status, {'Code': e.code, 'Message': str(e)}
+    
+    def aliyun_action(self, action, params):
+        store = self.store
+        if action == 'DescribeDomains':
+            page, size = int(params.get('PageNumber', 1)), self.page_size(params.get('PageSize', 20))
+            names = list(store.zones)[(page - 1) * size:page * size]
+            return {'TotalCount': len(store.zones), 'PageNumber': page, 'PageSize': size,
+                    'Domains': {'Domain': [{'DomainName': name} for name in names]}}
+        if action in ('DescribeDomainRecords', 'DescribeSubDomainRecords'):
+            if action == 'DescribeSubDomainRecords':
+                sub_domain = params.get('SubDomain', '')
+                domain = params.get('DomainName') or sub_domain.split('.', 1)[-1]
+                rr = '@' if sub_domain == domain else sub_domain[:-len(domain) - 1]
+                record_type = params.get('Type')
+                match = lambda r: r['name'] == rr and (not record_type or r['type'] == record_type)
+            else:
+                domain = params.get('DomainName', '')
+                rr_key, type_key, value_key = (params.get(k) for k in ('RRKeyWord', 'TypeKeyWord', 'ValueKeyWord'))
+                match = lambda r: ((not rr_key or rr_key in r['name']) and (not type_key or r['type'] == type_key)
+                                   and (not value_key or value_key in r['value']))
+            if domain not in store.zones:
+                raise StubError('InvalidDomainName.NoExist', f'域名不存在: {domain}')
+            page, size = int(params.get('PageNumber', 1)), self.page_size(params.get('PageSize', 20))
+            items, total = store.page(domain, (page - 1) * size, size, match)
+            return {'TotalCount': total, 'PageNumber': page, 'PageSize': size,
+                    'DomainRecords': {'Record': [{
+                        'RecordId': str(record_id), 'RR': r['name'], 'Type': r['type'], 'Value': r['value'],
+                        'TTL': r['ttl'], 'Priority': r['priority'], 'Status': 'ENABLE', 'Line': 'default',
+                        'DomainName': domain
+                    } for record_id, r in items]}}
+        if action in ('AddDomainRecord', 'UpdateDomainRecord'):
+            record = {'name': params.get('RR', '@'), 'type': params.get('Type', 'A'),
+                      'value': params.get('Value', ''), 'ttl': int(params.get('TTL', 600)),
+                      'priority': int(params.get('Priority', 0))}
+            if action == 'AddDomainRecord':
+                domain = params.get('DomainName', '')
+                if domain not in store.zones:
+                    raise StubError('InvalidDomainName.NoExist', f'域名不存在: {domain}')
+                return {'RecordId': str(store.add_record(domain, record))}
+            self.require_record(int(params.get('RecordId', 0)))
+            store.update_record(int(params['RecordId']), record)
+            return {'RecordId': params['RecordId']}
+        if action == 'DeleteDomainRecord':
+            record_id = self.require_record(int(params.get('RecordId', 0)))
+            store.delete_record(record_id)
+            return {'RecordId': str(record_id)}
+        raise StubError('InvalidAction.NotFound', f'不支持的接口: {action}')
+    
+    def require_record(self, record_id: int) -> int:
+        if record_id not in self.store.record_zone:
+            raise StubError('DomainRecordNotBelongToUser', f'记录不存在: {record_id}')
+        return record_id
+    
+    # ---------- 腾讯云 DNSPod TC3 ----------
+    
+    def handle_tencent(self, method, path, headers, body, throttled):
+        action = headers.get('X-TC-Action', '')
+        if throttled:
+            return 200, {'Response': {'Error': {'Code': 'RequestLimitExceeded', 'Message': '请求的次数超过了频率限制'},
+                                      'RequestId': 'stub'}}
+        try:
+            params = json.loads(body or b'{}')
+            response = self.tencent_action(action, params)
+        except StubError as e:
+            response = {'Error': {'Code': e.code, 'Message': str(e)}}
+        response['RequestId'] = 'stub'
+        return 200, {'Response': response}
+    
+    def tencent_action(self, action, params):
+        store = self.store
+        if action == 'DescribeDomainList':
+            offset, limit = int(params.get('Offset', 0)), self.page_size(params.get('Limit', 20))
+            names = list(store.zones)[offset:offset + limit]
+            return {'DomainCountInfo': {'AllTotal': len(store.zones)},
+                    'DomainList': [{'Name': name, 'Status': 'ENABLE'} for name in names]}
+        if action == 'DescribeRecordList':
+            domain = params.get('Domain', '')
+            if domain not in store.zones:
+                raise StubError('InvalidParameter.DomainNotExists', f'域名不存在: {domain}')
+            offset, limit = int(params.get('Offset', 0)), self.page_size(params.get('Limit', 20))
+            sub_domain, record_type, keyword = (params.get(k) for k in ('Subdomain', 'RecordType', 'Keyword'))
+            items, total = store.page(domain, offset, limit, lambda r: (
+                (not sub_domain or r['name'] == sub_domain) and (not record_type or r['type'] == record_type)
+                and (not keyword or keyword in r['name'] or keyword in r['value'])))
+            if not total and (sub_domain or record_type or keyword):
+                raise StubError('ResourceNotFound.NoDataOfRecord', '记录列表为空。')
+            return {'RecordCountInfo': {'TotalCount': total, 'ListCount': len(items)},
+                    'RecordList': [{
+                        'RecordId': record_id, 'Name': r['name'], 'Type': r['type'], 'Value': r['value'],
+                        'TTL': r['ttl'], 'MX': r['priority'], 'Status': 'ENABLE', 'Line': '默认'
+                    } for record_id, r in items]}
+        if action in ('CreateRecord', 'ModifyRecord'):
+            record = {'name': params.get('SubDomain', '@'), 'type': params.get('RecordType', 'A'),
+                      'value': params.get('Value', ''), 'ttl': int(params.get('TTL', 600)),
+                      'priority': int(params.get('MX', 0))}
+            if action == 'CreateRecord':
+                domain = params.get('Domain', '')
+                if domain not in store.zones:
+                    raise StubError('InvalidParameter.DomainNotExists', f'域名不存在: {domain}')
+                return {'RecordId': store.add_record(domain, record)}
+            record_id = self.require_record(int(params.get('RecordId', 0)))
+            store.update_record(record_id, record)
+            return {'RecordId': record_id}
+        if action == 'DeleteRecord':
+            record_id = self.require_record(int(params.get('RecordId', 0)))
+            store.delete_record(record_id)
+            return {}
+        raise StubError('InvalidAction', f'不支持的接口: {action}')
+    
+    # ---------- CloudFlare v4 ----------
+    
+    def handle_cloudflare(self, method, path, headers, body, throttled):
+        if throttled:
+            return 429, {'success': False, 'result': None, 'messages': [],
+                         'errors': [{'code': 971, 'message': 'Please wait and consider throttling your request speed'}]}
+        try:
+            parts = urllib.parse.urlsplit(path)
+            query = {k: v[0] for k, v in urllib.parse.parse_qs(parts.query).items()}
+            if headers.get('Content-Type', '').startswith('multipart/form-data'):
+                data = self.form_fields(headers['Content-Type'], body)
+            else:
+                data = json.loads(body) if body else {}
+            result, info = self.cloudflare_action(method, parts.path, query, data)
+            if isinstance(result, str):
+                return 200, result
+            response = {'success': True, 'errors': [], 'messages': [], 'result': result}
+            if info:
+                response['result_info'] = info
+            return 200, response
+        except StubError as e:
+            return e.status, {'success': False, 'result': None, 'messages': [],
+                              'errors': [{'code': e.code, 'message': str(e)}]}
+    
+    def cloudflare_action(self, method, path, query, data):
+        store = self.store
+        segments = [s for s in path.split('/') if s][2:]  # 去掉 client/v4
+        
+        if segments == ['zones'] and method == 'GET':
+            names = [query['name']] if 'name' in query else list(store.zones)
+            names = [n for n in names if n in store.zones]
+            page, size = int(query.get('page', 1)), self.page_size(query.get('per_page', 20))
+            selected = names[(page - 1) * size:page * size]
+            return ([{'id': store.zones[n]['id'], 'name': n, 'status': 'active'} for n in selected],
+                    self.result_info(page, size, len(selected), len(names)))
+        
+        if len(segments) >= 3 and segments[0] == 'zones' and segments[2] == 'dns_records':
+            domain = store.zone_by_id(segments[1])
+            if domain is None:
+                raise StubError(7003, f'Could not route to {path}', 404)
+            
+            if len(segments) == 3 and method == 'GET':
+                page, size = int(query.get('page', 1)), self.page_size(query.get('per_page', 20))
+                fqdn, record_type, content = (query.get(k) for k in ('name', 'type', 'content'))
+                items, total = store.page(domain, (page - 1) * size, size, lambda r: (
+                    (not fqdn or self.cloudflare_name(domain, r) == fqdn)
+                    and (not record_type or r['type'] == record_type) and (not content or r['value'] == content)))
+                return ([self.cloudflare_record(domain, record_id, r) for record_id, r in items],
+                        self.result_info(page, size, len(items), total))
+            
+            if segments[3:] == ['export'] and method == 'GET':
+                return self.cloudflare_export(domain), None
+            
+            if segments[3:] == ['import'] and method == 'POST':
+                # 与现有记录完全相同的记录不会重复添加
+                items, _ = store.page(domain, 0, len(store.zones[domain]['order']))
+                existing = {(r['name'], r['type'], r['value']) for _, r in items}
+                parsed = added = 0
+                for record in ZoneFileParser(domain).parse(data.get('file', '').splitlines()):
+                    parsed += 1
+                    if (record.name, record.type, record.value) in existing:
+                        continue
+                    existing.add((record.name, record.type, record.value))
+                    store.add_record(domain, {'name': record.name, 'type': record.type, 'value': record.value,
+                                              'ttl': record.ttl, 'priority': record.priority})
+                    added += 1
+                return {'recs_added': added, 'total_records_parsed': parsed}, None
+            
+            if len(segments) == 3 and method == 'POST':
+                record_id = store.add_record(domain, self.from_cloudflare(domain, data))
+                return self.cloudflare_record(domain, record_id, store.zones[domain]['records'][record_id]), None
+            
+            if len(segments) == 4:
+                record_id = int(segments[3], 16)
+                self.require_record(record_id)
+                if method == 'PUT':
+                    store.update_record(record_id, self.from_cloudflare(domain, data))
+                    return self.cloudflare_record(domain, record_id, store.zones[domain]['records'][record_id]), None
+                if method == 'DELETE':
+                    store.delete_record(record_id)
+                    return {'id': segments[3]}, None
+        
+        raise StubError(7000, f'No route for that URI: {method} {path}', 404)
+    
+    @staticmethod
+    def result_info(page, size, count, total):
+        return {'page': page, 'per_page': size, 'count': count, 'total_count': total,
+                'total_pages': max(1, (total + size - 1) // size)}
+    
+    def cloudflare_export(self, domain):
+        """按CloudFlare导出格式生成区域文件：注释头、SOA和自身的NS记录，名称均为完整域名"""
+        lines = [';;', f';; Domain:     {domain}.', ';; Exported:   stub', ';;',
+                 ';; SOA Record',
+                 f'{domain}.\t3600\tIN\tSOA\tns1.cloudflare.com. dns.cloudflare.com. 1 10000 2400 604800 3600',
+                 '', ';; NS Records',
+                 f'{domain}.\t86400\tIN\tNS\tns1.ns.cloudflare.com.',
+                 f'{domain}.\t86400\tIN\tNS\tns2.ns.cloudflare.com.', '']
+        items, _ = self.store.page(domain, 0, len(self.store.zones[domain]['order']))
+        for _, r in items:
+            record = DNSRecord(name=f"{self.cloudflare_name(domain, r)}.", type=r['type'], value=r['value'],
+                               ttl=r['ttl'], priority=r['priority'])
+            lines.append(format_record(record) + ' ; cf_tags=cf-proxied:false')
+        return '\n'.join(lines) + '\n'
+    
+    @staticmethod
+    def form_fields(content_type, body):
+        """解析 multipart/form-data 请求体，返回 字段名 -> 文本"""
+        message = email.message_from_bytes(f'Content-Type: {content_type}\r\n\r\n'.encode('latin-1') + body)
+        return {part.get_param('name', header='content-disposition'): part.get_payload(decode=True).decode('utf-8')
+                for part in message.get_payload()}
+    
+    @staticmethod
+    def cloudflare_name(domain, r):
+        return domain if r['name'] == '@' else f"{r['name']}.{domain}"
+    
+    @classmethod
+    def cloudflare_record(cls, domain, record_id, r):
+        name = cls.cloudflare_name(domain, r)
+        record = {'id': f'{record_id:032x}', 'zone_name': domain, 'name': name, 'type': r['type'],
+                  'content': r['value'], 'ttl': r['ttl'], 'proxied': False}
+        if r['type'] == 'MX':
+            record['priority'] = r['priority']
+        return record
+    
+    @staticmethod
+    def from_cloudflare(domain, data):
+        name = data.get('name', domain)
+        if name == domain:
+            name = '@'
+        elif name.endswith(f'.{domain}'):
+            name = name[:-len(domain) - 1]
+        return {'name': name, 'type': data.get('type', 'A'), 'value': data.get('content', ''),
+                'ttl': int(data.get('ttl', 1)), 'priority': int(data.get('priority', 0))}
+
+
+def serve_in_process(kind: str, spec: List[Tuple[str, int]], options: StubOptions, conn):
+    """子进程入口：生成数据并启动服务器，把地址发回父进程后一直运行"""
+    server = StubServer(kind, ZoneStore.from_spec(spec), options).start()
+    conn.send(server.address)
+    conn.close()
+    server.thread.join()
+
+
+class StubProcess:
+    """在子进程中运行的模拟API服务器"""
+    
+    def __init__(self, kind: str, spec: List[Tuple[str, int]], options: Optional[StubOptions] = None):
+        self.kind = kind
+        self.spec = spec
+        self.options = options or StubOptions()
+        self.address = ''
+        self.process = None
+    
+    def start(self) -> 'StubProcess':
+        parent_conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=serve_in_process, args=(self.kind, self.spec, self.options, child_conn), daemon=True
+        )
+        self.process.start()
+        self.address = parent_conn.recv()
+        return self
+    
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def create_provider(self):
+        return create_provider(self.kind, self.address)
+    
+    def stats(self) -> Dict[str, int]:
+        """读取服务端请求计数"""
+        import requests
+        return requests.get(f'http://{self.address}/__stub/stats', timeout=10).json()
+    
+    def reset_counters(self):
+        import requests
+        requests.post(f'http://{self.address}/__stub/reset', timeout=10)
@@ -14,9 +14,15 @@ from qfluentwidgets import FluentIcon as FIF, setTheme, Theme
 
 from app.view.main_window import MainWindow
 from app.common.config import cfg
+from app.common.profiler import profiler
 
 
 def main():
+    # --profile：本次运行开启性能分析（也可在设置中开启）
+    profile = '--profile' in sys.argv
+    if profile:
+        sys.argv.remove('--profile')
+    
     # 启用高DPI缩放
     QApplication.setHighDpiScaleFactorRoundingPolicy(
         Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
@@ -28,6 +34,9 @@ def main():
 
     # 设置主题
     setTheme(Theme.AUTO)
+    
+    if profile or cfg.get('profiling.enabled', False):
+        profiler.start(cfg.get('profiling.block_threshold_ms', 200))
 
     # 创建主窗口
     w = MainWindow()